@@ -0,0 +1,326 @@
+#!/usr/bin/python
+#
+# bench.py -- time the pymnl parse, build, split and socket paths
+#
+# This file is part of the pymnl package, a Python interface
+# for netlink sockets.
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License
+#  as published by the Free Software Foundation; either version 2.1 of
+#  the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+#  USA
+#
+# Usage (from the pymnl root directory):
+#
+#   PYTHONPATH=. python benchmarks/bench.py [--count N] [--repeat N]
+#           [--only name[,name]] [--save FILE] [--baseline FILE]
+#           [--tolerance FRACTION]
+#
+# Results are written to stdout as JSON.  With --baseline, each result
+# is compared against the stored result of the same name and the script
+# exits with status 1 if throughput dropped or allocations grew by more
+# than the tolerance.
+#
+
+from __future__ import print_function
+
+import json
+import optparse
+import socket
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    # Py2 has no allocation tracing, allocations are reported as None
+    tracemalloc = None
+
+import pymnl
+import pymnl.genl
+from pymnl.attributes import Attr, AttrParser
+from pymnl.dump import MessageDumper
+from pymnl.message import Message, MessageList, Payload
+from pymnl.nlsocket import Socket
+
+import corpus
+
+try:
+    timer = time.perf_counter
+except AttributeError:
+    timer = time.time
+
+
+class NullWriter(object):
+    """ A stdout replacement which throws away everything written.
+    """
+    def write(self, data):
+        pass
+
+    def flush(self):
+        pass
+
+
+def bench_split(data):
+    """ MessageList construction from packed multipart datagrams.
+    """
+    datagrams = corpus.pack_datagrams(data['link'] + data['route'] +
+                                      data['genl'])
+    count = len(data['link']) + len(data['route']) + len(data['genl'])
+
+    def run():
+        for datagram in datagrams:
+            MessageList(datagram)
+    return (run, count)
+
+
+def bench_split_lazy(data):
+    """ MessageList construction into LazyMessages, reading only the
+        type and sequence number of each, like an event filter.
+    """
+    datagrams = corpus.pack_datagrams(data['link'] + data['route'] +
+                                      data['genl'])
+    count = len(data['link']) + len(data['route']) + len(data['genl'])
+
+    def run():
+        for datagram in datagrams:
+            for msg in MessageList(datagram, lazy=True):
+                msg.get_type()
+                msg.get_seq()
+    return (run, count)
+
+
+def bench_get_binary(data):
+    """ Message.get_binary() on built messages.
+    """
+    messages = data['link'] + data['route'] + data['genl']
+
+    def run():
+        for msg in messages:
+            msg.get_binary()
+    return (run, len(messages))
+
+
+def bench_add_attr(data):
+    """ Payload.add_attr() building a route-sized payload per message.
+    """
+    attrs = [Attr.new_u32(corpus.RTA_TABLE, 254),
+             Attr(type=corpus.RTA_DST, value=b'\x0a\x01\x02\x00'),
+             Attr.new_u32(corpus.RTA_PRIORITY, 100),
+             Attr(type=corpus.RTA_GATEWAY, value=b'\x0a\x00\x00\x01'),
+             Attr.new_u32(corpus.RTA_OIF, 2),
+             Attr.new_strz(corpus.IFLA_IFNAME, b'eth0')]
+    count = len(data['route'])
+
+    def run():
+        for index in range(count):
+            payload = Payload(b'\x02\x18\x00\x00\xfe\x03\x00\x01' +
+                              b'\x00\x00\x00\x00')
+            for attr in attrs:
+                payload.add_attr(attr)
+    return (run, count)
+
+
+def bench_parse(data):
+    """ AttrParser.parse() on link and route payloads.
+    """
+    items = ([(msg.get_payload(), 16) for msg in data['link']] +
+             [(msg.get_payload(), 12) for msg in data['route']])
+
+    def run():
+        for (payload, offset) in items:
+            AttrParser().parse(payload, offset)
+    return (run, len(items))
+
+
+def bench_genl_parse(data):
+    """ GenlFamilyAttrParser on CTRL_CMD_NEWFAMILY payloads.
+    """
+    payloads = [msg.get_payload() for msg in data['genl']]
+    offset = len(pymnl.genl.GenlMessageHeader())
+
+    def run():
+        for payload in payloads:
+            pymnl.genl.GenlFamilyAttrParser().parse(payload, offset)
+    return (run, len(payloads))
+
+
+def bench_printf(data):
+    """ Payload.printf() with output sent nowhere.
+    """
+    payloads = [msg.get_payload() for msg in data['route']]
+
+    def run():
+        old_stdout = sys.stdout
+        sys.stdout = NullWriter()
+        try:
+            for payload in payloads:
+                payload.printf(corpus.RTM_NEWROUTE, 12)
+        finally:
+            sys.stdout = old_stdout
+    return (run, len(payloads))
+
+
+def bench_dump(data):
+    """ MessageDumper.dump() of the same payloads as bench_printf.
+    """
+    messages = data['route']
+    dumper = MessageDumper(NullWriter(),
+                           extra_header_sizes={corpus.RTM_NEWROUTE: 12})
+
+    def run():
+        for msg in messages:
+            dumper.dump(msg)
+    return (run, len(messages))
+
+
+def bench_socket(data):
+    """ Socket.send() and Socket.recv() over a local datagram socketpair.
+    """
+    messages = data['route']
+    sender = Socket(pymnl.NETLINK_GENERIC)
+    receiver = Socket(pymnl.NETLINK_GENERIC)
+    # swap the netlink sockets for a connected pair of local sockets
+    sender.get_sock().close()
+    receiver.get_sock().close()
+    (sender._socket, receiver._socket) = socket.socketpair(socket.AF_UNIX,
+                                                        socket.SOCK_DGRAM)
+
+    def run():
+        for msg in messages:
+            sender.send(msg)
+            receiver.recv()
+    return (run, len(messages))
+
+
+# name, setup function
+BENCHMARKS = [("MessageList.split", bench_split),
+              ("MessageList.split_lazy", bench_split_lazy),
+              ("Message.get_binary", bench_get_binary),
+              ("Payload.add_attr", bench_add_attr),
+              ("AttrParser.parse", bench_parse),
+              ("GenlFamilyAttrParser.parse", bench_genl_parse),
+              ("Payload.printf", bench_printf),
+              ("MessageDumper.dump", bench_dump),
+              ("Socket.send_recv", bench_socket)]
+
+
+def measure(run, count, repeat):
+    """ Return a dict with the best messages per second out of repeat
+        runs and the peak bytes allocated during one run.
+
+        run - callable processing count messages
+
+        count - number of messages processed by one call to run
+    """
+    best = None
+    for index in range(repeat):
+        start = timer()
+        run()
+        elapsed = timer() - start
+        if ((best is None) or (elapsed < best)):
+            best = elapsed
+    allocated = None
+    if (tracemalloc):
+        tracemalloc.start()
+        try:
+            run()
+            allocated = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {'messages': count,
+            'seconds': best,
+            'msgs_per_sec': count / max(best, 1e-9),
+            'bytes_allocated': allocated}
+
+
+def compare(results, baseline, tolerance):
+    """ Return a list of strings describing each result which regressed
+        by more than tolerance (a fraction) against the baseline.
+    """
+    regressions = []
+    for (name, result) in results.items():
+        try:
+            base = baseline[name]
+        except KeyError:
+            continue
+        floor = base['msgs_per_sec'] * (1.0 - tolerance)
+        if (result['msgs_per_sec'] < floor):
+            regressions.append("%s: %.0f msgs/sec, baseline %.0f" %
+                        (name, result['msgs_per_sec'], base['msgs_per_sec']))
+        if ((result['bytes_allocated'] is not None) and
+                                    (base['bytes_allocated'] is not None)):
+            ceiling = base['bytes_allocated'] * (1.0 + tolerance)
+            if (result['bytes_allocated'] > ceiling):
+                regressions.append("%s: %d bytes allocated, baseline %d" %
+                        (name, result['bytes_allocated'],
+                         base['bytes_allocated']))
+    return regressions
+
+
+def main(argv):
+    parser = optparse.OptionParser()
+    parser.add_option("--count", type="int", default=1000,
+                      help="messages of each kind in the corpus")
+    parser.add_option("--repeat", type="int", default=5,
+                      help="timed runs per benchmark, best is kept")
+    parser.add_option("--only", default=None,
+                      help="comma separated list of benchmarks to run")
+    parser.add_option("--save", default=None,
+                      help="write the results to this baseline file")
+    parser.add_option("--baseline", default=None,
+                      help="compare against this baseline file")
+    parser.add_option("--tolerance", type="float", default=0.25,
+                      help="allowed fractional regression (default 0.25)")
+    (options, args) = parser.parse_args(argv)
+
+    data = corpus.build_corpus(options.count)
+    selected = None
+    if (options.only):
+        selected = options.only.split(",")
+
+    results = {}
+    for (name, setup) in BENCHMARKS:
+        if (selected and (name not in selected)):
+            continue
+        (run, count) = setup(data)
+        results[name] = measure(run, count, options.repeat)
+
+    report = {'python': sys.version.split()[0],
+              'count': options.count,
+              'results': results}
+    print(json.dumps(report, indent=2, sort_keys=True))
+
+    if (options.save):
+        save_file = open(options.save, "w")
+        try:
+            json.dump(report, save_file, indent=2, sort_keys=True)
+        finally:
+            save_file.close()
+
+    if (options.baseline):
+        baseline_file = open(options.baseline)
+        try:
+            baseline = json.load(baseline_file)['results']
+        finally:
+            baseline_file.close()
+        regressions = compare(results, baseline, options.tolerance)
+        if (regressions):
+            for line in regressions:
+                print("REGRESSION", line, file=sys.stderr)
+            return 1
+    return 0
+
+
+if (__name__ == "__main__"):
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,245 @@
+#!/usr/bin/python
+#
+# corpus.py -- synthetic netlink message corpus for benchmarks
+#
+# This file is part of the pymnl package, a Python interface
+# for netlink sockets.
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License
+#  as published by the Free Software Foundation; either version 2.1 of
+#  the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+#  USA
+#
+
+from random import Random
+import socket
+from struct import pack
+
+import pymnl
+import pymnl.genl
+import pymnl.nlsocket
+from pymnl.attributes import (Attr, ATTR_HDRLEN, NLA_ALIGN,
+                              header_format)
+from pymnl.message import Message, Payload, NLM_F_MULTI
+
+# rtnetlink message types used by the corpus
+RTM_NEWLINK = 16
+RTM_NEWROUTE = 24
+
+# link attributes (linux/if_link.h)
+IFLA_ADDRESS = 1
+IFLA_BROADCAST = 2
+IFLA_IFNAME = 3
+IFLA_MTU = 4
+IFLA_LINK = 5
+IFLA_QDISC = 6
+IFLA_STATS = 7
+IFLA_MASTER = 10
+IFLA_TXQLEN = 13
+IFLA_MAP = 14
+IFLA_OPERSTATE = 16
+IFLA_LINKMODE = 17
+IFLA_STATS64 = 23
+IFLA_AF_SPEC = 26
+IFLA_GROUP = 27
+
+# route attributes (linux/rtnetlink.h)
+RTA_DST = 1
+RTA_OIF = 4
+RTA_GATEWAY = 5
+RTA_PRIORITY = 6
+RTA_PREFSRC = 7
+RTA_TABLE = 15
+
+# extra header formats
+IFINFOMSG_FORMAT = "BBHiII"
+RTMSG_FORMAT = "BBBBBBBBI"
+
+
+def _short_attr(type_, value):
+    """ Return a packed attribute whose length field is not aligned, the
+        way the kernel packs attributes shorter than four bytes.
+
+        type_ - attribute type
+
+        value - packed attribute payload
+    """
+    length = ATTR_HDRLEN + len(value)
+    return (pack(header_format, length, type_) + value +
+            b'\x00' * (NLA_ALIGN(length) - length))
+
+
+def _u32_nested(type_, values):
+    """ Return a nested Attr holding one u32 Attr per value.
+
+        type_ - type of the outer (nested) attribute
+
+        values - list of u32 values, attribute types count up from one
+    """
+    inner = b''.join([Attr.new_u32(index + 1, value).get_binary()
+                        for (index, value) in enumerate(values)])
+    attr = Attr(type=type_, value=inner)
+    attr.toggle_nested()
+    return attr
+
+
+def link_message(rand, index, seq=0, pid=0):
+    """ Return a Message which looks like an RTM_NEWLINK dump entry.
+
+        The attribute mix (names, addresses, 32 and 64 bit stats blobs,
+        nested per-family configuration) mirrors what a typical kernel
+        sends for an ethernet or veth device, about 1KB per message.
+
+        rand - random.Random instance
+
+        index - interface index
+    """
+    msg = Message()
+    msg.set_type(RTM_NEWLINK)
+    msg.set_flags(NLM_F_MULTI)
+    msg.set_seq(seq)
+    msg.set_portid(pid)
+    msg.put_extra_header(Payload(pack(IFINFOMSG_FORMAT, socket.AF_UNSPEC,
+                                      0, 1, index, 0x11043, 0)))
+    payload = msg.get_payload()
+    name = ("veth%x" % rand.randint(0, 0xffffff)).encode()
+    mac = bytes(bytearray([rand.randint(0, 255) for i in range(6)]))
+    payload.add_attr(Attr.new_strz(IFLA_IFNAME, name))
+    payload.add_attr(Attr.new_u32(IFLA_TXQLEN, 1000))
+    payload.set(payload.get_data() +
+                _short_attr(IFLA_OPERSTATE, pack("B", 6)) +
+                _short_attr(IFLA_LINKMODE, pack("B", 0)))
+    payload.add_attr(Attr.new_u32(IFLA_MTU, 1500))
+    payload.add_attr(Attr.new_u32(IFLA_GROUP, 0))
+    payload.add_attr(Attr.new_u32(IFLA_MASTER, rand.randint(1, 64)))
+    payload.add_attr(Attr.new_u32(IFLA_LINK, rand.randint(1, 64)))
+    payload.add_attr(Attr.new_strz(IFLA_QDISC, b'noqueue'))
+    payload.add_attr(Attr(type=IFLA_MAP, value=b'\x00' * 24))
+    payload.set(payload.get_data() +
+                _short_attr(IFLA_ADDRESS, mac) +
+                _short_attr(IFLA_BROADCAST, b'\xff' * 6))
+    payload.add_attr(Attr(type=IFLA_STATS64,
+            value=pack("24Q", *[rand.randint(0, 1 << 40)
+                                    for i in range(24)])))
+    payload.add_attr(Attr(type=IFLA_STATS,
+            value=pack("24I", *[rand.randint(0, 1 << 31)
+                                    for i in range(24)])))
+    # AF_INET and AF_INET6 configuration tables
+    payload.add_attr(_u32_nested(IFLA_AF_SPEC,
+            [rand.randint(0, 1) for i in range(96)]))
+    return msg
+
+
+def route_message(rand, seq=0, pid=0):
+    """ Return a Message which looks like an RTM_NEWROUTE dump entry
+        for an IPv4 unicast route through a gateway.
+
+        rand - random.Random instance
+    """
+    msg = Message()
+    msg.set_type(RTM_NEWROUTE)
+    msg.set_flags(NLM_F_MULTI)
+    msg.set_seq(seq)
+    msg.set_portid(pid)
+    msg.put_extra_header(Payload(pack(RTMSG_FORMAT, socket.AF_INET,
+                                      rand.choice((8, 16, 24, 32)),
+                                      0, 0, 254, 3, 0, 1, 0)))
+    payload = msg.get_payload()
+    payload.add_attr(Attr.new_u32(RTA_TABLE, 254))
+    payload.add_attr(Attr(type=RTA_DST,
+            value=pack("4B", 10, rand.randint(0, 255),
+                       rand.randint(0, 255), 0)))
+    payload.add_attr(Attr.new_u32(RTA_PRIORITY, rand.randint(0, 1024)))
+    payload.add_attr(Attr(type=RTA_PREFSRC, value=pack("4B", 10, 0, 0, 1)))
+    payload.add_attr(Attr(type=RTA_GATEWAY,
+            value=pack("4B", 10, 0, 0, rand.randint(2, 254))))
+    payload.add_attr(Attr.new_u32(RTA_OIF, rand.randint(1, 64)))
+    return msg
+
+
+def genl_family_message(rand, seq=0, pid=0):
+    """ Return a Message which looks like a CTRL_CMD_NEWFAMILY reply,
+        with nested operations and multicast groups.
+
+        rand - random.Random instance
+    """
+    msg = Message()
+    msg.set_type(pymnl.genl.GENL_ID_CTRL)
+    msg.set_seq(seq)
+    msg.set_portid(pid)
+    msg.put_extra_header(pymnl.genl.GenlMessageHeader(
+                            command=pymnl.genl.CTRL_CMD_NEWFAMILY,
+                            version=2))
+    payload = msg.get_payload()
+    payload.add_attr(Attr.new_strz(pymnl.genl.CTRL_ATTR_FAMILY_NAME,
+                        ("family%d" % rand.randint(0, 999)).encode()))
+    payload.set(payload.get_data() +
+                _short_attr(pymnl.genl.CTRL_ATTR_FAMILY_ID,
+                            pack("H", rand.randint(16, 1023))))
+    payload.add_attr(Attr.new_u32(pymnl.genl.CTRL_ATTR_VERSION, 1))
+    payload.add_attr(Attr.new_u32(pymnl.genl.CTRL_ATTR_HDRSIZE, 0))
+    payload.add_attr(Attr.new_u32(pymnl.genl.CTRL_ATTR_MAXATTR, 200))
+    ops = b''.join([_u32_nested(index + 1,
+                                [index + 1, 0x0e]).get_binary()
+                        for index in range(rand.randint(8, 40))])
+    ops_attr = Attr(type=pymnl.genl.CTRL_ATTR_OPS, value=ops)
+    ops_attr.toggle_nested()
+    payload.add_attr(ops_attr)
+    groups = b''
+    for index in range(rand.randint(1, 4)):
+        group = (Attr.new_u32(pymnl.genl.CTRL_ATTR_MCAST_GRP_ID,
+                              rand.randint(1, 64)).get_binary() +
+                 Attr.new_strz(pymnl.genl.CTRL_ATTR_MCAST_GRP_NAME,
+                               ("group%d" % index).encode()).get_binary())
+        group_attr = Attr(type=index + 1, value=group)
+        group_attr.toggle_nested()
+        groups = groups + group_attr.get_binary()
+    groups_attr = Attr(type=pymnl.genl.CTRL_ATTR_MCAST_GROUPS, value=groups)
+    groups_attr.toggle_nested()
+    payload.add_attr(groups_attr)
+    return msg
+
+
+def build_corpus(count=1000, seed=0):
+    """ Return a dict of lists of Message objects, keyed by the kind of
+        message ('link', 'route', and 'genl').
+
+        count - number of messages of each kind
+
+        seed - random seed, so repeated runs use the same corpus
+    """
+    rand = Random(seed)
+    return {'link': [link_message(rand, index + 1, seq=1)
+                        for index in range(count)],
+            'route': [route_message(rand, seq=1) for index in range(count)],
+            'genl': [genl_family_message(rand, seq=1)
+                        for index in range(count)]}
+
+
+def pack_datagrams(messages, bufsize=pymnl.nlsocket.SOCKET_BUFFER_SIZE):
+    """ Return a list of binary strings, each holding as many whole
+        messages as fit into bufsize, like a kernel dump reply.
+
+        messages - list of Message objects
+    """
+    datagrams = []
+    current = b''
+    for msg in messages:
+        binary = msg.get_binary()
+        if (current and (len(current) + len(binary) > bufsize)):
+            datagrams.append(current)
+            current = b''
+        current = current + binary
+    if (current):
+        datagrams.append(current)
+    return datagrams
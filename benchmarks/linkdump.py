@@ -0,0 +1,93 @@
+#!/usr/bin/python
+#
+# linkdump.py -- measure the size of RTM_GETLINK dumps by IFLA_EXT_MASK
+#
+# This file is part of the pymnl package, a Python interface
+# for netlink sockets.
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License
+#  as published by the Free Software Foundation; either version 2.1 of
+#  the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+#  USA
+#
+# Usage (from the pymnl root directory):
+#
+#   PYTHONPATH=. python benchmarks/linkdump.py [--repeat N]
+#
+# Dumps the links of the running host with each IFLA_EXT_MASK setting and
+# writes the bytes received per interface, and the time taken, to stdout
+# as JSON.  On hosts with SR-IOV devices, compare "vf" with
+# "vf+skip_stats" and "default" to see the cost of the per-VF blocks.
+#
+
+from __future__ import print_function
+
+import json
+import optparse
+import sys
+import time
+
+import pymnl
+from pymnl.callback import CallbackRunner
+from pymnl.nlsocket import Socket
+from pymnl.rtnl import (link_dump_request, RTEXT_FILTER_SKIP_STATS,
+                        RTEXT_FILTER_VF)
+
+try:
+    timer = time.perf_counter
+except AttributeError:
+    timer = time.time
+
+# name -> IFLA_EXT_MASK, None sends no IFLA_EXT_MASK at all
+MASKS = [('default', None),
+         ('skip_stats', RTEXT_FILTER_SKIP_STATS),
+         ('vf', RTEXT_FILTER_VF),
+         ('vf+skip_stats', RTEXT_FILTER_VF | RTEXT_FILTER_SKIP_STATS)]
+
+
+def measure(ext_mask, repeat):
+    """ Dump the links repeat times and return the result for one mask.
+    """
+    best = None
+    for run in range(repeat):
+        sock = Socket(pymnl.NETLINK_ROUTE)
+        sock.bind()
+        links = []
+        start = timer()
+        sock.send(link_dump_request(ext_mask=ext_mask, seq=run + 1))
+        CallbackRunner(default=links.append, seq=run + 1).run_socket(sock)
+        elapsed = timer() - start
+        received = sock.stats()['bytes_received']
+        sock.close()
+        if ((best is None) or (elapsed < best)):
+            best = elapsed
+    return {'interfaces': len(links),
+            'bytes_received': received,
+            'bytes_per_interface': received // max(len(links), 1),
+            'seconds': best}
+
+
+def main(argv=None):
+    parser = optparse.OptionParser(usage="%prog [options]")
+    parser.add_option("--repeat", type="int", default=5,
+                      help="dumps per mask, the fastest is reported")
+    (options, args) = parser.parse_args(argv)
+    results = {}
+    for (name, ext_mask) in MASKS:
+        results[name] = measure(ext_mask, options.repeat)
+    print(json.dumps(results, indent=2, sort_keys=True))
+    return 0
+
+
+if (__name__ == "__main__"):
+    sys.exit(main(sys.argv[1:]))
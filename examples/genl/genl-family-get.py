@@ -30,6 +30,7 @@ import sys
 import pymnl
 import pymnl.genl
 from pymnl.attributes import Attr
+from pymnl.callback import CallbackRunner, CB_ERROR, CB_OK
 from pymnl.message import Message, Payload
 from pymnl.nlsocket import Socket
 
@@ -64,32 +65,33 @@ else:
     payload.add_attr(family_name)
     nlmsg.add_payload(payload)
 
+    def family_cb(msg):
+        """ Print the family described by a CTRL_CMD_NEWFAMILY reply.
+        """
+        # setup and parse attributes in message payload
+        genl_parser = pymnl.genl.GenlFamilyAttrParser()
+        attrs = genl_parser.parse(msg.get_payload(),
+                                len(pymnl.genl.GenlMessageHeader()))
+        print("name=%s\tid=%u\tversion=%u\thdrsize=%u\tmaxattr=%u" %
+                (attrs['name'], attrs['id'], attrs['version'],
+                attrs['hdrsize'], attrs['maxattr']))
+        print("ops:")
+        for op in attrs['ops'].keys():
+            print("id-0x%x flags" % (op, ))
+        print()
+        print("grps:")
+        for group in attrs['groups'].keys():
+            print("id-0x%x name: %s" % (group, attrs['groups'][group]))
+        return CB_OK
+
     # send message through socket
     sock.send(nlmsg)
 
-    # read returned message from netlink
-    return_msg = sock.recv(flags=socket.MSG_DONTWAIT)
+    # process the returned messages until the ack (or an error) arrives
+    runner = CallbackRunner({pymnl.genl.GENL_ID_CTRL: family_cb},
+                            nlmsg.get_seq(), sock.get_portid())
+    if (runner.run_socket(sock) == CB_ERROR):
+        # tell the user what error occurred
+        print("error:", runner.get_errstr())
 
     sock.close()
-
-    # process the messages returned
-    for msg in return_msg:
-        if (msg.get_errno()):
-            # tell the user what error occurred
-            print("error:", msg.get_errstr())
-        else:
-            # setup and parse attributes in message payload
-            genl_parser = pymnl.genl.GenlFamilyAttrParser()
-            attrs = genl_parser.parse(msg.get_payload(),
-                                    len(pymnl.genl.GenlMessageHeader()))
-            print("name=%s\tid=%u\tversion=%u\thdrsize=%u\tmaxattr=%u" %
-                    (attrs['name'], attrs['id'], attrs['version'],
-                    attrs['hdrsize'], attrs['maxattr']))
-            print("ops:")
-            for op in attrs['ops'].keys():
-                print("id-0x%x flags" % (op, ))
-            print()
-            print("grps:")
-            for group in attrs['groups'].keys():
-                print("id-0x%x name: %s" % (group, attrs['groups'][group]))
-
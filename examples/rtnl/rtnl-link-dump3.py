@@ -31,10 +31,7 @@ import pymnl
 from pymnl.attributes import Attr
 from pymnl.message import Message, Payload
 from pymnl.nlsocket import Socket
-
-import if_
-import if_link
-import rtnetlink
+import pymnl.rtnl
 
 # init and bind netlink socket
 sock = Socket(pymnl.NETLINK_ROUTE)
@@ -42,14 +39,14 @@ sock.bind(pymnl.nlsocket.SOCKET_AUTOPID, 0)
 
 # init and build request message
 rtnlmsg = Message()
-rtnlmsg.set_type(rtnetlink.RTM_GETLINK)
+rtnlmsg.set_type(pymnl.rtnl.RTM_GETLINK)
 rtnlmsg.set_flags(pymnl.message.NLM_F_REQUEST | pymnl.message.NLM_F_DUMP)
 
 sequence = randint(0, pow(2, 31))
 rtnlmsg.set_seq(sequence)
 
 # build rtgenmsg header and add it to the message
-rtgenmsg_header = rtnetlink.RtGenMessageHeader(socket.AF_PACKET)
+rtgenmsg_header = pymnl.rtnl.RtGenMessageHeader(socket.AF_PACKET)
 rtnlmsg.put_extra_header(rtgenmsg_header)
 
 # send message through socket
@@ -66,26 +63,20 @@ for msg in return_msg:
         # tell the user what error occurred
         print("error:", msg.get_errstr())
     else:
-        # use the payload data to create interface info message
-        ifm = if_.IfInfoMessage(msg.get_payload().get_binary())
+        # decode the interface info header, attributes are decoded on use
+        link = pymnl.rtnl.Link(msg)
         # begin output line with interface info
         line = ("index=%d type=%d flags=%d family=%d " %
-                (ifm.index, ifm.type_, ifm.flags, ifm.family))
+                (link.index, link.type_, link.flags, link.family))
 
         # add running status to output line
-        if (ifm.flags & if_.IFF_RUNNING):
+        if (link.is_running()):
             line = line + "[RUNNING] "
         else:
             line = line + "[NOT RUNNING] "
 
-        ifla_parser = if_link.IFLAttrParser()
-        # make a payload with the interface link attributes data
-        ifla_payload = Payload(msg.get_payload().get_binary()[len(ifm):])
-        # parse the new payload into a dict of Attrs
-        attrs = ifla_parser.parse(ifla_payload)
-
         # add final interface info to output line
-        line = line + ("name=%s mtu=%d " % (attrs['ifname'], attrs['mtu']))
+        line = line + ("name=%s mtu=%d " % (link.ifname, link.mtu))
 
         # finally output the dang line
         print(line)
@@ -31,17 +31,11 @@ import pymnl
 from pymnl.attributes import Attr
 from pymnl.message import Message, Payload
 from pymnl.nlsocket import Socket
-
-import if_
-import if_link
-import rtnetlink
-
-# add a name for the multicast group on which to listen
-RTMGRP_LINK = 1
+import pymnl.rtnl
 
 # init and bind netlink socket
 sock = Socket(pymnl.NETLINK_ROUTE)
-sock.bind(pymnl.nlsocket.SOCKET_AUTOPID, RTMGRP_LINK)
+sock.bind(pymnl.nlsocket.SOCKET_AUTOPID, pymnl.rtnl.RTMGRP_LINK)
 
 try:
     while (True):
@@ -54,27 +48,21 @@ try:
                 # tell the user what error occurred
                 print("error:", msg.get_errstr())
             else:
-                # use the payload data to create interface info message
-                ifm = if_.IfInfoMessage(msg.get_payload().get_binary())
+                # decode the interface info header, attributes are
+                # decoded on use
+                link = pymnl.rtnl.Link(msg)
                 # begin output line with interface info
                 line = ("index=%d type=%d flags=%d family=%d " %
-                        (ifm.index, ifm.type_, ifm.flags, ifm.family))
+                        (link.index, link.type_, link.flags, link.family))
 
                 # add running status to output line
-                if (ifm.flags & if_.IFF_RUNNING):
+                if (link.is_running()):
                     line = line + "[RUNNING] "
                 else:
                     line = line + "[NOT RUNNING] "
 
-                ifla_parser = if_link.IFLAttrParser()
-                # make a payload with the interface link attributes data
-                ifla_payload = Payload(msg.get_payload().get_binary()[len(ifm):])
-                # parse the new payload into a dict of Attrs
-                attrs = ifla_parser.parse(ifla_payload)
-
                 # add final interface info to output line
-                line = line + ("mtu=%d name=%s " %
-                                        (attrs['mtu'], attrs['ifname']))
+                line = line + ("mtu=%s name=%s " % (link.mtu, link.ifname))
 
                 # finally output the dang line
                 print(line)
@@ -31,10 +31,7 @@ import pymnl
 from pymnl.attributes import Attr
 from pymnl.message import Message, Payload
 from pymnl.nlsocket import Socket
-
-import if_
-import if_link
-import rtnetlink
+import pymnl.rtnl
 
 change = 0
 flags = 0
@@ -44,33 +41,30 @@ if (len(sys.argv) != 3):
     sys.exit()
 
 if (sys.argv[2].lower() == "up"):
-    change |= if_.IFF_UP
-    flags |= if_.IFF_UP
+    change |= pymnl.rtnl.IFF_UP
+    flags |= pymnl.rtnl.IFF_UP
 elif (sys.argv[2].lower() == "down"):
-    change |= if_.IFF_UP;
-    flags &= ~if_.IFF_UP;
+    change |= pymnl.rtnl.IFF_UP;
+    flags &= ~pymnl.rtnl.IFF_UP;
 else:
     print("%s is not `up' nor `down'" % (sys.argv[2],))
     sys.exit()
 
 # init and build request message
 rtnlmsg = Message()
-rtnlmsg.set_type(rtnetlink.RTM_NEWLINK)
+rtnlmsg.set_type(pymnl.rtnl.RTM_NEWLINK)
 rtnlmsg.set_flags(pymnl.message.NLM_F_REQUEST | pymnl.message.NLM_F_ACK)
 
 sequence = randint(0, pow(2, 31))
 rtnlmsg.set_seq(sequence)
 
 # build ifm header and add it to the message
-ifm = if_.IfInfoMessage()
-ifm.family = socket.AF_UNSPEC
-ifm.change = change
-ifm.flags = flags
+ifm = pymnl.rtnl.IfInfoMessage(socket.AF_UNSPEC, flags=flags, change=change)
 
 rtnlmsg.put_extra_header(ifm)
 
 payload = rtnlmsg.get_payload()
-payload.add_attr(Attr.new_str(if_link.IFLA_IFNAME, sys.argv[1].encode()))
+payload.add_attr(Attr.new_str(pymnl.rtnl.IFLA_IFNAME, sys.argv[1].encode()))
 
 # init and bind netlink socket
 sock = Socket(pymnl.NETLINK_ROUTE)
@@ -23,7 +23,6 @@
 
 from __future__ import print_function
 
-import ctypes
 from random import randint
 import socket
 from struct import pack, unpack
@@ -33,25 +32,24 @@ import pymnl
 from pymnl.attributes import Attr
 from pymnl.message import Message, Payload
 from pymnl.nlsocket import Socket
-
-import if_
-import if_link
-import rtnetlink
+from pymnl.rtnl import LinkNameCache
+import pymnl.rtnl
 
 if (len(sys.argv) <= 3):
     print("Usage: %s iface destination cidr [gateway]" % sys.argv[0]);
     print("Example: %s eth0 10.0.1.12 32 10.0.1.11" % sys.argv[0]);
     sys.exit()
 
-libc = ctypes.CDLL("libc.so.6")
+# one link dump, then name lookups are dict lookups
+links = LinkNameCache(subscribe=False)
 
-iface = libc.if_nametoindex(sys.argv[1].encode())
+iface = links.get_index(sys.argv[1])
 if (iface == 0):
     print("Bad interface name")
     sys.exit()
 
 try:
-    dst = unpack("L", socket.inet_pton(socket.AF_INET, sys.argv[2]))[0]
+    dst = unpack("I", socket.inet_pton(socket.AF_INET, sys.argv[2]))[0]
 except socket.error:
     print("Bad destination")
     sys.exit()
@@ -64,40 +62,35 @@ except:
 
 if (len(sys.argv) >= 5):
     try:
-        gw = unpack("L", socket.inet_pton(socket.AF_INET, sys.argv[4]))[0]
+        gw = unpack("I", socket.inet_pton(socket.AF_INET, sys.argv[4]))[0]
     except:
         print("Bad gateway")
         sys.exit()
 
 # init and build request message
 rtnlmsg = Message()
-rtnlmsg.set_type(rtnetlink.RTM_NEWROUTE)
+rtnlmsg.set_type(pymnl.rtnl.RTM_NEWROUTE)
 rtnlmsg.set_flags(pymnl.message.NLM_F_REQUEST | pymnl.message.NLM_F_CREATE)
 rtnlmsg.set_seq(randint(0, pow(2, 31)))
 
 # build ifm header and add it to the message
-rtm = rtnetlink.RtMessage()
-rtm._family = socket.AF_INET
-rtm._dst_len = mask
-rtm._src_len = 0
-rtm._tos = 0
-rtm._protocol = rtnetlink.RTPROT_BOOT
-rtm._table = rtnetlink.RT_TABLE_MAIN
-rtm._type = rtnetlink.RTN_UNICAST
+rtm = pymnl.rtnl.RtMessage(socket.AF_INET, dst_len=mask,
+                           table=pymnl.rtnl.RT_TABLE_MAIN,
+                           protocol=pymnl.rtnl.RTPROT_BOOT,
+                           type_=pymnl.rtnl.RTN_UNICAST)
 # Is there any gateway?
 if (len(sys.argv) == 4):
-    rtm._scope = rtnetlink.RT_SCOPE_LINK
+    rtm.scope = pymnl.rtnl.RT_SCOPE_LINK
 else:
-    rtm._scope = rtnetlink.RT_SCOPE_UNIVERSE
-rtm._flags = 0
+    rtm.scope = pymnl.rtnl.RT_SCOPE_UNIVERSE
 
 rtnlmsg.put_extra_header(rtm)
 
 payload = rtnlmsg.get_payload()
-payload.add_attr(Attr.new_u32(rtnetlink.RTA_DST, dst))
-payload.add_attr(Attr.new_u32(rtnetlink.RTA_OIF, iface))
+payload.add_attr(Attr.new_u32(pymnl.rtnl.RTA_DST, dst))
+payload.add_attr(Attr.new_u32(pymnl.rtnl.RTA_OIF, iface))
 if (len(sys.argv) >= 5):
-    payload.add_attr(Attr.new_u32(rtnetlink.RTA_GATEWAY, gw))
+    payload.add_attr(Attr.new_u32(pymnl.rtnl.RTA_GATEWAY, gw))
 
 # init and bind netlink socket
 sock = Socket(pymnl.NETLINK_ROUTE)
@@ -0,0 +1,162 @@
+#!/usr/bin/python
+#
+# ack.py -- collect the acknowledgements of batched requests
+#
+# This file is part of the pymnl package, a Python interface
+# for netlink sockets.
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License
+#  as published by the Free Software Foundation; either version 2.1 of
+#  the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+#  USA
+#
+
+from array import array
+from struct import Struct
+import time
+
+from pymnl.message import MSG_HDRLEN, NLMSG_ERROR, NLM_F_ACK
+from pymnl.nlsocket import SOCKET_BUFFER_SIZE
+
+# nlmsg_len and nlmsg_type at the start of each message
+_length_type = Struct("=IH")
+
+# nlmsg_flags and nlmsg_seq, at offset 6 of the header
+_flags_seq = Struct("=HI")
+
+# error code and the nlmsg_seq of the echoed request in an NLMSG_ERROR
+_error_seq = Struct("=i8xI")
+
+_SEQ_MASK = 0xffffffff
+
+
+class AckCollector(object):
+    """ Send a batch of requests and find out which of them failed.
+
+        The requests are numbered with consecutive sequence numbers,
+        packed several to a datagram, and the acknowledgements are read
+        into one reusable buffer and scanned in place: only the error
+        code and the sequence number of the echoed request are read from
+        each NLMSG_ERROR, so no Message objects are built.  The result is
+        an array of errnos in batch order, zero for each request which
+        succeeded.
+
+        In failures-only mode, only the last request of each datagram
+        asks for an acknowledgement (NLM_F_ACK).  The kernel still sends
+        an NLMSG_ERROR for every request which fails, so the replies to
+        a datagram shrink to its errors plus one acknowledgement.
+
+        Acknowledgements are drained after each datagram, which keeps the
+        socket receive queue from overflowing on long batches.  Other
+        messages received on the socket (replies, events) are skipped.
+    """
+    def __init__(self, sock, seq=None, failures_only=False,
+                       bufsize=SOCKET_BUFFER_SIZE):
+        """ Create an AckCollector.
+
+            sock - pymnl.nlsocket.Socket
+
+            seq - sequence number of the first request, defaults to the
+                current time like the libmnl examples
+
+            failures_only - if True, only request acknowledgements for
+                the last request of each datagram
+
+            bufsize - largest datagram sent, and size of the receive
+                buffer
+        """
+        self._sock = sock
+        if (seq is None):
+            seq = int(time.time())
+        self._seq = seq & _SEQ_MASK
+        self._failures_only = failures_only
+        self._bufsize = bufsize
+        self._buffer = bytearray(max(bufsize, SOCKET_BUFFER_SIZE))
+
+    def get_seq(self):
+        """ Return the sequence number the next request will get.
+        """
+        return self._seq
+
+    def run(self, messages):
+        """ Send the requests and wait for their acknowledgements.
+
+            messages - list of Message objects (or binary strings holding
+                one message each).  Their flags and sequence numbers are
+                set in the copy sent, the objects are not changed.
+
+            Returns an array('i') with one errno per request.  Use
+            array.index() or a list comprehension to find the failures.
+        """
+        count = len(messages)
+        results = array('i', [0]) * count
+        base = self._seq
+        index = 0
+        while (index < count):
+            first = index
+            datagram = bytearray()
+            while (index < count):
+                binary = messages[index]
+                if (not isinstance(binary, (bytes, bytearray))):
+                    binary = binary.get_binary()
+                if ((index > first) and
+                        (len(datagram) + len(binary) > self._bufsize)):
+                    break
+                offset = len(datagram)
+                datagram += binary
+                flags = _flags_seq.unpack_from(datagram, offset + 6)[0]
+                if (self._failures_only):
+                    flags = flags & ~NLM_F_ACK
+                else:
+                    flags = flags | NLM_F_ACK
+                _flags_seq.pack_into(datagram, offset + 6, flags,
+                                     (base + index) & _SEQ_MASK)
+                index += 1
+            if (self._failures_only):
+                # the acknowledgement of the last request ends the datagram
+                _flags_seq.pack_into(datagram, offset + 6,
+                                     flags | NLM_F_ACK,
+                                     (base + index - 1) & _SEQ_MASK)
+            self._sock.send_binary(bytes(datagram))
+            self._collect(results, base, first, index)
+        self._seq = (base + count) & _SEQ_MASK
+        return results
+
+    def _collect(self, results, base, first, end):
+        """ Receive acknowledgements for requests first to end - 1.
+        """
+        buffer = self._buffer
+        last = end - 1
+        expected = end - first
+        seen = 0
+        while (True):
+            received = self._sock.recv_into(buffer)
+            offset = 0
+            while (offset + MSG_HDRLEN <= received):
+                (length, msg_type) = _length_type.unpack_from(buffer, offset)
+                if (length < MSG_HDRLEN):
+                    break
+                if ((msg_type == NLMSG_ERROR) and
+                        (offset + MSG_HDRLEN + 16 <= received)):
+                    (error, seq) = _error_seq.unpack_from(buffer,
+                                                          offset + MSG_HDRLEN)
+                    index = (seq - base) & _SEQ_MASK
+                    if (first <= index < end):
+                        results[index] = abs(error)
+                        seen += 1
+                        if (self._failures_only):
+                            if (index == last):
+                                return
+                        elif (seen == expected):
+                            return
+                offset += (length + 3) & ~3
@@ -25,7 +25,7 @@
 #      Copyright 2008-2010 by Pablo Neira Ayuso <pablo@netfilter.org>
 #
 
-from struct import calcsize, pack, unpack
+from struct import calcsize, pack, unpack, unpack_from
 
 import pymnl
 
@@ -82,6 +82,35 @@ _u32 = calcsize("I")
 _u64 = calcsize("Q")
 
 
+def iter_attrs(data, offset=0, end=None):
+    """ Walk the attribute headers in a binary string without building
+        Attr objects.
+
+        data - binary string (or other buffer, e.g. memoryview) holding
+            a sequence of attributes
+
+        offset - offset into data at which to start
+
+        end - offset into data at which to stop, defaults to the end
+            of data
+
+        This generator yields a (type, value_start, value_end) tuple for
+        each attribute, where type still includes the NLA_F_NESTED and
+        NLA_F_NET_BYTEORDER flags and data[value_start:value_end] is the
+        attribute's (unpadded) value.  Walking stops at the first
+        truncated or malformed attribute.
+    """
+    if (end is None):
+        end = len(data)
+    index = offset
+    while (index + ATTR_HDRLEN <= end):
+        (length, type_) = unpack_from(header_format, data, index)
+        if ((length < ATTR_HDRLEN) or (index + length > end)):
+            break
+        yield (type_, index + ATTR_HDRLEN, index + length)
+        index = index + NLA_ALIGN(length)
+
+
 class Attr(object):
     """ Netlink Length-Type-Value (LTV) attribute:
 
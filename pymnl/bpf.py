@@ -0,0 +1,574 @@
+#!/usr/bin/python
+#
+# bpf.py -- classic BPF socket filters for netlink sockets
+#
+# This file is part of the pymnl package, a Python interface
+# for netlink sockets.
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License
+#  as published by the Free Software Foundation; either version 2.1 of
+#  the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+#  USA
+#
+
+import ctypes
+import socket
+from struct import calcsize, pack, unpack_from
+import sys
+
+from pymnl.attributes import NLA_ALIGNTO, NLA_TYPE_MASK
+from pymnl.message import MSG_HDRLEN, NLMSG_ALIGN, NLMSG_MIN_TYPE
+
+#
+# linux/filter.h
+#
+
+# instruction classes
+BPF_LD = 0x00
+BPF_LDX = 0x01
+BPF_ST = 0x02
+BPF_STX = 0x03
+BPF_ALU = 0x04
+BPF_JMP = 0x05
+BPF_RET = 0x06
+BPF_MISC = 0x07
+
+# ld/ldx fields
+BPF_W = 0x00
+BPF_H = 0x08
+BPF_B = 0x10
+BPF_IMM = 0x00
+BPF_ABS = 0x20
+BPF_IND = 0x40
+BPF_MEM = 0x60
+BPF_LEN = 0x80
+BPF_MSH = 0xa0
+
+# alu/jmp fields
+BPF_ADD = 0x00
+BPF_SUB = 0x10
+BPF_MUL = 0x20
+BPF_DIV = 0x30
+BPF_OR = 0x40
+BPF_AND = 0x50
+BPF_LSH = 0x60
+BPF_RSH = 0x70
+BPF_NEG = 0x80
+BPF_MOD = 0x90
+BPF_XOR = 0xa0
+
+BPF_JA = 0x00
+BPF_JEQ = 0x10
+BPF_JGT = 0x20
+BPF_JGE = 0x30
+BPF_JSET = 0x40
+BPF_K = 0x00
+BPF_X = 0x08
+
+# ret - BPF_K and BPF_X also apply
+BPF_A = 0x10
+
+# misc
+BPF_TAX = 0x00
+BPF_TXA = 0x80
+
+BPF_MEMWORDS = 16
+BPF_MAXINSNS = 4096
+
+# asm-generic/socket.h
+SO_ATTACH_FILTER = 26
+SO_DETACH_FILTER = 27
+SO_LOCK_FILTER = 44
+
+# sock_filter: code, jt, jf, k
+insn_format = "HBBI"
+
+# sock_fprog: len, pointer to the sock_filter array
+fprog_format = "HP"
+
+# filter return values
+ACCEPT = 0xffffffff
+REJECT = 0
+
+_SIZES = {4: BPF_W, 2: BPF_H, 1: BPF_B}
+
+
+class BpfProgram(object):
+    """ A classic BPF program, built one instruction at a time.
+
+        Jump targets may be given as relative offsets (as in the kernel)
+        or as label names set with label().  Labels are resolved by
+        assemble(), which raises ValueError if a conditional jump is
+        longer than 255 instructions.  Use ja() for long jumps.
+    """
+    def __init__(self):
+        """ Create an empty program.
+        """
+        self._insns = []
+        self._labels = {}
+
+    def __len__(self):
+        """ Return the number of instructions in the program.
+        """
+        return len(self._insns)
+
+    def stmt(self, code, k=0):
+        """ Add a non-jump instruction.
+
+            code - instruction code (e.g. BPF_LD | BPF_H | BPF_ABS)
+
+            k - generic multiuse field
+        """
+        self._insns.append((code, 0, 0, k))
+
+    def jump(self, code, k, jt, jf):
+        """ Add a conditional jump.
+
+            code - jump code (e.g. BPF_JMP | BPF_JEQ | BPF_K)
+
+            k - value compared with the accumulator
+
+            jt, jf - offset or label to jump to when the test is true
+                or false
+        """
+        self._insns.append((code, jt, jf, k))
+
+    def ja(self, target):
+        """ Add an unconditional jump, which may be up to 2^32
+            instructions long.
+
+            target - offset or label to jump to
+        """
+        self._insns.append((BPF_JMP | BPF_JA, 0, 0, target))
+
+    def label(self, name):
+        """ Mark the next instruction added as the target of name.
+        """
+        self._labels[name] = len(self._insns)
+
+    def _resolve(self, index, target):
+        """ Return a jump target as an offset from instruction index.
+        """
+        if (isinstance(target, int)):
+            return target
+        return self._labels[target] - index - 1
+
+    def assemble(self):
+        """ Return the program as a list of (code, jt, jf, k) tuples with
+            all labels resolved.
+        """
+        insns = []
+        for (index, (code, jt, jf, k)) in enumerate(self._insns):
+            if (code == BPF_JMP | BPF_JA):
+                k = self._resolve(index, k)
+            elif ((code & 0x07) == BPF_JMP):
+                jt = self._resolve(index, jt)
+                jf = self._resolve(index, jf)
+                if ((not 0 <= jt <= 255) or (not 0 <= jf <= 255)):
+                    raise ValueError("jump at instruction %d is out of "
+                                     "range, use ja()" % (index,))
+            insns.append((code, jt, jf, k & 0xffffffff))
+        if (len(insns) > BPF_MAXINSNS):
+            raise ValueError("BPF program is longer than %d instructions" %
+                                (BPF_MAXINSNS,))
+        return insns
+
+    def get_binary(self):
+        """ Return the array of struct sock_filter as a binary string.
+        """
+        return b''.join([pack(insn_format, *insn)
+                            for insn in self.assemble()])
+
+    def run(self, packet):
+        """ Run the program over a packet in userspace, and return the
+            filter result (zero means the kernel would drop the packet).
+
+            packet - binary string, e.g. one netlink message
+
+            This is a reference implementation of the kernel's classic
+            BPF interpreter, so filters can be tested without attaching
+            them to a socket.
+        """
+        insns = self.assemble()
+        length = len(packet)
+        a = 0
+        x = 0
+        mem = [0] * BPF_MEMWORDS
+        pc = 0
+        while (pc < len(insns)):
+            (code, jt, jf, k) = insns[pc]
+            pc += 1
+            class_ = code & 0x07
+            if (class_ in (BPF_LD, BPF_LDX)):
+                mode = code & 0xe0
+                if (mode == BPF_IMM):
+                    value = k
+                elif (mode == BPF_LEN):
+                    value = length
+                elif (mode == BPF_MEM):
+                    value = mem[k]
+                elif (mode == BPF_MSH):
+                    if (k >= length):
+                        return REJECT
+                    value = (bytearray(packet[k:k + 1])[0] & 0xf) << 2
+                else:
+                    offset = k
+                    if (mode == BPF_IND):
+                        offset = (x + k) & 0xffffffff
+                    size = {BPF_W: 4, BPF_H: 2, BPF_B: 1}[code & 0x18]
+                    if (offset + size > length):
+                        return REJECT
+                    # loads are in network byte order
+                    value = unpack_from({4: ">I", 2: ">H", 1: "B"}[size],
+                                        packet, offset)[0]
+                if (class_ == BPF_LD):
+                    a = value
+                else:
+                    x = value
+            elif (class_ == BPF_ST):
+                mem[k] = a
+            elif (class_ == BPF_STX):
+                mem[k] = x
+            elif (class_ == BPF_ALU):
+                op = code & 0xf0
+                operand = k
+                if (code & BPF_X):
+                    operand = x
+                if (op == BPF_NEG):
+                    a = -a
+                elif (op in (BPF_DIV, BPF_MOD) and (operand == 0)):
+                    return REJECT
+                else:
+                    a = {BPF_ADD: lambda: a + operand,
+                         BPF_SUB: lambda: a - operand,
+                         BPF_MUL: lambda: a * operand,
+                         BPF_DIV: lambda: a // operand,
+                         BPF_MOD: lambda: a % operand,
+                         BPF_OR: lambda: a | operand,
+                         BPF_AND: lambda: a & operand,
+                         BPF_XOR: lambda: a ^ operand,
+                         BPF_LSH: lambda: a << (operand & 31),
+                         BPF_RSH: lambda: a >> (operand & 31)}[op]()
+                a = a & 0xffffffff
+            elif (class_ == BPF_JMP):
+                op = code & 0xf0
+                if (op == BPF_JA):
+                    pc += k
+                    continue
+                operand = k
+                if (code & BPF_X):
+                    operand = x
+                if (op == BPF_JEQ):
+                    taken = (a == operand)
+                elif (op == BPF_JGT):
+                    taken = (a > operand)
+                elif (op == BPF_JGE):
+                    taken = (a >= operand)
+                else:
+                    taken = bool(a & operand)
+                if (taken):
+                    pc += jt
+                else:
+                    pc += jf
+            elif (class_ == BPF_RET):
+                if ((code & 0x18) == BPF_A):
+                    return a
+                return k
+            else:
+                if ((code & 0xf8) == BPF_TXA):
+                    a = x
+                else:
+                    x = a
+        return REJECT
+
+
+def _as_bytes(value, size):
+    """ Return value packed in host byte order, or value itself if it
+        is already a binary string.
+    """
+    if (isinstance(value, bytes)):
+        return value
+    return pack({1: "=B", 2: "=H", 4: "=I"}[size], value)
+
+
+def _chunks(data):
+    """ Split a binary string into (offset, size, big-endian value)
+        pieces of four, two, or one bytes, which match BPF loads.
+    """
+    pieces = []
+    offset = 0
+    while (offset < len(data)):
+        for size in (4, 2, 1):
+            if (offset + size <= len(data)):
+                break
+        value = unpack_from({4: ">I", 2: ">H", 1: "B"}[size],
+                            data, offset)[0]
+        pieces.append((offset, size, value))
+        offset += size
+    return pieces
+
+
+class NetlinkFilter(object):
+    """ Build a socket filter which only lets through netlink messages
+        matching all of a list of predicates.
+
+        Each predicate method returns the NetlinkFilter, so calls can be
+        chained:
+
+            flt = NetlinkFilter(extra_header_size=16)
+            flt.type_in(RTM_NEWLINK, RTM_DELLINK).field_in(4, [2, 3])
+            sock.attach_filter(flt)
+
+        Values compared with message fields are integers (packed in host
+        byte order with the given size, like the kernel does) or binary
+        strings, compared byte for byte.
+
+        The kernel runs the filter once per socket buffer, which for
+        events and dump replies starts with the netlink header of the
+        (first) message.  Attribute predicates look at most max_attrs
+        attributes deep, because classic BPF has no loops.
+    """
+    def __init__(self, extra_header_size=0, max_attrs=32,
+                       accept_control=True):
+        """ Create a filter which accepts every message.
+
+            extra_header_size - size of the protocol header between the
+                netlink header and the attributes (e.g. 16 for ifinfomsg)
+
+            max_attrs - number of attributes searched by attribute
+                predicates
+
+            accept_control - if True, control messages (NLMSG_ERROR,
+                NLMSG_DONE, etc.) are always accepted, so requests and
+                dumps still complete
+        """
+        self._extra_header_size = extra_header_size
+        self._max_attrs = max_attrs
+        self._accept_control = accept_control
+        self._predicates = []
+
+    def type_in(self, *types):
+        """ Match messages whose nlmsg_type is one of types.
+        """
+        self._predicates.append(('any', 4,
+                                 [_as_bytes(type_, 2) for type_ in types]))
+        return self
+
+    def flags_set(self, mask):
+        """ Match messages with all of the flags in mask set.
+        """
+        self._predicates.append(('mask', 6, _as_bytes(mask, 2)))
+        return self
+
+    def field_eq(self, offset, value, size=4):
+        """ Match messages with a fixed extra header field equal to value.
+
+            offset - offset of the field in the extra header (e.g. 4 for
+                ifi_index in ifinfomsg)
+
+            value - integer or binary string
+
+            size - size of an integer value (1, 2, or 4)
+        """
+        return self.field_in(offset, [value], size)
+
+    def field_in(self, offset, values, size=4):
+        """ Match messages with a fixed extra header field equal to any
+            of values.  See field_eq().
+        """
+        values = [_as_bytes(value, size) for value in values]
+        self._predicates.append(('any', MSG_HDRLEN + offset, values))
+        return self
+
+    def attr_present(self, type_):
+        """ Match messages with a top-level attribute of type_.
+        """
+        self._predicates.append(('attr', type_, None))
+        return self
+
+    def attr_eq(self, type_, value, size=4):
+        """ Match messages with a top-level attribute of type_ whose value
+            starts with value.
+
+            value - integer or binary string, e.g. b'eth0\\x00' for
+                IFLA_IFNAME
+
+            size - size of an integer value (1, 2, or 4)
+        """
+        self._predicates.append(('attr', type_, _as_bytes(value, size)))
+        return self
+
+    def compile(self):
+        """ Return a BpfProgram implementing the filter.
+        """
+        prog = BpfProgram()
+        if (self._accept_control):
+            self._compile_control(prog)
+        for (index, predicate) in enumerate(self._predicates):
+            if (predicate[0] == 'any'):
+                self._compile_any(prog, index, *predicate[1:])
+            elif (predicate[0] == 'mask'):
+                self._compile_mask(prog, *predicate[1:])
+            else:
+                self._compile_attr(prog, index, *predicate[1:])
+        prog.label('accept')
+        prog.stmt(BPF_RET | BPF_K, ACCEPT)
+        prog.label('reject')
+        prog.stmt(BPF_RET | BPF_K, REJECT)
+        return prog
+
+    def _compile_control(self, prog):
+        """ Add instructions which accept messages with a type below
+            NLMSG_MIN_TYPE.
+        """
+        (high, low) = (4, 5)
+        if (sys.byteorder == 'little'):
+            (high, low) = (5, 4)
+        prog.stmt(BPF_LD | BPF_B | BPF_ABS, high)
+        prog.jump(BPF_JMP | BPF_JEQ | BPF_K, 0, 0, 3)
+        prog.stmt(BPF_LD | BPF_B | BPF_ABS, low)
+        prog.jump(BPF_JMP | BPF_JGE | BPF_K, NLMSG_MIN_TYPE, 1, 0)
+        prog.ja('accept')
+
+    def _compile_any(self, prog, index, offset, values):
+        """ Add instructions which go on if the bytes at offset match one
+            of values, and reject otherwise.
+        """
+        done = "any%d" % (index,)
+        for (value_index, value) in enumerate(values):
+            next_value = "any%d_%d" % (index, value_index)
+            for (chunk_offset, chunk_size, chunk) in _chunks(value):
+                prog.stmt(BPF_LD | _SIZES[chunk_size] | BPF_ABS,
+                          offset + chunk_offset)
+                prog.jump(BPF_JMP | BPF_JEQ | BPF_K, chunk, 1, 0)
+                prog.ja(next_value)
+            prog.ja(done)
+            prog.label(next_value)
+        prog.ja('reject')
+        prog.label(done)
+
+    def _compile_mask(self, prog, offset, mask):
+        """ Add instructions which go on if all the bits of mask are set
+            in the bytes at offset, and reject otherwise.
+        """
+        for (chunk_offset, chunk_size, chunk) in _chunks(mask):
+            prog.stmt(BPF_LD | _SIZES[chunk_size] | BPF_ABS,
+                      offset + chunk_offset)
+            prog.stmt(BPF_ALU | BPF_AND | BPF_K, chunk)
+            prog.jump(BPF_JMP | BPF_JEQ | BPF_K, chunk, 1, 0)
+            prog.ja('reject')
+
+    def _load_u16(self, prog, offset):
+        """ Add instructions loading the host byte order u16 at X + offset
+            into A.  X is preserved in M[0], M[1] is scratch.
+        """
+        if (sys.byteorder == 'little'):
+            (high, low) = (offset + 1, offset)
+        else:
+            (high, low) = (offset, offset + 1)
+        prog.stmt(BPF_LD | BPF_B | BPF_IND, high)
+        prog.stmt(BPF_ALU | BPF_LSH | BPF_K, 8)
+        prog.stmt(BPF_ST, 1)
+        prog.stmt(BPF_LD | BPF_B | BPF_IND, low)
+        prog.stmt(BPF_LDX | BPF_MEM, 1)
+        prog.stmt(BPF_ALU | BPF_OR | BPF_X)
+        prog.stmt(BPF_LDX | BPF_MEM, 0)
+
+    def _compile_attr(self, prog, index, type_, value):
+        """ Add instructions which search the top-level attributes for
+            type_ (and value) and reject if it is not found.
+
+            Scratch memory: M[0] offset of the current attribute,
+            M[1] scratch, M[2] length of the current attribute.
+        """
+        found = "attr%d" % (index,)
+        start = MSG_HDRLEN + NLMSG_ALIGN(self._extra_header_size)
+        prog.stmt(BPF_LD | BPF_IMM, start)
+        prog.stmt(BPF_ST, 0)
+        for attr in range(self._max_attrs):
+            # stop when the attribute header would pass the packet end
+            prog.stmt(BPF_LD | BPF_W | BPF_LEN)
+            prog.stmt(BPF_MISC | BPF_TAX)
+            prog.stmt(BPF_LD | BPF_MEM, 0)
+            prog.stmt(BPF_ALU | BPF_ADD | BPF_K, 4)
+            prog.jump(BPF_JMP | BPF_JGT | BPF_X, 0, 0, 1)
+            prog.ja('reject')
+            prog.stmt(BPF_LDX | BPF_MEM, 0)
+            # attribute length, a malformed attribute ends the search
+            self._load_u16(prog, 0)
+            prog.jump(BPF_JMP | BPF_JGE | BPF_K, 4, 1, 0)
+            prog.ja('reject')
+            prog.stmt(BPF_ST, 2)
+            # attribute type
+            self._load_u16(prog, 2)
+            prog.stmt(BPF_ALU | BPF_AND | BPF_K, NLA_TYPE_MASK & 0xffff)
+            prog.jump(BPF_JMP | BPF_JEQ | BPF_K, type_, 0, 1)
+            prog.ja(found)
+            # move to the next attribute
+            prog.stmt(BPF_LD | BPF_MEM, 2)
+            prog.stmt(BPF_ALU | BPF_ADD | BPF_K, NLA_ALIGNTO - 1)
+            prog.stmt(BPF_ALU | BPF_AND | BPF_K, ~(NLA_ALIGNTO - 1))
+            prog.stmt(BPF_ALU | BPF_ADD | BPF_X)
+            prog.stmt(BPF_ST, 0)
+        prog.ja('reject')
+        prog.label(found)
+        if (value is not None):
+            # the attribute must be long enough to hold value
+            prog.stmt(BPF_LD | BPF_MEM, 2)
+            prog.jump(BPF_JMP | BPF_JGE | BPF_K, 4 + len(value), 1, 0)
+            prog.ja('reject')
+            prog.stmt(BPF_LDX | BPF_MEM, 0)
+            for (chunk_offset, chunk_size, chunk) in _chunks(value):
+                prog.stmt(BPF_LD | _SIZES[chunk_size] | BPF_IND,
+                          4 + chunk_offset)
+                prog.jump(BPF_JMP | BPF_JEQ | BPF_K, chunk, 1, 0)
+                prog.ja('reject')
+
+    def run(self, packet):
+        """ Return True if the filter accepts a packet, evaluated in
+            userspace (see BpfProgram.run()).
+
+            packet - binary string, e.g. Message.get_binary()
+        """
+        return self.compile().run(packet) != REJECT
+
+    def get_binary(self):
+        """ Return the compiled filter as an array of struct sock_filter.
+        """
+        return self.compile().get_binary()
+
+
+def attach_filter(sock, program):
+    """ Attach a filter to a socket with SO_ATTACH_FILTER.
+
+        sock - a socket.socket (see Socket.get_sock())
+
+        program - BpfProgram or NetlinkFilter
+
+        Raises an exception on error (e.g. EINVAL for a program which
+        the kernel considers invalid).
+    """
+    binary = program.get_binary()
+    insns = ctypes.create_string_buffer(binary, len(binary))
+    fprog = pack(fprog_format, len(binary) // calcsize(insn_format),
+                 ctypes.addressof(insns))
+    # the kernel copies the instructions before setsockopt() returns
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+
+
+def detach_filter(sock):
+    """ Remove the filter from a socket.
+
+        sock - a socket.socket (see Socket.get_sock())
+    """
+    sock.setsockopt(socket.SOL_SOCKET, SO_DETACH_FILTER, 0)
@@ -0,0 +1,288 @@
+#!/usr/bin/python
+#
+# callback.py -- run callbacks over received netlink messages
+#
+# This file is part of the pymnl package, a Python interface
+# for netlink sockets.
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License
+#  as published by the Free Software Foundation; either version 2.1 of
+#  the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+#  USA
+#
+# Much of the method docstrings are from libmnl and are
+#      Copyright 2008-2010 by Pablo Neira Ayuso <pablo@netfilter.org>
+#
+
+import errno
+import os
+from struct import unpack_from
+
+from pymnl.message import (LazyMessage, MessageList, MSG_HDRLEN,
+                           NLMSG_DONE, NLMSG_ERROR, NLMSG_MIN_TYPE,
+                           NLMSG_NOOP, NLMSG_OVERRUN, NLM_F_DUMP_INTR)
+from pymnl.nlsocket import SOCKET_BUFFER_SIZE
+
+# callback return values
+CB_ERROR = -1
+CB_STOP = 0
+CB_OK = 1
+
+
+def _as_header_field(value):
+    """ Return a 32 bit value the way the message header decodes it.
+
+        The header fields are unpacked as signed, so a port ID above
+        2**31 (the kernel gives those to the second and later sockets of
+        a process) is compared as a negative number.
+    """
+    if (value >= 0x80000000):
+        return value - 0x100000000
+    return value
+
+
+class CallbackRunner(object):
+    """ Run callbacks over received netlink messages, like libmnl's
+        mnl_cb_run2().
+
+        Each message is checked against the expected sequence number and
+        port ID, then passed to the handler for its type.  Handlers are
+        called with the Message and return CB_OK to continue, CB_STOP to
+        stop processing (e.g. the request is complete), or CB_ERROR.
+        A handler returning None is taken to mean CB_OK.
+
+        The control messages (types below NLMSG_MIN_TYPE) are handled
+        internally unless a handler is given for them:
+
+            - NLMSG_NOOP and NLMSG_OVERRUN are skipped
+
+            - NLMSG_ERROR stops processing with CB_STOP when it is an
+              acknowledgement (error code zero) and returns CB_ERROR
+              otherwise
+
+            - NLMSG_DONE stops processing with CB_STOP, or returns
+              CB_ERROR if it carries an error code (the kernel reports
+              dumps which failed to start this way)
+
+        All handlers are merged into one dispatch table when the runner
+        is created.  The error code is only read from NLMSG_ERROR
+        messages and only turned into a string by get_errstr().
+    """
+    def __init__(self, handlers=None, seq=0, portid=0, default=None,
+                       control_handlers=None):
+        """ Create a CallbackRunner.
+
+            handlers - dict of message type to callable(msg)
+
+            seq - sequence number of the request (zero to skip sequence
+                tracking, see Message.seq_ok())
+
+            portid - port ID of the socket (zero to skip port ID
+                tracking, see Message.portid_ok())
+
+            default - callable(msg) for data messages (type of
+                NLMSG_MIN_TYPE or more) with no entry in handlers, by
+                default they are skipped
+
+            control_handlers - dict of control message type to
+                callable(msg), overriding the internal handling
+        """
+        self.set_seq(seq)
+        self.set_portid(portid)
+        self._default = default
+        self._table = {NLMSG_NOOP: self._cb_noop,
+                       NLMSG_ERROR: self._cb_error,
+                       NLMSG_DONE: self._cb_done,
+                       NLMSG_OVERRUN: self._cb_noop}
+        if (control_handlers):
+            self._table.update(control_handlers)
+        if (handlers):
+            self._table.update(handlers)
+        self._errno = 0
+        self._error_msg = None
+
+    def set_seq(self, seq):
+        """ Set the sequence number of the request being tracked.
+
+            seq - last sequence number used to send a message
+        """
+        self._seq = _as_header_field(seq)
+
+    def set_portid(self, portid):
+        """ Set the port ID of the socket being tracked.
+
+            portid - netlink portid that we want to check
+        """
+        self._portid = _as_header_field(portid)
+
+    def get_errno(self):
+        """ Return the errno which caused the last CB_ERROR, or zero.
+        """
+        return self._errno
+
+    def get_errstr(self):
+        """ Return the errno which caused the last CB_ERROR as
+            interpretted by os.strerror.
+        """
+        return os.strerror(self._errno)
+
+    def get_error_message(self):
+        """ Return the NLMSG_ERROR (or NLMSG_DONE) Message which caused
+            the last CB_ERROR, or None if the error was found by the
+            runner (sequence, port ID, or interrupted dump).  See
+            Message.get_ext_ack() for the kernel's explanation.
+        """
+        return self._error_msg
+
+    def run(self, data):
+        """ Run the callbacks over a batch of messages.
+
+            data - binary string from Socket.get_sock().recv(), or a
+                MessageList (or other iterable of Message)
+
+            Returns CB_OK if every message was processed and more are
+            expected, CB_STOP if a handler (or the end of a dump or an
+            acknowledgement) stopped processing, or CB_ERROR.  On
+            CB_ERROR, get_errno() returns the reason:
+
+                - ESRCH - message port ID did not match
+
+                - EPROTO - message sequence number did not match
+
+                - EINTR - the dump was interrupted (NLM_F_DUMP_INTR),
+                  and should be restarted
+
+                - an errno from an NLMSG_ERROR or NLMSG_DONE message
+        """
+        if (isinstance(data, bytes) or isinstance(data, str)):
+            data = MessageList(data, lazy=True)
+        table = self._table
+        seq = self._seq
+        portid = self._portid
+        ret = CB_OK
+        for msg in data:
+            # inline Message.portid_ok() and Message.seq_ok()
+            if (portid and msg._pid and (msg._pid != portid)):
+                return self._fail(errno.ESRCH)
+            if (seq and msg._msg_seq and (msg._msg_seq != seq)):
+                return self._fail(errno.EPROTO)
+            if (msg._msg_flags & NLM_F_DUMP_INTR):
+                return self._fail(errno.EINTR)
+            msg_type = msg._msg_type
+            try:
+                handler = table[msg_type]
+            except KeyError:
+                if ((msg_type < NLMSG_MIN_TYPE) or (self._default is None)):
+                    continue
+                handler = self._default
+            ret = handler(msg)
+            if (ret is None):
+                ret = CB_OK
+            elif (ret <= CB_STOP):
+                return ret
+        return ret
+
+    def run_stream(self, stream):
+        """ Run the callbacks over batches of messages until a batch
+            returns CB_STOP or CB_ERROR, or the stream ends.
+
+            stream - iterable of binary strings or MessageLists
+
+            Returns the result of the last run().
+        """
+        ret = CB_OK
+        for data in stream:
+            ret = self.run(data)
+            if (ret <= CB_STOP):
+                break
+        return ret
+
+    def run_socket(self, sock, bufsize=SOCKET_BUFFER_SIZE):
+        """ Receive from a Socket and run the callbacks until a batch
+            returns CB_STOP or CB_ERROR.
+
+            sock - pymnl.nlsocket.Socket
+
+            bufsize - receive buffer size, see Socket.recv()
+
+            Returns the result of the last run().
+        """
+        ret = CB_OK
+        while (ret > CB_STOP):
+            ret = self.run(sock.recv(bufsize, lazy=True))
+        return ret
+
+    def _fail(self, errno_, msg=None):
+        """ Save the reason for an error and return CB_ERROR.
+        """
+        self._errno = errno_
+        self._error_msg = msg
+        return CB_ERROR
+
+    def _cb_noop(self, msg):
+        """ Skip the message.
+        """
+        return CB_OK
+
+    def _read_errno(self, msg):
+        """ Return the error code at the start of the payload, or None if
+            the payload is too short to hold one.
+        """
+        location = None
+        if (isinstance(msg, LazyMessage)):
+            location = msg.get_buffer()
+        if (location is not None):
+            # read the error code without building the Payload
+            (buffer, start, end) = location
+            if (end - start < MSG_HDRLEN + 4):
+                return None
+            return abs(unpack_from("i", buffer, start + MSG_HDRLEN)[0])
+        data = msg.get_payload().get_data()
+        if (len(data) < 4):
+            return None
+        return abs(unpack_from("i", data, 0)[0])
+
+    def _cb_error(self, msg):
+        """ Stop on an acknowledgement, fail on an error.
+        """
+        errno_ = self._read_errno(msg)
+        if (errno_ is None):
+            return self._fail(errno.EBADMSG, msg)
+        if (errno_):
+            return self._fail(errno_, msg)
+        return CB_STOP
+
+    def _cb_done(self, msg):
+        """ Stop at the end of a dump, fail if the dump failed.
+        """
+        errno_ = self._read_errno(msg)
+        if (errno_):
+            return self._fail(errno_, msg)
+        return CB_STOP
+
+
+def cb_run(data, seq, portid, handlers):
+    """ Run callbacks over a batch of messages, like libmnl's mnl_cb_run().
+
+        data - binary string or MessageList
+
+        seq - sequence number of the request, or zero
+
+        portid - port ID of the socket, or zero
+
+        handlers - dict of message type to callable(msg)
+
+        Returns CB_OK, CB_STOP, or CB_ERROR.  Use CallbackRunner directly
+        to find out the errno behind a CB_ERROR.
+    """
+    return CallbackRunner(handlers, seq, portid).run(data)
@@ -0,0 +1,303 @@
+#!/usr/bin/python
+#
+# dump.py -- fast structured dumps of netlink messages
+#
+# This file is part of the pymnl package, a Python interface
+# for netlink sockets.
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License
+#  as published by the Free Software Foundation; either version 2.1 of
+#  the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+#  USA
+#
+
+from binascii import hexlify
+import os
+import sys
+from struct import unpack_from
+
+from pymnl.attributes import (iter_attrs, NLA_F_NESTED,
+                              NLA_F_NET_BYTEORDER, NLA_TYPE_MASK)
+from pymnl.message import (header_format, MSG_HDRLEN, NLMSG_DONE,
+                           NLMSG_ERROR, NLMSG_MIN_TYPE, NLM_F_ACK,
+                           NLM_F_ECHO, NLM_F_MULTI, NLM_F_REQUEST)
+
+# number of value bytes shown on each hex row of a full dump
+HEX_ROW = 16
+
+# longest value shown in a compact dump, longer values show the length
+COMPACT_VALUE = 8
+
+# deepest level of nested attributes decoded
+MAX_DEPTH = 8
+
+_RULE = "-" * 64 + "\n"
+
+
+try:
+    _hex = bytes.hex
+except AttributeError:
+    # Py2 (and Py3 before 3.5)
+    def _hex(data):
+        """ Return the hexadecimal representation of a binary string.
+        """
+        return hexlify(data).decode()
+
+
+def flags_str(flags):
+    """ Return the four character (RMAE) representation of message
+        flags used by Message.printf_header().
+
+        flags - netlink message flags
+    """
+    return "%c%c%c%c" % ("R" if (flags & NLM_F_REQUEST) else "-",
+                         "M" if (flags & NLM_F_MULTI) else "-",
+                         "A" if (flags & NLM_F_ACK) else "-",
+                         "E" if (flags & NLM_F_ECHO) else "-")
+
+
+class MessageDumper(object):
+    """ Write human-readable dumps of netlink messages to a stream.
+
+        Unlike Message.printf(), which prints one line per four bytes of
+        payload, MessageDumper walks the payload one attribute header at
+        a time, formats hex with one call per row, and writes each
+        message to the stream with a single write() call.  This makes it
+        cheap enough to leave turned on in a busy listener.
+
+        In full mode each message looks like this:
+
+            len=52 type=16 flags=R-A- seq=1289148991 pid=0
+              hdr 00000000 00000000 01000000 01000000
+              [len=9    type=3     --] 65746830 00 'eth0'
+              [len=12   type=26    N-]
+                [len=8    type=1     --] 01000000
+
+        In compact mode each message is one line, with attribute values
+        up to eight bytes long shown in hex:
+
+            len=52 type=16 flags=R-A- seq=1289148991 pid=0 | hdr=0000...
+                0000 3(5) 26{ 1=01000000 }
+    """
+    def __init__(self, stream=None, compact=False, extra_header_sizes=None,
+                       nested_types=None):
+        """ Create a MessageDumper.
+
+            stream - object with a write() method, defaults to sys.stdout
+
+            compact - if True, write one line per message
+
+            extra_header_sizes - dict of message type to the size of the
+                extra header at the start of its payload (e.g. 16 for
+                RTM_NEWLINK's ifinfomsg).  Used when dump() is not given
+                an explicit size.
+
+            nested_types - set of top-level attribute types to decode as
+                nested attributes, even when the kernel did not set the
+                NLA_F_NESTED flag on them
+        """
+        self._stream = stream
+        self._compact = compact
+        self._extra_header_sizes = extra_header_sizes or {}
+        self._nested_types = frozenset(nested_types or ())
+
+    def dump(self, msg, extra_header_size=None):
+        """ Write one Message to the stream.
+
+            msg - Message object
+
+            extra_header_size - size of the extra header at the start of
+                the payload, defaults to the size in extra_header_sizes
+                for the message type (or zero)
+        """
+        payload = msg.get_payload()
+        if (payload is None):
+            data = b''
+        else:
+            data = payload.get_data()
+        self.dump_binary(msg.get_type(), msg.get_flags(), msg.get_seq(),
+                         msg.get_portid(), data, extra_header_size)
+
+    def dump_list(self, messages):
+        """ Write each Message in a MessageList to the stream.
+
+            messages - MessageList (or other iterable of Message)
+        """
+        for msg in messages:
+            self.dump(msg)
+
+    def dump_binary(self, msg_type, flags, seq, pid, data,
+                          extra_header_size=None):
+        """ Write one message, given as header values and a binary payload.
+
+            data - binary string holding the message payload
+        """
+        if (extra_header_size is None):
+            extra_header_size = self._extra_header_sizes.get(msg_type, 0)
+        parts = ["len=%u type=%u flags=%s seq=%u pid=%u" %
+                    (MSG_HDRLEN + len(data), msg_type, flags_str(flags),
+                     seq, pid)]
+        if (self._compact):
+            self._compact_payload(parts, msg_type, data, extra_header_size)
+            parts.append("\n")
+        else:
+            parts.append("\n")
+            self._full_payload(parts, msg_type, data, extra_header_size)
+        stream = self._stream
+        if (stream is None):
+            stream = sys.stdout
+        stream.write("".join(parts))
+
+    def _error_parts(self, data):
+        """ Return a string describing an NLMSG_ERROR payload.
+        """
+        if (len(data) < 4):
+            return "error=?"
+        errno_ = abs(unpack_from("i", data, 0)[0])
+        if (not errno_):
+            text = "ack"
+        else:
+            text = "error=%d (%s)" % (errno_, os.strerror(errno_))
+        if (len(data) >= 4 + MSG_HDRLEN):
+            (length, type_, flags, seq, pid) = unpack_from(header_format,
+                                                           data, 4)
+            text = text + (" for len=%u type=%u flags=%s seq=%u pid=%u" %
+                            (length, type_, flags_str(flags), seq, pid))
+        return text
+
+    def _compact_payload(self, parts, msg_type, data, extra_header_size):
+        """ Append a compact description of the payload to parts.
+        """
+        if (msg_type < NLMSG_MIN_TYPE):
+            if (msg_type == NLMSG_ERROR):
+                parts.append(" | " + self._error_parts(data))
+            elif (msg_type == NLMSG_DONE):
+                parts.append(" | done")
+            return
+        parts.append(" |")
+        if (extra_header_size):
+            parts.append(" hdr=" + _hex(data[:extra_header_size]))
+        self._compact_attrs(parts, data, extra_header_size, len(data), 0)
+
+    def _compact_attrs(self, parts, data, start, end, depth):
+        """ Append one token per attribute in data[start:end] to parts.
+        """
+        for (type_, value_start, value_end) in iter_attrs(data, start, end):
+            attr_type = type_ & NLA_TYPE_MASK
+            if (self._is_nested(type_, depth)):
+                parts.append(" %u{" % attr_type)
+                self._compact_attrs(parts, data, value_start, value_end,
+                                    depth + 1)
+                parts.append(" }")
+            elif (value_end - value_start <= COMPACT_VALUE):
+                parts.append(" %u=%s" %
+                        (attr_type, _hex(data[value_start:value_end])))
+            else:
+                parts.append(" %u(%u)" % (attr_type, value_end - value_start))
+
+    def _full_payload(self, parts, msg_type, data, extra_header_size):
+        """ Append a multi-line description of the payload to parts.
+        """
+        if (msg_type < NLMSG_MIN_TYPE):
+            if (msg_type == NLMSG_ERROR):
+                parts.append("  " + self._error_parts(data) + "\n")
+            elif (msg_type == NLMSG_DONE):
+                parts.append("  done\n")
+            else:
+                self._hex_rows(parts, "  ", data)
+        else:
+            if (extra_header_size):
+                self._hex_rows(parts, "  hdr ", data[:extra_header_size])
+            self._full_attrs(parts, data, extra_header_size, len(data), 0)
+        parts.append(_RULE)
+
+    def _full_attrs(self, parts, data, start, end, depth):
+        """ Append one or more lines per attribute in data[start:end]
+            to parts.
+        """
+        indent = "  " * (depth + 1)
+        for (type_, value_start, value_end) in iter_attrs(data, start, end):
+            head = "%s[len=%-4u type=%-5u %c%c]" % (indent,
+                    value_end - value_start + 4, type_ & NLA_TYPE_MASK,
+                    "N" if (type_ & NLA_F_NESTED) else "-",
+                    "B" if (type_ & NLA_F_NET_BYTEORDER) else "-")
+            if (self._is_nested(type_, depth)):
+                parts.append(head + "\n")
+                self._full_attrs(parts, data, value_start, value_end,
+                                 depth + 1)
+            else:
+                value = data[value_start:value_end]
+                self._hex_rows(parts, head + " ", value,
+                               " " * (len(head) + 1), _printable(value))
+
+    def _hex_rows(self, parts, prefix, data, continuation=None, text=None):
+        """ Append hex rows, in groups of four bytes, to parts.
+
+            prefix - string starting the first row
+
+            continuation - string starting each following row, defaults
+                to the same number of spaces as prefix
+
+            text - string appended to the first row
+        """
+        hex_ = _hex(bytes(data))
+        if (continuation is None):
+            continuation = " " * len(prefix)
+        width = HEX_ROW * 2
+        for row in range(0, max(len(hex_), 1), width):
+            chunk = hex_[row:row + width]
+            words = " ".join([chunk[index:index + 8]
+                                for index in range(0, len(chunk), 8)])
+            if (row):
+                parts.append(continuation + words + "\n")
+            elif (text):
+                parts.append(prefix + words + " '" + text + "'\n")
+            else:
+                parts.append(prefix + words + "\n")
+
+    def _is_nested(self, type_, depth):
+        """ Return True if an attribute should be decoded as nested.
+        """
+        if (depth >= MAX_DEPTH):
+            return False
+        if (type_ & NLA_F_NESTED):
+            return True
+        return ((depth == 0) and
+                        ((type_ & NLA_TYPE_MASK) in self._nested_types))
+
+
+def _printable(value):
+    """ Return value as text if it is a printable (and possibly null
+        terminated) string, otherwise return None.
+    """
+    if ((len(value) < 2) or (len(value) > 64)):
+        return None
+    text = bytes(value).rstrip(b'\x00')
+    # a single character followed by nulls is more likely an integer
+    if (len(text) < 2):
+        return None
+    for char in bytearray(text):
+        if ((char < 0x20) or (char > 0x7e)):
+            return None
+    return text.decode('ascii')
+
+
+def dump(messages, stream=None, compact=False, extra_header_sizes=None,
+         nested_types=None):
+    """ Write a dump of each message in messages to stream.
+
+        A convenience wrapper around MessageDumper.dump_list(), see
+        MessageDumper for the meaning of the arguments.
+    """
+    MessageDumper(stream, compact, extra_header_sizes,
+                  nested_types).dump_list(messages)
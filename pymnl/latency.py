@@ -0,0 +1,307 @@
+#!/usr/bin/python
+#
+# latency.py -- request to acknowledgement latency tracking
+#
+# This file is part of the pymnl package, a Python interface
+# for netlink sockets.
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License
+#  as published by the Free Software Foundation; either version 2.1 of
+#  the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+#  USA
+#
+
+from math import log
+from struct import unpack_from
+
+try:
+    from time import perf_counter as _timer
+except ImportError:
+    # Py2
+    from time import time as _timer
+
+from pymnl.message import (NLMSG_DONE, NLMSG_ERROR, NLM_F_MULTI,
+                           NLM_F_REQUEST, MSG_HDRLEN)
+
+# Each power of two is split into this many buckets, so a bucket's upper
+# bound is at most 2 ** (1 / 8) (about 9%) above any value in it.
+BUCKETS_PER_OCTAVE = 8
+
+# Latencies are bucketed in whole nanoseconds.
+_NS = 1000000000.0
+
+# Requests which are never acknowledged are forgotten after this many
+# newer requests have been sent.
+MAX_PENDING = 65536
+
+
+class LatencyHistogram(object):
+    """ A log-bucketed histogram of latencies.
+
+        Values are stored as counts per bucket, so memory use depends on
+        the range of the values, not the number of values recorded.
+        Percentiles are reported as the upper bound of the bucket holding
+        the requested rank.
+    """
+    def __init__(self):
+        """ Create an empty histogram.
+        """
+        self._buckets = {}
+        self._count = 0
+        self._total = 0.0
+        self._min = None
+        self._max = None
+
+    def __len__(self):
+        """ Return the number of values recorded.
+        """
+        return self._count
+
+    def record(self, seconds):
+        """ Add one latency value to the histogram.
+
+            seconds - latency in seconds (float)
+        """
+        nanoseconds = max(int(seconds * _NS), 1)
+        bucket = int(log(nanoseconds, 2) * BUCKETS_PER_OCTAVE)
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+        self._count += 1
+        self._total += seconds
+        if ((self._min is None) or (seconds < self._min)):
+            self._min = seconds
+        if ((self._max is None) or (seconds > self._max)):
+            self._max = seconds
+
+    def percentile(self, fraction):
+        """ Return the latency (in seconds) at or below which the given
+            fraction of values fall, or None if the histogram is empty.
+
+            fraction - float between 0 and 1, e.g. 0.99 for p99
+        """
+        if (not self._count):
+            return None
+        rank = fraction * self._count
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if (seen >= rank):
+                upper = pow(2, (bucket + 1) / float(BUCKETS_PER_OCTAVE)) / _NS
+                # never report beyond the largest value actually seen
+                return min(upper, self._max)
+        return self._max
+
+    def p50(self):
+        """ Return the median latency in seconds.
+        """
+        return self.percentile(0.5)
+
+    def p99(self):
+        """ Return the 99th percentile latency in seconds.
+        """
+        return self.percentile(0.99)
+
+    def p999(self):
+        """ Return the 99.9th percentile latency in seconds.
+        """
+        return self.percentile(0.999)
+
+    def summary(self):
+        """ Return a dict with the count, min, mean, max, p50, p99, and
+            p999 latencies (in seconds).
+        """
+        mean = None
+        if (self._count):
+            mean = self._total / self._count
+        return {'count': self._count,
+                'min': self._min,
+                'mean': mean,
+                'max': self._max,
+                'p50': self.p50(),
+                'p99': self.p99(),
+                'p999': self.p999()}
+
+    def merge(self, other):
+        """ Add the values recorded in another histogram to this one.
+
+            other - LatencyHistogram
+        """
+        for (bucket, count) in other._buckets.items():
+            self._buckets[bucket] = self._buckets.get(bucket, 0) + count
+        self._count += other._count
+        self._total += other._total
+        for value in (other._min, other._max):
+            if (value is not None):
+                if ((self._min is None) or (value < self._min)):
+                    self._min = value
+                if ((self._max is None) or (value > self._max)):
+                    self._max = value
+
+
+class LatencyTracker(object):
+    """ Track the time from sending a request to receiving its
+        acknowledgement, with one LatencyHistogram per request type.
+
+        Requests are keyed by (nlmsg_type, seq).  A request is complete
+        when a reply with the same sequence number arrives which ends
+        it: an NLMSG_ERROR (an ack or an error), an NLMSG_DONE (the end
+        of a dump), or a reply without NLM_F_MULTI.
+
+        Attach a tracker to a Socket with Socket.set_latency_tracker()
+        or call request_sent() and process() directly.
+    """
+    def __init__(self, max_pending=MAX_PENDING):
+        """ Create a tracker.
+
+            max_pending - number of unacknowledged requests to remember
+        """
+        self._max_pending = max_pending
+        # (type, seq) -> send time
+        self._pending = {}
+        # seq -> type, to match replies which do not carry the type
+        self._seq_type = {}
+        self._histograms = {}
+        self._export_hook = None
+
+    def request_sent(self, msg_type, seq, timestamp=None):
+        """ Record that a request was sent.
+
+            msg_type - request message type
+
+            seq - request sequence number
+
+            timestamp - send time, defaults to now
+        """
+        if (timestamp is None):
+            timestamp = _timer()
+        if (len(self._pending) >= self._max_pending):
+            # forget the oldest outstanding request
+            oldest = min(self._pending, key=self._pending.get)
+            del self._pending[oldest]
+            self._seq_type.pop(oldest[1], None)
+        self._pending[(msg_type, seq)] = timestamp
+        self._seq_type[seq] = msg_type
+
+    def message_sent(self, msg, timestamp=None):
+        """ Record a sent Message if it is a request.
+
+            msg - Message object
+        """
+        if (msg.get_flags() & NLM_F_REQUEST):
+            self.request_sent(msg.get_type(), msg.get_seq(), timestamp)
+
+    def ack_received(self, seq, msg_type=None, timestamp=None):
+        """ Record the acknowledgement of a request.  Returns the latency
+            in seconds or None if no matching request is pending.
+
+            seq - sequence number of the acknowledged request
+
+            msg_type - type of the acknowledged request, if known
+
+            timestamp - receive time, defaults to now
+        """
+        if (timestamp is None):
+            timestamp = _timer()
+        if (msg_type is None):
+            msg_type = self._seq_type.get(seq)
+        sent = self._pending.pop((msg_type, seq), None)
+        if (sent is None):
+            return None
+        self._seq_type.pop(seq, None)
+        latency = timestamp - sent
+        try:
+            histogram = self._histograms[msg_type]
+        except KeyError:
+            histogram = self._histograms[msg_type] = LatencyHistogram()
+        histogram.record(latency)
+        return latency
+
+    def process(self, messages, timestamp=None):
+        """ Complete the pending requests acknowledged by a list of
+            received messages.
+
+            messages - MessageList (or other iterable of Message)
+
+            timestamp - receive time, defaults to now
+        """
+        if (not self._seq_type):
+            return
+        if (timestamp is None):
+            timestamp = _timer()
+        for msg in messages:
+            seq = msg._msg_seq
+            if (seq not in self._seq_type):
+                continue
+            msg_type = msg._msg_type
+            if (msg_type == NLMSG_ERROR):
+                # the acked request's header follows the error code
+                data = msg.get_payload().get_data()
+                if (len(data) >= 4 + MSG_HDRLEN):
+                    self.ack_received(seq, unpack_from("H", data, 8)[0],
+                                      timestamp)
+                else:
+                    self.ack_received(seq, None, timestamp)
+            elif ((msg_type == NLMSG_DONE) or
+                                        (not (msg._msg_flags & NLM_F_MULTI))):
+                self.ack_received(seq, None, timestamp)
+
+    def pending(self):
+        """ Return the number of requests waiting for acknowledgement.
+        """
+        return len(self._pending)
+
+    def get_histogram(self, msg_type):
+        """ Return the LatencyHistogram for a request type, or None if
+            no request of that type has been acknowledged.
+
+            msg_type - request message type
+        """
+        return self._histograms.get(msg_type)
+
+    def percentile(self, msg_type, fraction):
+        """ Return the latency percentile (in seconds) for a request
+            type, or None if no request of that type has been acknowledged.
+
+            msg_type - request message type
+
+            fraction - float between 0 and 1, e.g. 0.999 for p999
+        """
+        histogram = self._histograms.get(msg_type)
+        if (histogram is None):
+            return None
+        return histogram.percentile(fraction)
+
+    def summary(self):
+        """ Return a dict of request type to LatencyHistogram.summary().
+        """
+        return dict([(msg_type, histogram.summary())
+                        for (msg_type, histogram) in self._histograms.items()])
+
+    def set_export_hook(self, hook):
+        """ Set the function called by export().
+
+            hook - callable receiving the summary() dict, or None
+        """
+        self._export_hook = hook
+
+    def export(self, reset=False):
+        """ Pass the current summary() to the export hook and return it.
+
+            reset - if True, clear the histograms after exporting, so the
+                next export covers only the following interval
+        """
+        summary = self.summary()
+        if (self._export_hook):
+            self._export_hook(summary)
+        if (reset):
+            self._histograms = {}
+        return summary
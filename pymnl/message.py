@@ -28,16 +28,18 @@
 from __future__ import print_function
 
 import os
-from struct import calcsize, pack, unpack
+from struct import calcsize, pack, unpack, Struct
 
 import pymnl
-from pymnl.attributes import Attr
+from pymnl.attributes import Attr, AttrParser
 
 # Flags values
 NLM_F_REQUEST = 1       # It is a request message.
 NLM_F_MULTI = 2         # Multipart message, terminated by NLMSG_DONE
 NLM_F_ACK = 4           # Reply with ack, with zero or error code
 NLM_F_ECHO = 8          # Echo this request
+NLM_F_DUMP_INTR = 0x10  # Dump was inconsistent due to sequence change
+NLM_F_DUMP_FILTERED = 0x20  # Dump was filtered as requested
 
 # Modifiers to GET request
 NLM_F_ROOT = 0x100      # specify tree root
@@ -45,6 +47,10 @@ NLM_F_MATCH = 0x200     # return all matching
 NLM_F_ATOMIC = 0x400    # atomic GET
 NLM_F_DUMP = (NLM_F_ROOT | NLM_F_MATCH)
 
+# Flags for ACK message
+NLM_F_CAPPED = 0x100    # request was capped
+NLM_F_ACK_TLVS = 0x200  # extended ACK TLVs were included
+
 # Modifiers to NEW request
 NLM_F_REPLACE = 0x100   # Override existing
 NLM_F_EXCL = 0x200      # Do not touch, if it exists
@@ -61,11 +67,22 @@ NLMSG_OVERRUN = 0x4     # Data lost
 
 NLMSG_MIN_TYPE = 0x10   # < 0x10: reserved control messages
 
+# extended ACK attributes, after the nlmsgerr in NLMSG_ERROR and NLMSG_DONE
+NLMSGERR_ATTR_UNUSED = 0
+NLMSGERR_ATTR_MSG = 1       # error message string
+NLMSGERR_ATTR_OFFS = 2      # offset of the invalid attribute in the request
+NLMSGERR_ATTR_COOKIE = 3    # arbitrary subsystem specific cookie
+NLMSGERR_ATTR_POLICY = 4    # policy for a rejected attribute
+NLMSGERR_ATTR_MISS_TYPE = 5 # type of a missing required attribute
+NLMSGERR_ATTR_MISS_NEST = 6 # offset of the nest where an attribute is missing
+
 # pack/unpack format for msg_length, msg_type, msg_flags, msg_seq, pid
 header_format = "ihhii"
 
 MSG_HDRLEN = NLMSG_ALIGN(calcsize(header_format))
 
+_header = Struct(header_format)
+
 
 class Message(object):
     def __init__(self, buffer=None):
@@ -311,7 +328,8 @@ class Message(object):
             It may be useful for debugging purposes.
 
             It calls Message.printf_header() and Payload.printf() to do
-            the real work.
+            the real work.  See pymnl.dump.MessageDumper for a much faster
+            dump which can write to any stream.
         """
         self.printf_header()
         self._payload.printf(self._msg_type, extra_header_size)
@@ -352,6 +370,125 @@ class Message(object):
         """
         return os.strerror(self.get_errno())
 
+    def get_error_header(self):
+        """ Return the header of the request acknowledged by an
+            NLMSG_ERROR message, as a (length, type, flags, seq, pid)
+            tuple, or None if this is not a (complete) NLMSG_ERROR.
+        """
+        if (self._msg_type != NLMSG_ERROR):
+            return None
+        data = self._payload.get_data()
+        if (len(data) < 4 + MSG_HDRLEN):
+            return None
+        return _header.unpack_from(data, 4)
+
+    def get_ext_ack(self):
+        """ Return a dict of the extended ACK attributes of an
+            NLMSG_ERROR or NLMSG_DONE message, see ExtAckAttrParser.
+
+            The dict is empty unless the kernel included the attributes
+            (NLM_F_ACK_TLVS), which it does after
+            Socket.set_ext_ack() for failed requests and some warnings.
+        """
+        if (not (self._msg_flags & NLM_F_ACK_TLVS)):
+            return {}
+        data = self._payload.get_data()
+        offset = 4
+        if (self._msg_type == NLMSG_ERROR):
+            offset = offset + MSG_HDRLEN
+            if (not (self._msg_flags & NLM_F_CAPPED)):
+                # the whole request was echoed, skip its payload too
+                header = self.get_error_header()
+                if (header is None):
+                    return {}
+                offset = offset + NLMSG_ALIGN(header[0]) - MSG_HDRLEN
+        elif (self._msg_type != NLMSG_DONE):
+            return {}
+        return ExtAckAttrParser().parse(self._payload, offset)
+
+    def get_attr_at(self, offset):
+        """ Return the Attr starting at offset bytes from the start of
+            this message, or None if there is no room for one there.
+
+            offset - byte offset, e.g. the 'offset' reported in the
+                extended ACK of a failed request, which points to the
+                attribute the kernel rejected
+        """
+        binary = self.get_binary()
+        if ((offset < MSG_HDRLEN) or (offset + 4 > len(binary))):
+            return None
+        length = unpack("H", binary[offset:offset + 2])[0]
+        if ((length < 4) or (offset + length > len(binary))):
+            return None
+        return Attr(packed_data=binary[offset:offset + length])
+
+
+class LazyMessage(Message):
+    def __init__(self, buffer, offset=0, end=None):
+        """ A netlink message which decodes only its header until
+            the payload is asked for.
+
+            buffer - binary string holding one or more messages
+
+            offset - offset into buffer at which the message starts
+
+            end - offset into buffer at which the message ends, defaults
+                to the end of buffer
+
+            The header fields are unpacked once, when the object is
+            created.  A reference to buffer is kept and the Payload is
+            only built on the first call to get_payload() (or any method
+            which needs the payload, like get_errno() or get_binary()).
+            So, checking get_type() or get_seq() and dropping the message
+            does not copy the payload out of the receive buffer.
+
+            Otherwise, a LazyMessage behaves like a Message.
+        """
+        if (end is None):
+            end = len(buffer)
+        (self._msg_length,
+         self._msg_type,
+         self._msg_flags,
+         self._msg_seq,
+         self._pid) = _header.unpack_from(buffer, offset)
+        self._buffer = buffer
+        self._offset = offset
+        self._end = end
+        self._lazy_payload = None
+
+    def _get_payload(self):
+        """ Return the Payload, building it from the buffer when needed.
+        """
+        if ((self._lazy_payload is None) and (self._buffer is not None)):
+            self._lazy_payload = Payload(
+                    self._buffer[self._offset + MSG_HDRLEN:self._end])
+        return self._lazy_payload
+
+    def _set_payload(self, payload):
+        """ Replace the Payload and let go of the buffer.
+        """
+        self._lazy_payload = payload
+        self._buffer = None
+
+    # Message methods use self._payload directly, so make it lazy, too.
+    _payload = property(_get_payload, _set_payload)
+
+    def __len__(self):
+        """ Get the unaligned length of the message (in bytes).
+        """
+        if ((self._lazy_payload is None) and (self._buffer is not None)):
+            return self._end - self._offset
+        return Message.__len__(self)
+
+    def get_buffer(self):
+        """ Return a (buffer, offset, end) tuple locating the message in
+            the original receive buffer, or None if the payload has been
+            replaced.
+        """
+        if (self._buffer is None):
+            return None
+        return (self._buffer, self._offset, self._end)
+
 
 class Payload(object):
     def __init__(self, contents=None):
@@ -513,14 +650,23 @@ class Payload(object):
 
 
 class MessageList(list):
-    def __init__(self, msg):
+    def __init__(self, msg, lazy=False):
         """ Holds the Message objects making up a multipart message.
+
+            msg - a Message or a binary string with one or more messages
+
+            lazy - if True, split a binary string into LazyMessage
+                objects, which decode only the message header until the
+                payload is needed
         """
         if (isinstance(msg, Message)):
             self.append(msg)
         elif (isinstance(msg, str) or isinstance(msg, bytes)):
             # Py2, it's a str; Py3, it's a bytes
-            self.split(msg)
+            if (lazy):
+                self.split_lazy(msg)
+            else:
+                self.split(msg)
         else:
             raise TypeError("MessageList only accepts Messages " +
                             "or a packed string")
@@ -548,3 +694,107 @@ class MessageList(list):
                 self.append(one_msg)
                 msg = None
 
+    def split_lazy(self, msg):
+        """ Split multipart message into LazyMessage objects which share
+            the binary string.
+
+            Splitting stops at the first message whose header claims a
+            length shorter than the header or longer than the data left.
+        """
+        index = 0
+        end = len(msg)
+        while (index + MSG_HDRLEN <= end):
+            length = _header.unpack_from(msg, index)[0]
+            if ((length < MSG_HDRLEN) or (index + length > end)):
+                break
+            self.append(LazyMessage(msg, index, index + length))
+            index = index + NLMSG_ALIGN(length)
+
+
+class ExtAckAttrParser(AttrParser):
+    """ Parser for extended ACK attributes (NLMSGERR_ATTR_*).
+
+        The result dict has the keys 'msg' (error message string),
+        'offset' (offset of the rejected attribute from the start of the
+        request, see Message.get_attr_at()), 'cookie', 'policy' (list of
+        Attr), 'miss_type', and 'miss_nest' for the attributes present.
+    """
+    def __init__(self, data_obj=None, offset=0):
+        """ Parse a string for extended ACK attributes.
+
+            data_obj - An optional object with attributes.  The data
+                object can be passed here and will be immediately parsed.
+                Or the object can be sent to the parse() method after
+                initialization.  See parse() for more details.
+
+            offset - offset into data at which to start
+        """
+        # dict to hold attributes without an assigned callback
+        self._attributes = {'unmatched': []}
+
+        self._cb = {NLMSGERR_ATTR_MSG: self.nlmsgerr_attr_msg,
+                    NLMSGERR_ATTR_OFFS: self.nlmsgerr_attr_offs,
+                    NLMSGERR_ATTR_COOKIE: self.nlmsgerr_attr_cookie,
+                    NLMSGERR_ATTR_POLICY: self.nlmsgerr_attr_policy,
+                    NLMSGERR_ATTR_MISS_TYPE: self.nlmsgerr_attr_miss_type,
+                    NLMSGERR_ATTR_MISS_NEST: self.nlmsgerr_attr_miss_nest}
+        if (data_obj):
+            self.parse(data_obj, offset)
+
+    def nlmsgerr_attr_msg(self, attr):
+        """ Save error message.
+
+            attr - Attr object
+        """
+        self._attributes['msg'] = attr.get_str_stripped()
+
+    def nlmsgerr_attr_offs(self, attr):
+        """ Save offset of the rejected attribute.
+
+            attr - Attr object
+        """
+        self._attributes['offset'] = attr.get_u32()
+
+    def nlmsgerr_attr_cookie(self, attr):
+        """ Save cookie.
+
+            attr - Attr object
+        """
+        self._attributes['cookie'] = attr.get_data()
+
+    def nlmsgerr_attr_policy(self, attr):
+        """ Save the nested policy attributes.
+
+            attr - Attr object
+        """
+        self._attributes['policy'] = self.parse_nested(attr)
+
+    def nlmsgerr_attr_miss_type(self, attr):
+        """ Save type of the missing attribute.
+
+            attr - Attr object
+        """
+        self._attributes['miss_type'] = attr.get_u32()
+
+    def nlmsgerr_attr_miss_nest(self, attr):
+        """ Save offset of the nest missing an attribute.
+
+            attr - Attr object
+        """
+        self._attributes['miss_nest'] = attr.get_u32()
+
+    def parse(self, data_obj, offset=0):
+        """ Process the attributes.
+
+            data_obj - An object containing attributes and providing the
+                get_binary() method.  See Message and Payload for examples
+                of get_binary().
+
+            offset - offset into data at which to start
+        """
+        for one_attr in self.parse_string(data_obj.get_binary(), offset):
+            try:
+                self._cb[one_attr.get_type()](one_attr)
+            except KeyError:
+                self._attributes['unmatched'].append(one_attr)
+        return self._attributes
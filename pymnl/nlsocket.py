@@ -25,17 +25,30 @@
 #      Copyright 2008-2010 by Pablo Neira Ayuso <pablo@netfilter.org>
 #
 
+import errno
 from resource import getpagesize
 import socket
 
+try:
+    from time import perf_counter as _timer
+except ImportError:
+    # Py2
+    from time import time as _timer
+
 import pymnl
-from pymnl.message import MessageList
+from pymnl import bpf
+from pymnl.message import MessageList, NLMSG_ERROR
 
 NETLINK_ADD_MEMBERSHIP = 1
 NETLINK_DROP_MEMBERSHIP = 2
 NETLINK_PKTINFO = 3
 NETLINK_BROADCAST_ERROR = 4
 NETLINK_NO_ENOBUFS = 5
+NETLINK_LISTEN_ALL_NSID = 8
+NETLINK_LIST_MEMBERSHIPS = 9
+NETLINK_CAP_ACK = 10
+NETLINK_EXT_ACK = 11
+NETLINK_GET_STRICT_CHK = 12
 
 #
 # libmnl.h
@@ -61,6 +74,8 @@ class Socket(object):
         """
         self._bus = bus
         self._groups = 0   # multicast groups mask
+        self._latency = None
+        self.reset_stats()
 
         self._socket = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, bus)
 
@@ -108,9 +123,62 @@ class Socket(object):
             Raises an exception on error. Otherwise, it returns the number of
             bytes sent.
         """
-        return self._socket.send(nl_message.get_binary())
-
-    def recv(self, bufsize=SOCKET_BUFFER_SIZE, flags=0):
+        binary = nl_message.get_binary()
+        if (self._latency):
+            self._latency.message_sent(nl_message)
+        try:
+            sent = self._socket.send(binary)
+        except socket.error as error:
+            self._count_error(error.errno)
+            raise
+        self._datagrams_sent += 1
+        self._bytes_sent += sent
+        return sent
+
+    def send_binary(self, data):
+        """ Send a binary string holding one or more netlink messages.
+
+            data - binary string, e.g. several Message.get_binary() joined
+                together to send a batch of requests in one datagram
+
+            Raises an exception on error.  Otherwise, it returns the number
+            of bytes sent.
+        """
+        try:
+            sent = self._socket.send(data)
+        except socket.error as error:
+            self._count_error(error.errno)
+            raise
+        self._datagrams_sent += 1
+        self._bytes_sent += sent
+        return sent
+
+    def recv_into(self, buffer, nbytes=0, flags=0):
+        """ Receive a datagram into a writable buffer, without splitting
+            it into messages.
+
+            buffer - bytearray (or other writable buffer) of at least
+                SOCKET_BUFFER_SIZE bytes
+
+            nbytes, flags - see socket.recv_into()
+
+            Raises an exception on error.  Otherwise, it returns the number
+            of bytes received.  Message type and error counters in
+            stats() are not updated, since the messages are not decoded.
+        """
+        start = _timer()
+        try:
+            received = self._socket.recv_into(buffer, nbytes, flags)
+        except socket.error as error:
+            self._recv_time += _timer() - start
+            self._count_error(error.errno)
+            raise
+        self._recv_time += _timer() - start
+        self._datagrams_received += 1
+        self._bytes_received += received
+        return received
+
+    def recv(self, bufsize=SOCKET_BUFFER_SIZE, flags=0, lazy=False):
         """ Receive a netlink message.
 
             bufsize - max data to receive
@@ -121,10 +189,120 @@ class Socket(object):
 
             flags - see socket.recv()
 
+            lazy - if True, the MessageList holds LazyMessage objects,
+                which only decode the message header until the payload
+                is needed
+
             Raises an exception on error.  Otherwise, it returns a
             MessageList.
         """
-        return MessageList(self._socket.recv(bufsize, flags))
+        start = _timer()
+        try:
+            data = self._socket.recv(bufsize, flags)
+        except socket.error as error:
+            self._recv_time += _timer() - start
+            self._count_error(error.errno)
+            raise
+        split_start = _timer()
+        messages = MessageList(data, lazy)
+        end = _timer()
+        self._recv_time += split_start - start
+        self._split_time += end - split_start
+
+        self._datagrams_received += 1
+        self._bytes_received += len(data)
+        if (len(messages) > 1):
+            self._multi_recvs += 1
+        msg_types = self._msg_types
+        for msg in messages:
+            msg_type = msg._msg_type
+            msg_types[msg_type] = msg_types.get(msg_type, 0) + 1
+            if (msg_type == NLMSG_ERROR):
+                errno_ = msg.get_errno()
+                if (errno_):
+                    self._count_error(errno_)
+        if (self._latency):
+            self._latency.process(messages, split_start)
+        return messages
+
+    def set_latency_tracker(self, tracker):
+        """ Turn on request to acknowledgement latency tracking.
+
+            tracker - a pymnl.latency.LatencyTracker, or None to turn
+                tracking off
+
+            Once set, every request passed to send() is timestamped and
+            every reply from recv() which acknowledges a request records
+            the round-trip latency in the tracker.
+        """
+        self._latency = tracker
+
+    def get_latency_tracker(self):
+        """ Return the latency tracker, or None if tracking is off.
+        """
+        return self._latency
+
+    def _count_error(self, errno_):
+        """ Count one error, by errno.
+
+            errno_ - error number from a socket error or an NLMSG_ERROR
+        """
+        self._errors[errno_] = self._errors.get(errno_, 0) + 1
+        if (errno_ == errno.ENOBUFS):
+            self._enobufs += 1
+
+    def stats(self):
+        """ Return a snapshot of the socket counters as a dict.
+
+            The counters are kept for the life of the socket (or since the
+            last call to reset_stats()) and include:
+
+                - datagrams_sent, bytes_sent
+
+                - datagrams_received, bytes_received
+
+                - messages - dict of received message type to count
+
+                - errors - dict of errno to count, from both socket
+                    errors and NLMSG_ERROR messages
+
+                - enobufs - number of ENOBUFS errors (the receive buffer
+                    overflowed and messages were lost)
+
+                - multi_recvs - recv() calls which returned more than one
+                    message
+
+                - recv_time - seconds spent waiting in socket recv
+
+                - split_time - seconds spent building MessageLists
+
+            The returned dict is a copy and is not updated by later
+            socket activity.
+        """
+        return {'datagrams_sent': self._datagrams_sent,
+                'bytes_sent': self._bytes_sent,
+                'datagrams_received': self._datagrams_received,
+                'bytes_received': self._bytes_received,
+                'messages': dict(self._msg_types),
+                'errors': dict(self._errors),
+                'enobufs': self._enobufs,
+                'multi_recvs': self._multi_recvs,
+                'recv_time': self._recv_time,
+                'split_time': self._split_time}
+
+    def reset_stats(self):
+        """ Set all the socket counters back to zero.
+        """
+        self._datagrams_sent = 0
+        self._bytes_sent = 0
+        self._datagrams_received = 0
+        self._bytes_received = 0
+        self._msg_types = {}
+        self._errors = {}
+        self._enobufs = 0
+        self._multi_recvs = 0
+        self._recv_time = 0.0
+        self._split_time = 0.0
 
     def close(self):
         """ Close the socket.
@@ -152,6 +330,12 @@ class Socket(object):
 
                 - NETLINK_NO_ENOBUFS
 
+                - NETLINK_CAP_ACK
+
+                - NETLINK_EXT_ACK
+
+                - NETLINK_GET_STRICT_CHK
+
             In the early days, Netlink only supported 32 groups expressed
             in a 32-bits mask. However, since 2.6.14, Netlink may have up
             to 2^32 multicast groups but you have to use setsockopt() with
@@ -164,6 +348,44 @@ class Socket(object):
         """
         self._socket.setsockopt(SOL_NETLINK, optname, value)
 
+    def set_strict_check(self, enable=True):
+        """ Turn on strict checking of dump requests (Linux 4.20 and later).
+
+            enable - True to turn on strict checking, False to turn it off
+
+            With strict checking, the kernel rejects malformed requests
+            and applies the filters in dump requests (e.g. the routing
+            table of an RTM_GETROUTE dump, see pymnl.rtnl), so only
+            matching entries are sent.  Without it, filters in a dump
+            request are ignored.
+        """
+        self.setsockopt(NETLINK_GET_STRICT_CHK, int(bool(enable)))
+
+    def set_cap_ack(self, enable=True):
+        """ Ask the kernel to cap acknowledgements (NETLINK_CAP_ACK).
+
+            enable - True to cap acknowledgements, False to echo the whole
+                request again
+
+            By default, an NLMSG_ERROR for a failed request holds a copy
+            of the whole request.  With capped acknowledgements it only
+            holds the request's header and the NLM_F_CAPPED flag is set.
+        """
+        self.setsockopt(NETLINK_CAP_ACK, int(bool(enable)))
+
+    def set_ext_ack(self, enable=True):
+        """ Ask the kernel for extended acknowledgements (NETLINK_EXT_ACK).
+
+            enable - True to turn on extended acknowledgements, False to
+                turn them off
+
+            Extended acknowledgements add an error message, the offset of
+            the rejected attribute, and other NLMSGERR_ATTR_* attributes
+            to NLMSG_ERROR (and NLMSG_DONE) messages.  See
+            Message.get_ext_ack().
+        """
+        self.setsockopt(NETLINK_EXT_ACK, int(bool(enable)))
+
     def getsockopt(self, optname, buflen=0):
         """ Get a Netlink socket option.
 
@@ -173,3 +395,19 @@ class Socket(object):
         """
         return self._socket.getsockopt(SOL_NETLINK, optname, buflen)
 
+
+    def attach_filter(self, program):
+        """ Attach a classic BPF filter to the socket, so the kernel drops
+            unwanted messages before they are queued for this socket.
+
+            program - pymnl.bpf.NetlinkFilter or pymnl.bpf.BpfProgram
+
+            Attaching a filter replaces any previous filter and does not
+            need any privileges.
+        """
+        bpf.attach_filter(self._socket, program)
+
+    def detach_filter(self):
+        """ Remove the filter attached by attach_filter().
+        """
+        bpf.detach_filter(self._socket)
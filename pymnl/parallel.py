@@ -0,0 +1,212 @@
+#!/usr/bin/python
+#
+# parallel.py -- run several dumps at once over a pool of sockets
+#
+# This file is part of the pymnl package, a Python interface
+# for netlink sockets.
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License
+#  as published by the Free Software Foundation; either version 2.1 of
+#  the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+#  USA
+#
+
+import os
+import socket
+import threading
+
+try:
+    import queue
+except ImportError:
+    # Py2
+    import Queue as queue
+
+from pymnl.callback import CallbackRunner, CB_ERROR, CB_STOP
+from pymnl.nlsocket import Socket, SOCKET_BUFFER_SIZE
+
+# batches of messages queued per worker before workers wait for the reader
+QUEUE_BATCHES = 64
+
+# seconds between checks for a reader which stopped iterating
+_POLL = 0.1
+
+# queue item marking the end of a worker's requests
+_DONE = object()
+
+
+class ParallelDump(object):
+    """ Run independent dump requests concurrently, each on one of a
+        small pool of sockets, and merge the replies into one iterator.
+
+        Each worker thread opens its own Socket, then sends requests and
+        receives their replies one request at a time.  While a worker
+        waits in recv() for the kernel to fill the next datagram, the
+        GIL is released, so the kernel's dump work for one request
+        overlaps with the decoding of the others by the reader.
+
+        Messages from one request keep their order.  Messages from
+        different requests are interleaved as they arrive, unless a key
+        is given, in which case all messages are received first and then
+        sorted.
+    """
+    def __init__(self, bus, requests, workers=4, key=None,
+                       bufsize=SOCKET_BUFFER_SIZE, lazy=True,
+                       strict_check=False):
+        """ Create a ParallelDump.
+
+            bus - netlink protocol, e.g. pymnl.NETLINK_ROUTE
+
+            requests - list of dump request Messages, e.g. from
+                pymnl.rtnl.route_dump_request()
+
+            workers - number of sockets (and threads), at most one per
+                request is used
+
+            key - optional callable(msg) to sort all messages by
+
+            bufsize - receive buffer size, see Socket.recv()
+
+            lazy - if True, messages are LazyMessages, see
+                pymnl.message.LazyMessage
+
+            strict_check - if True, turn on strict dump checking on each
+                socket, see Socket.set_strict_check()
+        """
+        self._bus = bus
+        self._requests = list(requests)
+        self._workers = max(1, min(workers, len(self._requests)))
+        self._key = key
+        self._bufsize = bufsize
+        self._lazy = lazy
+        self._strict_check = strict_check
+
+    def __iter__(self):
+        """ Start the dumps and return an iterator over the messages.
+        """
+        if (self._key is not None):
+            return iter(sorted(self._merge(), key=self._key))
+        return self._merge()
+
+    def _merge(self):
+        """ Yield messages from all the workers as they arrive.
+
+            Raises socket.error for a dump which failed, after stopping
+            the other workers.
+        """
+        pending = queue.Queue()
+        for request in self._requests:
+            pending.put(request)
+        batches = queue.Queue(self._workers * QUEUE_BATCHES)
+        stop = threading.Event()
+        threads = []
+        for index in range(self._workers):
+            thread = threading.Thread(target=self._worker,
+                                      args=(pending, batches, stop))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+        running = len(threads)
+        try:
+            while (running):
+                batch = batches.get()
+                if (batch is _DONE):
+                    running -= 1
+                elif (isinstance(batch, Exception)):
+                    raise batch
+                else:
+                    for msg in batch:
+                        yield msg
+        finally:
+            # also reached when the reader stops iterating early
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def _put(self, batches, stop, item):
+        """ Queue an item for the reader, unless it has stopped reading.
+
+            Returns False if the reader stopped.
+        """
+        while (not stop.is_set()):
+            try:
+                batches.put(item, True, _POLL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _worker(self, pending, batches, stop):
+        """ Send requests and queue their replies until none are left.
+        """
+        sock = None
+        try:
+            sock = Socket(self._bus)
+            sock.bind()
+            if (self._strict_check):
+                sock.set_strict_check()
+            # poll now and then to notice a reader which stopped
+            sock.get_sock().settimeout(_POLL)
+            while (not stop.is_set()):
+                try:
+                    request = pending.get_nowait()
+                except queue.Empty:
+                    break
+                if (not self._dump(sock, request, batches, stop)):
+                    break
+        except (socket.error, OSError) as error:
+            self._put(batches, stop, error)
+        finally:
+            if (sock is not None):
+                sock.close()
+            self._put(batches, stop, _DONE)
+
+    def _dump(self, sock, request, batches, stop):
+        """ Run one dump request on sock.
+
+            Returns False if the worker should stop.
+        """
+        batch = []
+        runner = CallbackRunner(seq=request.get_seq(),
+                                portid=sock.get_portid(),
+                                default=lambda msg: batch.append(msg))
+        sock.send(request)
+        ret = None
+        while ((ret is None) or (ret > CB_STOP)):
+            try:
+                messages = sock.recv(self._bufsize, lazy=self._lazy)
+            except socket.timeout:
+                if (stop.is_set()):
+                    return False
+                continue
+            ret = runner.run(messages)
+            if (batch):
+                if (not self._put(batches, stop, batch)):
+                    return False
+                batch = []
+        if (ret == CB_ERROR):
+            errno_ = runner.get_errno()
+            self._put(batches, stop,
+                      socket.error(errno_, os.strerror(errno_)))
+            return False
+        return True
+
+
+def parallel_dump(bus, requests, workers=4, key=None, strict_check=False):
+    """ Run dump requests concurrently and return an iterator over all
+        their messages.
+
+        A convenience wrapper around ParallelDump, see ParallelDump for
+        the meaning of the arguments.
+    """
+    return iter(ParallelDump(bus, requests, workers, key,
+                             strict_check=strict_check))
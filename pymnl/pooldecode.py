@@ -0,0 +1,283 @@
+#!/usr/bin/python
+#
+# pooldecode.py -- decode large dumps in a pool of processes
+#
+# This file is part of the pymnl package, a Python interface
+# for netlink sockets.
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License
+#  as published by the Free Software Foundation; either version 2.1 of
+#  the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+#  USA
+#
+
+from collections import deque
+import os
+import socket
+from struct import Struct
+
+try:
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+except ImportError:
+    # Py2, and Py3 before 3.8
+    ProcessPoolExecutor = None
+    shared_memory = None
+
+from pymnl.message import (MSG_HDRLEN, NLMSG_ALIGN, NLMSG_DONE,
+                           NLMSG_ERROR, NLMSG_MIN_TYPE, Payload)
+from pymnl.nlsocket import SOCKET_BUFFER_SIZE
+
+# size of each shared memory segment handed to a decoder
+CHUNK_SIZE = 1 << 22
+
+# nlmsg_len and nlmsg_type at the start of each message
+_length_type = Struct("=IH")
+
+# error code at the start of an NLMSG_ERROR or NLMSG_DONE payload
+_error = Struct("=i")
+
+
+def _decode_chunk(name, spans, parser_class, extra_header_size,
+                  drop_unmatched):
+    """ Decode the data messages in a shared memory segment.
+
+        Runs in a decoder process.  Returns a list of
+        (type, extra header, attributes) tuples in message order.
+    """
+    segment = shared_memory.SharedMemory(name=name)
+    buffer = segment.buf
+    results = []
+    try:
+        for (start, end) in spans:
+            offset = start
+            while (offset + MSG_HDRLEN <= end):
+                (length, msg_type) = _length_type.unpack_from(buffer, offset)
+                if ((length < MSG_HDRLEN) or (offset + length > end)):
+                    break
+                if (msg_type >= NLMSG_MIN_TYPE):
+                    data = bytes(buffer[offset + MSG_HDRLEN:offset + length])
+                    attrs = parser_class().parse(Payload(data),
+                                                 extra_header_size)
+                    if (drop_unmatched and isinstance(attrs, dict)):
+                        attrs.pop('unmatched', None)
+                    results.append((msg_type, data[:extra_header_size],
+                                    attrs))
+                offset += NLMSG_ALIGN(length)
+    finally:
+        buffer.release()
+        segment.close()
+    return results
+
+
+class _Chunk(object):
+    """ A shared memory segment being filled with datagrams.
+    """
+    def __init__(self, size):
+        self.segment = shared_memory.SharedMemory(create=True, size=size)
+        self.used = 0
+        self.spans = []
+
+    def room(self):
+        """ Return the number of free bytes.
+        """
+        return self.segment.size - self.used
+
+    def append(self, data):
+        """ Copy a datagram to the end of the segment.
+        """
+        self.segment.buf[self.used:self.used + len(data)] = data
+        self.add(len(data))
+
+    def add(self, length):
+        """ Record a datagram of length bytes written at the end.
+        """
+        self.spans.append((self.used, self.used + length))
+        self.used = self.used + length
+
+    def free(self):
+        """ Release and remove the segment.
+        """
+        self.segment.close()
+        self.segment.unlink()
+
+
+class PoolDecoder(object):
+    """ Decode the attributes of large dumps in a pool of processes.
+
+        The receiving process only copies raw datagrams into shared
+        memory segments and finds the end of the dump; it does not build
+        any Message objects.  Each full segment is handed, by name, to a
+        ProcessPoolExecutor, where a decoder runs an AttrParser subclass
+        over every data message in it.  Only the results are pickled.
+
+        Results are (type, extra header, attributes) tuples, where
+        attributes is what parser_class().parse() returned, and are
+        returned in dump order.  Parsers should return compact values
+        (numbers, strings), since results are pickled back; the
+        'unmatched' list of Attr objects is dropped by default.
+
+        Requires Python 3.8 or later.
+    """
+    def __init__(self, parser_class, extra_header_size=0, workers=None,
+                       chunk_size=CHUNK_SIZE, drop_unmatched=True):
+        """ Create a PoolDecoder and start its processes.
+
+            parser_class - AttrParser subclass, which must be importable
+                by the decoder processes (i.e. not defined in __main__ of
+                an interactive session)
+
+            extra_header_size - size of the protocol header before the
+                attributes (e.g. 4 for genlmsghdr, 16 for ifinfomsg)
+
+            workers - number of decoder processes, defaults to the number
+                of CPUs
+
+            chunk_size - bytes of datagrams handed to a decoder at once
+
+            drop_unmatched - if True, remove the 'unmatched' key from
+                dict results before they are sent back
+        """
+        if (shared_memory is None):
+            raise NotImplementedError("PoolDecoder needs Python 3.8 or later")
+        if (workers is None):
+            workers = os.cpu_count() or 1
+        self._parser_class = parser_class
+        self._extra_header_size = extra_header_size
+        self._workers = workers
+        self._chunk_size = chunk_size
+        self._drop_unmatched = drop_unmatched
+        self._executor = ProcessPoolExecutor(workers)
+
+    def close(self):
+        """ Stop the decoder processes.
+        """
+        self._executor.shutdown()
+
+    def decode_datagrams(self, datagrams):
+        """ Decode an iterable of datagrams (binary strings), and return an
+            iterator over the results.
+        """
+        pending = deque()
+        chunk = None
+        try:
+            for data in datagrams:
+                if ((chunk is not None) and (chunk.room() < len(data))):
+                    self._submit(pending, chunk)
+                    chunk = None
+                    for result in self._drain(pending, self._workers * 2):
+                        yield result
+                if (chunk is None):
+                    chunk = _Chunk(max(self._chunk_size, len(data)))
+                chunk.append(data)
+            if (chunk is not None):
+                self._submit(pending, chunk)
+                chunk = None
+            for result in self._drain(pending, 0):
+                yield result
+        finally:
+            self._abandon(pending, chunk)
+
+    def decode_dump(self, sock, bufsize=SOCKET_BUFFER_SIZE):
+        """ Receive a dump from a Socket, after the request has been sent,
+            and return an iterator over the results.
+
+            sock - pymnl.nlsocket.Socket
+
+            bufsize - largest datagram received
+
+            Raises socket.error if the kernel reports an error.
+        """
+        pending = deque()
+        chunk = None
+        try:
+            done = False
+            while (not done):
+                if ((chunk is not None) and (chunk.room() < bufsize)):
+                    self._submit(pending, chunk)
+                    chunk = None
+                    for result in self._drain(pending, self._workers * 2):
+                        yield result
+                if (chunk is None):
+                    chunk = _Chunk(max(self._chunk_size, bufsize))
+                view = chunk.segment.buf[chunk.used:]
+                try:
+                    received = sock.recv_into(view, bufsize)
+                    done = self._is_last(view, received)
+                finally:
+                    view.release()
+                chunk.add(received)
+            self._submit(pending, chunk)
+            chunk = None
+            for result in self._drain(pending, 0):
+                yield result
+        finally:
+            self._abandon(pending, chunk)
+
+    def _is_last(self, buffer, length):
+        """ Return True if a datagram ends the dump.
+
+            Raises socket.error for an error reported by the kernel.
+        """
+        offset = 0
+        while (offset + MSG_HDRLEN <= length):
+            (msg_length, msg_type) = _length_type.unpack_from(buffer, offset)
+            if (msg_length < MSG_HDRLEN):
+                break
+            if ((msg_type == NLMSG_DONE) or (msg_type == NLMSG_ERROR)):
+                errno_ = 0
+                if (offset + MSG_HDRLEN + 4 <= length):
+                    errno_ = abs(_error.unpack_from(buffer,
+                                                    offset + MSG_HDRLEN)[0])
+                if (errno_):
+                    raise socket.error(errno_, os.strerror(errno_))
+                return True
+            offset += NLMSG_ALIGN(msg_length)
+        return False
+
+    def _submit(self, pending, chunk):
+        """ Hand a chunk to a decoder.
+        """
+        future = self._executor.submit(_decode_chunk, chunk.segment.name,
+                                       chunk.spans, self._parser_class,
+                                       self._extra_header_size,
+                                       self._drop_unmatched)
+        pending.append((future, chunk))
+
+    def _drain(self, pending, keep):
+        """ Yield the results of the oldest chunks until at most keep
+            chunks are pending.
+        """
+        while (len(pending) > keep):
+            (future, chunk) = pending[0]
+            try:
+                results = future.result()
+            finally:
+                pending.popleft()
+                chunk.free()
+            for result in results:
+                yield result
+
+    def _abandon(self, pending, chunk):
+        """ Wait for unfinished decoders and free all segments.
+        """
+        while (pending):
+            (future, pending_chunk) = pending.popleft()
+            future.cancel()
+            try:
+                future.result()
+            except Exception:
+                pass
+            pending_chunk.free()
+        if (chunk is not None):
+            chunk.free()
@@ -0,0 +1,1599 @@
+#!/usr/bin/python
+#
+# rtnl.py -- rtnetlink headers and request helpers
+#
+# This file is part of the pymnl package, a Python interface
+# for netlink sockets.
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License
+#  as published by the Free Software Foundation; either version 2.1 of
+#  the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+#  USA
+#
+
+from array import array
+from collections import namedtuple
+import errno
+import socket
+from struct import Struct
+import sys
+
+from pymnl import NETLINK_ROUTE
+from pymnl.attributes import Attr
+from pymnl.callback import CallbackRunner, CB_ERROR
+from pymnl.message import (Message, MSG_HDRLEN, NLM_F_ACK, NLM_F_DUMP,
+                           NLM_F_REQUEST)
+from pymnl.nlsocket import Socket, SOCKET_BUFFER_SIZE
+
+#
+# linux/rtnetlink.h
+#
+
+# message types
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+RTM_SETLINK = 19
+RTM_NEWADDR = 20
+RTM_DELADDR = 21
+RTM_GETADDR = 22
+RTM_NEWROUTE = 24
+RTM_DELROUTE = 25
+RTM_GETROUTE = 26
+RTM_NEWNEIGH = 28
+RTM_DELNEIGH = 29
+RTM_GETNEIGH = 30
+
+# multicast groups, for Socket.bind()
+RTMGRP_LINK = 0x1
+RTMGRP_NOTIFY = 0x2
+RTMGRP_NEIGH = 0x4
+RTMGRP_TC = 0x8
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV4_MROUTE = 0x20
+RTMGRP_IPV4_ROUTE = 0x40
+RTMGRP_IPV4_RULE = 0x80
+RTMGRP_IPV6_IFADDR = 0x100
+RTMGRP_IPV6_MROUTE = 0x200
+RTMGRP_IPV6_ROUTE = 0x400
+
+# rtm_type
+RTN_UNSPEC = 0
+RTN_UNICAST = 1
+RTN_LOCAL = 2
+RTN_BROADCAST = 3
+RTN_ANYCAST = 4
+RTN_MULTICAST = 5
+RTN_BLACKHOLE = 6
+RTN_UNREACHABLE = 7
+RTN_PROHIBIT = 8
+RTN_THROW = 9
+RTN_NAT = 10
+RTN_XRESOLVE = 11
+
+# rtm_protocol
+RTPROT_UNSPEC = 0
+RTPROT_REDIRECT = 1
+RTPROT_KERNEL = 2   # route installed by kernel
+RTPROT_BOOT = 3     # route installed during boot
+RTPROT_STATIC = 4   # route installed by administrator
+
+# rtm_scope
+RT_SCOPE_UNIVERSE = 0
+RT_SCOPE_SITE = 200
+RT_SCOPE_LINK = 253
+RT_SCOPE_HOST = 254
+RT_SCOPE_NOWHERE = 255
+
+# rtm_flags
+RTM_F_NOTIFY = 0x100
+RTM_F_CLONED = 0x200
+RTM_F_EQUALIZE = 0x400
+RTM_F_PREFIX = 0x800
+
+# reserved table identifiers
+RT_TABLE_UNSPEC = 0
+RT_TABLE_COMPAT = 252
+RT_TABLE_DEFAULT = 253
+RT_TABLE_MAIN = 254
+RT_TABLE_LOCAL = 255
+
+# routing message attributes
+RTA_UNSPEC = 0
+RTA_DST = 1
+RTA_SRC = 2
+RTA_IIF = 3
+RTA_OIF = 4
+RTA_GATEWAY = 5
+RTA_PRIORITY = 6
+RTA_PREFSRC = 7
+RTA_METRICS = 8
+RTA_MULTIPATH = 9
+RTA_FLOW = 11
+RTA_CACHEINFO = 12
+RTA_TABLE = 15
+RTA_MARK = 16
+
+# RTA_METRICS nested attributes
+RTAX_LOCK = 1
+RTAX_MTU = 2
+RTAX_WINDOW = 3
+RTAX_RTT = 4
+RTAX_RTTVAR = 5
+RTAX_SSTHRESH = 6
+RTAX_CWND = 7
+RTAX_ADVMSS = 8
+RTAX_REORDERING = 9
+RTAX_HOPLIMIT = 10
+RTAX_INITCWND = 11
+
+#
+# linux/if_link.h
+#
+
+IFLA_UNSPEC = 0
+IFLA_ADDRESS = 1
+IFLA_BROADCAST = 2
+IFLA_IFNAME = 3
+IFLA_MTU = 4
+IFLA_LINK = 5
+IFLA_QDISC = 6
+IFLA_STATS = 7
+IFLA_MASTER = 10
+IFLA_TXQLEN = 13
+IFLA_OPERSTATE = 16
+IFLA_LINKMODE = 17
+IFLA_LINKINFO = 18
+IFLA_IFALIAS = 20
+IFLA_NUM_VF = 21
+IFLA_VFINFO_LIST = 22
+IFLA_STATS64 = 23
+IFLA_AF_SPEC = 26
+IFLA_GROUP = 27
+IFLA_EXT_MASK = 29
+
+# IFLA_EXT_MASK bits, from linux/rtnetlink.h
+RTEXT_FILTER_VF = 1 << 0
+RTEXT_FILTER_BRVLAN = 1 << 1
+RTEXT_FILTER_BRVLAN_COMPRESSED = 1 << 2
+RTEXT_FILTER_SKIP_STATS = 1 << 3
+
+IFLA_INFO_KIND = 1
+IFLA_INFO_DATA = 2
+
+#
+# linux/if_addr.h
+#
+
+IFA_UNSPEC = 0
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+IFA_LABEL = 3
+IFA_BROADCAST = 4
+IFA_ANYCAST = 5
+IFA_CACHEINFO = 6
+IFA_MULTICAST = 7
+IFA_FLAGS = 8
+
+# ifa_flags
+IFA_F_SECONDARY = 0x01
+IFA_F_NODAD = 0x02
+IFA_F_OPTIMISTIC = 0x04
+IFA_F_DADFAILED = 0x08
+IFA_F_HOMEADDRESS = 0x10
+IFA_F_DEPRECATED = 0x20
+IFA_F_TENTATIVE = 0x40
+IFA_F_PERMANENT = 0x80
+IFA_F_MANAGETEMPADDR = 0x100
+IFA_F_NOPREFIXROUTE = 0x200
+
+#
+# linux/neighbour.h
+#
+
+NDA_UNSPEC = 0
+NDA_DST = 1
+NDA_LLADDR = 2
+NDA_CACHEINFO = 3
+NDA_PROBES = 4
+NDA_VLAN = 5
+NDA_PORT = 6
+NDA_VNI = 7
+NDA_IFINDEX = 8
+NDA_MASTER = 9
+
+# ndm_flags
+NTF_USE = 0x01
+NTF_SELF = 0x02
+NTF_MASTER = 0x04
+NTF_PROXY = 0x08
+NTF_EXT_LEARNED = 0x10
+NTF_OFFLOADED = 0x20
+NTF_ROUTER = 0x80
+
+# ndm_state
+NUD_INCOMPLETE = 0x01
+NUD_REACHABLE = 0x02
+NUD_STALE = 0x04
+NUD_DELAY = 0x08
+NUD_PROBE = 0x10
+NUD_FAILED = 0x20
+NUD_NOARP = 0x40
+NUD_PERMANENT = 0x80
+NUD_NONE = 0x00
+
+#
+# linux/if.h
+#
+
+# ifi_flags
+IFF_UP = 0x1
+IFF_BROADCAST = 0x2
+IFF_DEBUG = 0x4
+IFF_LOOPBACK = 0x8
+IFF_POINTOPOINT = 0x10
+IFF_NOTRAILERS = 0x20
+IFF_RUNNING = 0x40
+IFF_NOARP = 0x80
+IFF_PROMISC = 0x100
+IFF_ALLMULTI = 0x200
+IFF_MASTER = 0x400
+IFF_SLAVE = 0x800
+IFF_MULTICAST = 0x1000
+IFF_LOWER_UP = 0x10000
+
+# address family of bridge forwarding database entries
+AF_BRIDGE = 7
+
+
+class RtGenMessageHeader(object):
+    """ The rtgenmsg header, used by requests which only need a family.
+    """
+    _struct = Struct("B")
+
+    def __init__(self, family=socket.AF_UNSPEC):
+        """ Create an rtgenmsg header.
+
+            family - address family
+        """
+        self.family = family
+
+    def __len__(self):
+        """ Return the rtgenmsg length.
+        """
+        return self._struct.size
+
+    def get_binary(self):
+        """ Return a packed struct suitable for sending through a
+            netlink socket.
+        """
+        return self._struct.pack(self.family)
+
+
+class IfInfoMessage(object):
+    """ The ifinfomsg header of link messages.
+    """
+    _struct = Struct("BBHiII")
+
+    def __init__(self, family=socket.AF_UNSPEC, type_=0, index=0, flags=0,
+                       change=0, contents=None):
+        """ Create an ifinfomsg header.
+
+            family - address family
+
+            type_ - device type (ARPHRD_*)
+
+            index - interface index
+
+            flags - device flags (IFF_*)
+
+            change - mask of flags to change
+
+            contents - optional binary string to unpack the header from,
+                which may be longer than the header
+        """
+        self.family = family
+        self.pad = 0
+        self.type_ = type_
+        self.index = index
+        self.flags = flags
+        self.change = change
+        if (contents):
+            (self.family, self.pad, self.type_, self.index, self.flags,
+             self.change) = self._struct.unpack_from(contents)
+
+    def __len__(self):
+        """ Return the ifinfomsg length.
+        """
+        return self._struct.size
+
+    def get_binary(self):
+        """ Return a packed struct suitable for sending through a
+            netlink socket.
+        """
+        return self._struct.pack(self.family, self.pad, self.type_,
+                                 self.index, self.flags, self.change)
+
+
+class IfAddrMessage(object):
+    """ The ifaddrmsg header of address messages.
+    """
+    _struct = Struct("BBBBI")
+
+    def __init__(self, family=socket.AF_UNSPEC, prefixlen=0, flags=0,
+                       scope=0, index=0, contents=None):
+        """ Create an ifaddrmsg header.
+
+            family - address family
+
+            prefixlen - prefix length of the address
+
+            flags - address flags (IFA_F_*)
+
+            scope - address scope
+
+            index - interface index
+
+            contents - optional binary string to unpack the header from,
+                which may be longer than the header
+        """
+        self.family = family
+        self.prefixlen = prefixlen
+        self.flags = flags
+        self.scope = scope
+        self.index = index
+        if (contents):
+            (self.family, self.prefixlen, self.flags, self.scope,
+             self.index) = self._struct.unpack_from(contents)
+
+    def __len__(self):
+        """ Return the ifaddrmsg length.
+        """
+        return self._struct.size
+
+    def get_binary(self):
+        """ Return a packed struct suitable for sending through a
+            netlink socket.
+        """
+        return self._struct.pack(self.family, self.prefixlen, self.flags,
+                                 self.scope, self.index)
+
+
+class RtMessage(object):
+    """ The rtmsg header of route messages.
+    """
+    _struct = Struct("BBBBBBBBI")
+
+    def __init__(self, family=socket.AF_UNSPEC, dst_len=0, src_len=0,
+                       tos=0, table=RT_TABLE_UNSPEC, protocol=RTPROT_UNSPEC,
+                       scope=RT_SCOPE_UNIVERSE, type_=RTN_UNSPEC, flags=0,
+                       contents=None):
+        """ Create an rtmsg header.
+
+            family - address family
+
+            dst_len, src_len - prefix lengths of the destination and source
+
+            tos - type of service
+
+            table - routing table id (RT_TABLE_COMPAT for ids above 255,
+                see RTA_TABLE)
+
+            protocol - routing protocol (RTPROT_*)
+
+            scope - route scope (RT_SCOPE_*)
+
+            type_ - route type (RTN_*)
+
+            flags - route flags (RTM_F_*)
+
+            contents - optional binary string to unpack the header from,
+                which may be longer than the header
+        """
+        self.family = family
+        self.dst_len = dst_len
+        self.src_len = src_len
+        self.tos = tos
+        self.table = table
+        self.protocol = protocol
+        self.scope = scope
+        self.type_ = type_
+        self.flags = flags
+        if (contents):
+            (self.family, self.dst_len, self.src_len, self.tos, self.table,
+             self.protocol, self.scope, self.type_,
+             self.flags) = self._struct.unpack_from(contents)
+
+    def __len__(self):
+        """ Return the rtmsg length.
+        """
+        return self._struct.size
+
+    def get_binary(self):
+        """ Return a packed struct suitable for sending through a
+            netlink socket.
+        """
+        return self._struct.pack(self.family, self.dst_len, self.src_len,
+                                 self.tos, self.table, self.protocol,
+                                 self.scope, self.type_, self.flags)
+
+
+class NdMessage(object):
+    """ The ndmsg header of neighbour messages.
+    """
+    _struct = Struct("BxxxiHBB")
+
+    def __init__(self, family=socket.AF_UNSPEC, ifindex=0, state=0, flags=0,
+                       type_=0, contents=None):
+        """ Create an ndmsg header.
+
+            family - address family (AF_BRIDGE for forwarding database
+                entries)
+
+            ifindex - interface index
+
+            state - neighbour state (NUD_*)
+
+            flags - neighbour flags (NTF_*)
+
+            type_ - neighbour type (RTN_*)
+
+            contents - optional binary string to unpack the header from,
+                which may be longer than the header
+        """
+        self.family = family
+        self.ifindex = ifindex
+        self.state = state
+        self.flags = flags
+        self.type_ = type_
+        if (contents):
+            (self.family, self.ifindex, self.state, self.flags,
+             self.type_) = self._struct.unpack_from(contents)
+
+    def __len__(self):
+        """ Return the ndmsg length.
+        """
+        return self._struct.size
+
+    def get_binary(self):
+        """ Return a packed struct suitable for sending through a
+            netlink socket.
+        """
+        return self._struct.pack(self.family, self.ifindex, self.state,
+                                 self.flags, self.type_)
+
+
+def _request(type_, flags, header, attrs, seq):
+    """ Return a request Message with an extra header and attributes.
+    """
+    msg = Message()
+    msg.set_type(type_)
+    msg.set_flags(NLM_F_REQUEST | flags)
+    msg.set_seq(seq)
+    msg.put_extra_header(header)
+    payload = msg.get_payload()
+    for attr in attrs:
+        payload.add_attr(attr)
+    return msg
+
+
+def route_dump_request(family=socket.AF_UNSPEC, table=None, oif=None,
+                       protocol=None, type_=None, seq=0):
+    """ Return an RTM_GETROUTE dump request.
+
+        family - address family (AF_INET, AF_INET6, or AF_UNSPEC for all)
+
+        table - only dump routes in this routing table
+
+        oif - only dump routes through this output interface index
+
+        protocol - only dump routes installed by this protocol (RTPROT_*)
+
+        type_ - only dump routes of this type (RTN_*)
+
+        seq - sequence number of the request
+
+        The filters are only applied by the kernel on a socket with
+        strict checking turned on (see Socket.set_strict_check()),
+        otherwise every route of the family is returned.
+    """
+    header = RtMessage(family)
+    attrs = []
+    if (table is not None):
+        if (table < 256):
+            header.table = table
+        attrs.append(Attr.new_u32(RTA_TABLE, table))
+    if (oif is not None):
+        attrs.append(Attr.new_u32(RTA_OIF, oif))
+    if (protocol is not None):
+        header.protocol = protocol
+    if (type_ is not None):
+        header.type_ = type_
+    return _request(RTM_GETROUTE, NLM_F_DUMP, header, attrs, seq)
+
+
+def _ext_mask(ext_mask, skip_stats):
+    """ Return the IFLA_EXT_MASK attributes for a link request.
+    """
+    if (skip_stats):
+        ext_mask = (ext_mask or 0) | RTEXT_FILTER_SKIP_STATS
+    if (ext_mask is None):
+        return []
+    return [Attr.new_u32(IFLA_EXT_MASK, ext_mask)]
+
+
+def link_dump_request(master=None, kind=None, ext_mask=None,
+                      skip_stats=False, seq=0):
+    """ Return an RTM_GETLINK dump request.
+
+        master - only dump links enslaved to this interface index (e.g.
+            the ports of a bridge or the members of a VRF)
+
+        kind - only dump links of this kind (e.g. b'vlan')
+
+        ext_mask - RTEXT_FILTER_* bits asking for extra information
+            (e.g. RTEXT_FILTER_VF for per-VF info) or, with
+            RTEXT_FILTER_SKIP_STATS, for less
+
+        skip_stats - if True, add RTEXT_FILTER_SKIP_STATS to ext_mask so
+            the kernel leaves the per-VF and per-address-family (e.g.
+            IPv6) statistics out of each link
+
+        seq - sequence number of the request
+
+        The master and kind filters are only applied by the kernel on a
+        socket with strict checking turned on (see
+        Socket.set_strict_check()), ext_mask is always applied.  Use
+        link_get_request() to get one link by index.
+    """
+    attrs = _ext_mask(ext_mask, skip_stats)
+    if (master is not None):
+        attrs.append(Attr.new_u32(IFLA_MASTER, master))
+    if (kind is not None):
+        linkinfo = Attr(type=IFLA_LINKINFO,
+                        value=Attr.new_str(IFLA_INFO_KIND, kind).get_binary())
+        linkinfo.toggle_nested()
+        attrs.append(linkinfo)
+    return _request(RTM_GETLINK, NLM_F_DUMP, IfInfoMessage(), attrs, seq)
+
+
+def link_get_request(ifindex=0, ifname=None, ext_mask=None,
+                     skip_stats=False, seq=0):
+    """ Return an RTM_GETLINK request for one link.
+
+        ifindex - interface index
+
+        ifname - interface name, used when ifindex is zero
+
+        ext_mask, skip_stats - see link_dump_request()
+
+        seq - sequence number of the request
+
+        The request asks for an acknowledgement, so the reply is followed
+        by an NLMSG_ERROR message which ends the request.
+    """
+    attrs = _ext_mask(ext_mask, skip_stats)
+    if (ifname is not None):
+        attrs.append(Attr.new_strz(IFLA_IFNAME, ifname))
+    return _request(RTM_GETLINK, NLM_F_ACK, IfInfoMessage(index=ifindex),
+                    attrs, seq)
+
+
+def addr_dump_request(family=socket.AF_UNSPEC, ifindex=0, seq=0):
+    """ Return an RTM_GETADDR dump request.
+
+        family - address family (AF_INET, AF_INET6, or AF_UNSPEC for all)
+
+        ifindex - only dump addresses of this interface index
+
+        seq - sequence number of the request
+
+        The ifindex filter is only applied by the kernel on a socket with
+        strict checking turned on (see Socket.set_strict_check()).
+    """
+    return _request(RTM_GETADDR, NLM_F_DUMP,
+                    IfAddrMessage(family, index=ifindex), [], seq)
+
+
+
+def neigh_dump_request(family=socket.AF_UNSPEC, ifindex=0, master=None,
+                       seq=0):
+    """ Return an RTM_GETNEIGH dump request.
+
+        family - address family (AF_INET, AF_INET6, AF_BRIDGE for the
+            bridge forwarding database, or AF_UNSPEC for all)
+
+        ifindex - only dump neighbours of this interface index
+
+        master - only dump neighbours of links enslaved to this interface
+            index (e.g. the ports of a bridge)
+
+        seq - sequence number of the request
+
+        The filters are only applied by the kernel on a socket with
+        strict checking turned on (see Socket.set_strict_check()).
+    """
+    attrs = []
+    if (ifindex):
+        attrs.append(Attr.new_u32(NDA_IFINDEX, ifindex))
+    if (master is not None):
+        attrs.append(Attr.new_u32(NDA_MASTER, master))
+    return _request(RTM_GETNEIGH, NLM_F_DUMP, NdMessage(family), attrs, seq)
+
+# nla_len and nla_type at the start of each attribute
+_attr_header = Struct("HH")
+
+# nla_type without NLA_F_NESTED and NLA_F_NET_BYTEORDER
+_ATTR_TYPE_MASK = 0x3fff
+
+_u8 = Struct("B")
+_u16 = Struct("H")
+_u32 = Struct("I")
+_be16 = Struct(">H")
+
+
+def _native_name(name):
+    """ Return an interface name as a native string.
+    """
+    if ((sys.version_info[0] > 2) and isinstance(name, bytes)):
+        return name.decode('utf-8', 'surrogateescape')
+    return name
+
+
+def _payload_location(msg):
+    """ Return a (buffer, start, end) tuple locating the payload of a
+        message, in the receive buffer for a LazyMessage.
+    """
+    location = None
+    if (hasattr(msg, 'get_buffer')):
+        location = msg.get_buffer()
+    if (location is None):
+        buffer = msg.get_payload().get_binary()
+        return (buffer, 0, len(buffer))
+    (buffer, start, end) = location
+    return (buffer, start + MSG_HDRLEN, end)
+
+
+def _scan_attrs(buffer, offset, end):
+    """ Return a dict of attribute type to the (start, end) of its data,
+        for the first attribute of each type between offset and end.
+    """
+    index = {}
+    while (offset + _attr_header.size <= end):
+        (length, type_) = _attr_header.unpack_from(buffer, offset)
+        if ((length < _attr_header.size) or (offset + length > end)):
+            break
+        type_ = type_ & _ATTR_TYPE_MASK
+        if (type_ not in index):
+            index[type_] = (offset + _attr_header.size, offset + length)
+        offset += (length + 3) & ~3
+    return index
+
+
+def _decode_u8(data):
+    """ Return an unsigned 8 bit value.
+    """
+    return _u8.unpack_from(data)[0]
+
+
+def _decode_u16(data):
+    """ Return an unsigned 16 bit value.
+    """
+    return _u16.unpack_from(data)[0]
+
+
+def _decode_u32(data):
+    """ Return an unsigned 32 bit value.
+    """
+    return _u32.unpack_from(data)[0]
+
+
+def _decode_be16(data):
+    """ Return an unsigned 16 bit value in network byte order.
+    """
+    return _be16.unpack_from(data)[0]
+
+
+def _decode_str(data):
+    """ Return a NUL terminated string as a native string.
+    """
+    return _native_name(data.split(b'\x00', 1)[0])
+
+
+def _decode_ip(data):
+    """ Return an IPv4 or IPv6 address as a string.
+    """
+    if (len(data) == 4):
+        return socket.inet_ntop(socket.AF_INET, data)
+    if (len(data) == 16):
+        return socket.inet_ntop(socket.AF_INET6, data)
+    return None
+
+
+def _decode_lladdr(data):
+    """ Return a link layer address as colon separated hex bytes.
+    """
+    return ":".join(["%02x" % byte for byte in bytearray(data)])
+
+
+def _decode_metrics(data):
+    """ Return a dict of RTAX_* to value from RTA_METRICS.
+    """
+    metrics = {}
+    for (type_, (start, end)) in _scan_attrs(data, 0, len(data)).items():
+        if (end - start >= _u32.size):
+            metrics[type_] = _u32.unpack_from(data, start)[0]
+    return metrics
+
+
+def _decode_kind(data):
+    """ Return the IFLA_INFO_KIND in IFLA_LINKINFO.
+    """
+    kind = _scan_attrs(data, 0, len(data)).get(IFLA_INFO_KIND)
+    if (kind is None):
+        return None
+    return _decode_str(data[kind[0]:kind[1]])
+
+
+class _attr_property(object):
+    """ A read-only property decoding one attribute on first use.
+
+        The value is saved in the instance, which hides this (non-data)
+        descriptor, so later reads are plain attribute lookups.
+    """
+    def __init__(self, name, type_, decode, doc=None, fallback=None):
+        """ Create an attribute property.
+
+            name - attribute name of the property in its class
+
+            type_ - netlink attribute type
+
+            decode - callable(binary string) returning the value
+
+            doc - property docstring
+
+            fallback - optional name of an instance attribute used when
+                the message has no attribute of type_, otherwise None
+        """
+        self._name = name
+        self._type = type_
+        self._decode = decode
+        self._fallback = fallback
+        self.__doc__ = doc
+
+    def __get__(self, obj, objtype=None):
+        if (obj is None):
+            return self
+        data = obj.get_attr(self._type)
+        if (data is not None):
+            value = self._decode(data)
+        elif (self._fallback is not None):
+            value = getattr(obj, self._fallback)
+        else:
+            value = None
+        obj.__dict__[self._name] = value
+        return value
+
+
+class RtnlObject(object):
+    """ Base class of the typed rtnetlink messages.
+
+        The fixed header is unpacked when the object is created.  The
+        attributes are only located, and each one only decoded, when one
+        of its properties is first read; the result is kept.  A property
+        is None when the message does not carry the attribute.
+
+        The attributes are read from the receive buffer when the object
+        is made from a LazyMessage, without building its Payload.
+    """
+    # header class, with a precompiled _struct
+    _header = None
+
+    def __init__(self, msg):
+        """ Decode the fixed header of a message.
+
+            msg - Message or LazyMessage, e.g. from Socket.recv()
+        """
+        (buffer, start, end) = _payload_location(msg)
+        self.msg_type = msg.get_type()
+        self._buffer = buffer
+        self._start = start
+        self._end = end
+        self._attrs = None
+        self._unpack(self._header._struct.unpack_from(buffer, start))
+
+    def _unpack(self, values):
+        """ Save the header fields, see the subclasses.
+        """
+        raise NotImplementedError
+
+    def get_attr(self, type_):
+        """ Return the data of the first attribute of a type, as a binary
+            string, or None if the message has no such attribute.
+        """
+        if (self._attrs is None):
+            self._attrs = _scan_attrs(self._buffer,
+                                      self._start + self._header._struct.size,
+                                      self._end)
+        location = self._attrs.get(type_)
+        if (location is None):
+            return None
+        return bytes(self._buffer[location[0]:location[1]])
+
+    def get_attr_types(self):
+        """ Return a sorted list of the attribute types in the message.
+        """
+        self.get_attr(0)
+        return sorted(self._attrs)
+
+
+class Link(RtnlObject):
+    """ A link (RTM_NEWLINK, RTM_DELLINK) message.
+
+        Header fields: family, type_, index, flags, change.
+    """
+    _header = IfInfoMessage
+
+    def _unpack(self, values):
+        (self.family, pad, self.type_, self.index, self.flags,
+         self.change) = values
+
+    ifname = _attr_property('ifname', IFLA_IFNAME, _decode_str,
+                            "Interface name.")
+    mtu = _attr_property('mtu', IFLA_MTU, _decode_u32, "MTU.")
+    address = _attr_property('address', IFLA_ADDRESS, _decode_lladdr,
+                             "Link layer address, e.g. 'aa:bb:cc:dd:ee:ff'.")
+    broadcast = _attr_property('broadcast', IFLA_BROADCAST, _decode_lladdr,
+                               "Link layer broadcast address.")
+    link = _attr_property('link', IFLA_LINK, _decode_u32,
+                          "Index of the underlying link.")
+    master = _attr_property('master', IFLA_MASTER, _decode_u32,
+                            "Index of the master (e.g. bridge) link.")
+    txqlen = _attr_property('txqlen', IFLA_TXQLEN, _decode_u32,
+                            "Transmit queue length.")
+    operstate = _attr_property('operstate', IFLA_OPERSTATE, _decode_u8,
+                               "Operational state (RFC 2863).")
+    qdisc = _attr_property('qdisc', IFLA_QDISC, _decode_str,
+                           "Name of the root queueing discipline.")
+    ifalias = _attr_property('ifalias', IFLA_IFALIAS, _decode_str,
+                             "Interface alias.")
+    group = _attr_property('group', IFLA_GROUP, _decode_u32,
+                           "Interface group.")
+    kind = _attr_property('kind', IFLA_LINKINFO, _decode_kind,
+                          "Link kind from IFLA_LINKINFO, e.g. 'vlan'.")
+
+    def is_up(self):
+        """ Return True if the link is administratively up.
+        """
+        return bool(self.flags & IFF_UP)
+
+    def is_running(self):
+        """ Return True if the link is up and has a carrier.
+        """
+        return bool(self.flags & IFF_RUNNING)
+
+
+class Addr(RtnlObject):
+    """ An address (RTM_NEWADDR, RTM_DELADDR) message.
+
+        Header fields: family, prefixlen, scope, index.  flags is the
+        32 bit IFA_FLAGS when present, otherwise the header flags.
+    """
+    _header = IfAddrMessage
+
+    def _unpack(self, values):
+        (self.family, self.prefixlen, self._ifa_flags, self.scope,
+         self.index) = values
+
+    address = _attr_property('address', IFA_ADDRESS, _decode_ip,
+                             "Address (the peer on point to point links).")
+    local = _attr_property('local', IFA_LOCAL, _decode_ip, "Local address.")
+    label = _attr_property('label', IFA_LABEL, _decode_str,
+                           "Address label, e.g. 'eth0:1'.")
+    broadcast = _attr_property('broadcast', IFA_BROADCAST, _decode_ip,
+                               "Broadcast address.")
+    flags = _attr_property('flags', IFA_FLAGS, _decode_u32,
+                           "Address flags (IFA_F_*).", '_ifa_flags')
+
+
+class Route(RtnlObject):
+    """ A route (RTM_NEWROUTE, RTM_DELROUTE) message.
+
+        Header fields: family, dst_len, src_len, tos, protocol, scope,
+        type_, flags.  table is RTA_TABLE when present (it holds ids
+        above 255), otherwise the header table.
+    """
+    _header = RtMessage
+
+    def _unpack(self, values):
+        (self.family, self.dst_len, self.src_len, self.tos, self._rtm_table,
+         self.protocol, self.scope, self.type_, self.flags) = values
+
+    table = _attr_property('table', RTA_TABLE, _decode_u32,
+                           "Routing table id.", '_rtm_table')
+    dst = _attr_property('dst', RTA_DST, _decode_ip, "Destination prefix.")
+    src = _attr_property('src', RTA_SRC, _decode_ip, "Source prefix.")
+    gateway = _attr_property('gateway', RTA_GATEWAY, _decode_ip, "Gateway.")
+    prefsrc = _attr_property('prefsrc', RTA_PREFSRC, _decode_ip,
+                             "Preferred source address.")
+    oif = _attr_property('oif', RTA_OIF, _decode_u32,
+                         "Output interface index.")
+    iif = _attr_property('iif', RTA_IIF, _decode_u32,
+                         "Input interface index.")
+    priority = _attr_property('priority', RTA_PRIORITY, _decode_u32,
+                              "Route priority (metric).")
+    mark = _attr_property('mark', RTA_MARK, _decode_u32, "Firewall mark.")
+    flow = _attr_property('flow', RTA_FLOW, _decode_u32, "Realm.")
+    metrics = _attr_property('metrics', RTA_METRICS, _decode_metrics,
+                             "Dict of RTAX_* to value.")
+
+
+class Neigh(RtnlObject):
+    """ A neighbour (RTM_NEWNEIGH, RTM_DELNEIGH) message, an ARP or NDP
+        entry, or a bridge forwarding database entry (family AF_BRIDGE).
+
+        Header fields: family, ifindex, state, flags, type_.
+    """
+    _header = NdMessage
+
+    def _unpack(self, values):
+        (self.family, self.ifindex, self.state, self.flags,
+         self.type_) = values
+
+    dst = _attr_property('dst', NDA_DST, _decode_ip, "Network address.")
+    lladdr = _attr_property('lladdr', NDA_LLADDR, _decode_lladdr,
+                            "Link layer address.")
+    probes = _attr_property('probes', NDA_PROBES, _decode_u32,
+                            "Number of probes sent.")
+    vlan = _attr_property('vlan', NDA_VLAN, _decode_u16,
+                          "VLAN id of a forwarding database entry.")
+    port = _attr_property('port', NDA_PORT, _decode_be16,
+                          "UDP port of a VXLAN forwarding database entry.")
+    vni = _attr_property('vni', NDA_VNI, _decode_u32,
+                         "VXLAN network identifier.")
+    master = _attr_property('master', NDA_MASTER, _decode_u32,
+                            "Index of the master (e.g. bridge) link.")
+
+
+# typed message class of each rtnetlink message type
+_classes = {RTM_NEWLINK: Link, RTM_DELLINK: Link,
+            RTM_NEWADDR: Addr, RTM_DELADDR: Addr,
+            RTM_NEWROUTE: Route, RTM_DELROUTE: Route,
+            RTM_NEWNEIGH: Neigh, RTM_DELNEIGH: Neigh}
+
+
+def decode_message(msg):
+    """ Return the typed message (Link, Addr, Route or Neigh) for a
+        Message, or None for other message types.
+    """
+    cls = _classes.get(msg.get_type())
+    if (cls is None):
+        return None
+    return cls(msg)
+
+
+class _RtnlMirror(object):
+    """ Base class of the tables loaded from an rtnetlink dump and kept up
+        to date by events.
+
+        Subclasses set _groups, and implement _clear(), _dump_requests()
+        and update().
+    """
+    # multicast groups of the events
+    _groups = 0
+
+    def __init__(self, subscribe=True):
+        """ Create the table and load it with a dump.
+
+            subscribe - if True, open a socket listening to events for
+                refresh().  Otherwise, the table is only changed by
+                update() and load().
+        """
+        self._events = None
+        self._clear()
+        if (subscribe):
+            # listen before dumping so no change is missed in between
+            self._events = Socket(NETLINK_ROUTE)
+            self._events.bind(groups=self._groups)
+        self.load()
+
+    def close(self):
+        """ Close the event socket.
+        """
+        if (self._events is not None):
+            self._events.close()
+            self._events = None
+
+    def _clear(self):
+        """ Empty the table.
+        """
+        raise NotImplementedError
+
+    def _dump_requests(self):
+        """ Return the list of dump requests which load the table, with
+            consecutive sequence numbers from 1.
+        """
+        raise NotImplementedError
+
+    def load(self):
+        """ Replace the contents of the table with a fresh dump.
+        """
+        self._clear()
+        sock = Socket(NETLINK_ROUTE)
+        try:
+            sock.bind()
+            for request in self._dump_requests():
+                sock.send(request)
+                runner = CallbackRunner(seq=request.get_seq(),
+                                        portid=sock.get_portid(),
+                                        default=self.update)
+                if (runner.run_socket(sock) == CB_ERROR):
+                    raise socket.error(runner.get_errno(),
+                                       runner.get_errstr())
+        finally:
+            sock.close()
+
+    def refresh(self):
+        """ Apply the events queued on the event socket, without waiting
+            for more.
+
+            If the kernel dropped events because the socket queue was
+            full, the table is reloaded.
+
+            Returns the number of events applied.
+        """
+        if (self._events is None):
+            return 0
+        count = 0
+        while (True):
+            try:
+                messages = self._events.recv(SOCKET_BUFFER_SIZE,
+                                             socket.MSG_DONTWAIT, lazy=True)
+            except socket.error as error:
+                if (error.errno == errno.ENOBUFS):
+                    self.load()
+                    continue
+                if (error.errno in (errno.EAGAIN, errno.EWOULDBLOCK)):
+                    return count
+                raise
+            for msg in messages:
+                self.update(msg)
+                count += 1
+
+
+class LinkNameCache(_RtnlMirror):
+    """ A map between interface names and indexes.
+
+        The cache is loaded with an RTM_GETLINK dump and kept up to date
+        by the RTM_NEWLINK and RTM_DELLINK events of the RTMGRP_LINK
+        group, so looking up a name (or an index) is a dict lookup instead
+        of an if_nametoindex() system call.  A link which is renamed
+        keeps its index and loses its old name.
+
+        The cache only changes when events are applied: either call
+        refresh() now and then (e.g. once per batch of work), which
+        applies the events queued on the cache's own socket without
+        blocking, or pass events received elsewhere to update().  A name
+        which is not found triggers one refresh() before giving up, so
+        new links are found without waiting for the next refresh.
+
+        Pass subscribe=False to skip the event socket; the cache is then
+        only changed by update() and load().
+    """
+    _groups = RTMGRP_LINK
+
+    def _clear(self):
+        """ Empty the cache.
+        """
+        self._by_name = {}
+        self._by_index = {}
+
+    def _dump_requests(self):
+        """ Return the link dump request.
+        """
+        return [link_dump_request(skip_stats=True, seq=1)]
+
+    def update(self, msg):
+        """ Apply an RTM_NEWLINK or RTM_DELLINK message, from a dump or an
+            event.  Other messages are ignored.
+        """
+        msg_type = msg.get_type()
+        if ((msg_type != RTM_NEWLINK) and (msg_type != RTM_DELLINK)):
+            return
+        link = Link(msg)
+        index = link.index
+        name = link.ifname
+        old_name = self._by_index.get(index)
+        if ((old_name is not None) and
+                (self._by_name.get(old_name) == index)):
+            del self._by_name[old_name]
+        if (msg_type == RTM_DELLINK):
+            self._by_index.pop(index, None)
+            return
+        if (name is None):
+            # keep the name we had, if any
+            name = old_name
+            if (name is None):
+                return
+        self._by_index[index] = name
+        self._by_name[name] = index
+
+    def __len__(self):
+        """ Return the number of links.
+        """
+        return len(self._by_index)
+
+    def __contains__(self, name):
+        """ Return True if a link has this name.
+        """
+        return (_native_name(name) in self._by_name)
+
+    def get_index(self, name, default=0):
+        """ Return the index of an interface name, or default if there is
+            no such link (0, like if_nametoindex()).
+
+            name - interface name, as a string or bytes
+        """
+        name = _native_name(name)
+        index = self._by_name.get(name)
+        if (index is None):
+            if (not self.refresh()):
+                return default
+            index = self._by_name.get(name, default)
+        return index
+
+    def get_name(self, index, default=None):
+        """ Return the name of an interface index, or default if there is
+            no such link.
+        """
+        name = self._by_index.get(index)
+        if (name is None):
+            if (not self.refresh()):
+                return default
+            name = self._by_index.get(index, default)
+        return name
+
+    def resolve(self, names):
+        """ Return an array('i') with the index of each name, 0 for names
+            which are not links.
+
+            names - iterable of interface names
+
+            Events are applied at most once for the whole batch, when the
+            first unknown name is met.
+        """
+        by_name = self._by_name
+        names = [_native_name(name) for name in names]
+        indexes = array('i', [by_name.get(name, 0) for name in names])
+        if ((0 in indexes) and self.refresh()):
+            by_name = self._by_name
+            indexes = array('i', [by_name.get(name, 0) for name in names])
+        return indexes
+
+    def get_names(self):
+        """ Return a dict of interface names to indexes.
+        """
+        return dict(self._by_name)
+
+
+# one address in an AddrMirror
+AddrEntry = namedtuple('AddrEntry', 'index family address prefixlen scope '
+                                    'flags label peer')
+
+
+def _canonical_address(address):
+    """ Return the inet_ntop() form of an IPv4 or IPv6 address string,
+        or None if it is not an address.
+    """
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            return socket.inet_ntop(family, socket.inet_pton(family, address))
+        except (socket.error, ValueError):
+            pass
+    return None
+
+
+class AddrMirror(_RtnlMirror):
+    """ A copy of the kernel's IPv4 and IPv6 address table.
+
+        The mirror is loaded with an RTM_GETADDR dump and kept up to date
+        by the RTM_NEWADDR and RTM_DELADDR events of the
+        RTMGRP_IPV4_IFADDR and RTMGRP_IPV6_IFADDR groups, see
+        LinkNameCache for when events are applied.  Each address is an
+        AddrEntry, indexed by interface index and by address, so every
+        query is a dict lookup.
+
+        The address of an entry is the local address (IFA_LOCAL, or
+        IFA_ADDRESS when there is none, as for IPv6).  peer is the other
+        end of a point to point link, or None.  Addresses are strings in
+        inet_ntop() form.
+    """
+    _groups = RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR
+
+    def _clear(self):
+        """ Empty the mirror.
+        """
+        # (index, family, address, prefixlen, peer) to entry
+        self._entries = {}
+        # index to {key: entry}
+        self._by_index = {}
+        # address to {key: entry}
+        self._by_address = {}
+
+    def _dump_requests(self):
+        """ Return the address dump request.
+        """
+        return [addr_dump_request(seq=1)]
+
+    def update(self, msg):
+        """ Apply an RTM_NEWADDR or RTM_DELADDR message, from a dump or an
+            event.  Other messages are ignored.
+        """
+        msg_type = msg.get_type()
+        if ((msg_type != RTM_NEWADDR) and (msg_type != RTM_DELADDR)):
+            return
+        addr = Addr(msg)
+        local = addr.local
+        peer = None
+        if (local is None):
+            local = addr.address
+        elif (addr.address != local):
+            peer = addr.address
+        if (local is None):
+            return
+        key = (addr.index, addr.family, local, addr.prefixlen, peer)
+        old = self._entries.pop(key, None)
+        if (old is not None):
+            self._unlink(self._by_index, addr.index, key)
+            self._unlink(self._by_address, local, key)
+        if (msg_type == RTM_DELADDR):
+            return
+        entry = AddrEntry(addr.index, addr.family, local, addr.prefixlen,
+                          addr.scope, addr.flags, addr.label, peer)
+        self._entries[key] = entry
+        self._by_index.setdefault(addr.index, {})[key] = entry
+        self._by_address.setdefault(local, {})[key] = entry
+
+    def _unlink(self, index, value, key):
+        """ Remove key from the entries of value in an index.
+        """
+        entries = index.get(value)
+        if (entries is not None):
+            entries.pop(key, None)
+            if (not entries):
+                del index[value]
+
+    def _address_entries(self, address):
+        """ Return the {key: entry} dict of an address, or None.
+        """
+        entries = self._by_address.get(address)
+        if (entries is None):
+            # not in inet_ntop() form, e.g. '2001:DB8::1'
+            canonical = _canonical_address(address)
+            if ((canonical is not None) and (canonical != address)):
+                entries = self._by_address.get(canonical)
+        return entries
+
+    def __len__(self):
+        """ Return the number of addresses.
+        """
+        return len(self._entries)
+
+    def __iter__(self):
+        """ Return an iterator over all the entries.
+        """
+        return iter(list(self._entries.values()))
+
+    def get_by_index(self, index, family=None):
+        """ Return the list of entries of an interface index.
+
+            family - optional address family to select
+        """
+        entries = self._by_index.get(index)
+        if (entries is None):
+            return []
+        if (family is None):
+            return list(entries.values())
+        return [entry for entry in entries.values()
+                    if (entry.family == family)]
+
+    def get_by_address(self, address):
+        """ Return the list of entries with a local address.  Link-local
+            IPv6 addresses may be on several links.
+        """
+        entries = self._address_entries(address)
+        if (entries is None):
+            return []
+        return list(entries.values())
+
+    def get_owner(self, address, default=0):
+        """ Return the index of the interface which owns a local address,
+            or default if no interface has it.  If several do, the lowest
+            index is returned.
+        """
+        entries = self._address_entries(address)
+        if (not entries):
+            return default
+        return min([entry.index for entry in entries.values()])
+
+    def is_local(self, address):
+        """ Return True if an interface has the address.
+        """
+        return bool(self._address_entries(address))
+
+
+# one neighbour in a NeighTable
+NeighEntry = namedtuple('NeighEntry', 'family ifindex state flags type_ dst '
+                                      'lladdr vlan port vni master')
+
+# family, vlan and ifindex at the start of a NeighTable key
+_neigh_key = Struct("=BHi")
+
+_u64be = Struct(">Q")
+
+
+def _pack_ip(address):
+    """ Return an IPv4 or IPv6 address string in packed form, or None if
+        it is not an address.
+    """
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            return socket.inet_pton(family, address)
+        except (socket.error, ValueError):
+            pass
+    return None
+
+
+def _pack_lladdr(lladdr):
+    """ Return a colon separated link layer address in packed form.
+    """
+    return bytes(bytearray([int(byte, 16) for byte in lladdr.split(":")]))
+
+
+class NeighTable(_RtnlMirror):
+    """ A copy of the kernel's neighbour tables: ARP (AF_INET), NDP
+        (AF_INET6), and the bridge forwarding database (AF_BRIDGE).
+
+        The table is loaded with one RTM_GETNEIGH dump per family and kept
+        up to date by the RTM_NEWNEIGH and RTM_DELNEIGH events of the
+        RTMGRP_NEIGH group, see LinkNameCache for when events are applied.
+        Messages are decoded straight from the receive buffer.
+
+        Entries are stored in columns of arrays rather than one object per
+        entry: link layer addresses as integers, network addresses packed
+        into 16 byte slots, and the header fields as small integers, about
+        50 bytes per entry plus a dict of packed keys to rows.  A
+        NeighEntry, with addresses as strings, is only made when an entry
+        is read.
+
+        An ARP or NDP entry is keyed by interface index and network
+        address.  A forwarding database entry is keyed by interface
+        index, VLAN, link layer address, and network address (the remote
+        VTEP of a VXLAN entry).  Link layer addresses longer than 8 bytes
+        are not kept.
+    """
+    _groups = RTMGRP_NEIGH
+
+    def __init__(self, families=(socket.AF_INET, socket.AF_INET6,
+                                 AF_BRIDGE), subscribe=True):
+        """ Create the table and load it with a dump.
+
+            families - address families to keep
+
+            subscribe - see LinkNameCache
+        """
+        self._families = tuple(families)
+        _RtnlMirror.__init__(self, subscribe)
+
+    def _clear(self):
+        """ Empty the table.
+        """
+        self._family = array('B')
+        self._ifindex = array('i')
+        self._state = array('H')
+        self._flags = array('B')
+        self._type = array('B')
+        self._lladdr = array('Q')
+        self._lladdr_len = array('B')
+        # 16 bytes per row, IPv4 addresses in the first 4
+        self._dst = bytearray()
+        self._dst_len = array('B')
+        self._vlan = array('H')
+        self._port = array('H')
+        self._vni = array('I')
+        self._master = array('I')
+        # key of each row, and key to row
+        self._keys = []
+        self._rows = {}
+
+    def _dump_requests(self):
+        """ Return a neighbour dump request for each family.
+        """
+        return [neigh_dump_request(family, seq=seq + 1)
+                    for (seq, family) in enumerate(self._families)]
+
+    def update(self, msg):
+        """ Apply an RTM_NEWNEIGH or RTM_DELNEIGH message, from a dump or an
+            event.  Other messages, and other families, are ignored.
+        """
+        msg_type = msg.get_type()
+        if ((msg_type != RTM_NEWNEIGH) and (msg_type != RTM_DELNEIGH)):
+            return
+        (buffer, start, end) = _payload_location(msg)
+        (family, ifindex, state, flags,
+         type_) = NdMessage._struct.unpack_from(buffer, start)
+        if (family not in self._families):
+            return
+        attrs = _scan_attrs(buffer, start + NdMessage._struct.size, end)
+        dst = b''
+        location = attrs.get(NDA_DST)
+        if (location is not None):
+            dst = bytes(buffer[location[0]:location[1]])
+        lladdr = b''
+        location = attrs.get(NDA_LLADDR)
+        if (location is not None):
+            lladdr = bytes(buffer[location[0]:location[1]])
+            if (len(lladdr) > 8):
+                lladdr = b''
+        vlan = self._attr_value(buffer, attrs, NDA_VLAN, _u16)
+        if (family == AF_BRIDGE):
+            key = _neigh_key.pack(family, vlan, ifindex) + lladdr + dst
+        else:
+            key = _neigh_key.pack(family, 0, ifindex) + dst
+        row = self._rows.get(key)
+        if (msg_type == RTM_DELNEIGH):
+            if (row is not None):
+                self._remove(row)
+            return
+        if (row is None):
+            row = len(self._keys)
+            self._keys.append(key)
+            self._rows[key] = row
+            self._append()
+        self._family[row] = family
+        self._ifindex[row] = ifindex
+        self._state[row] = state
+        self._flags[row] = flags
+        self._type[row] = type_
+        self._lladdr[row] = _u64be.unpack((b'\x00' * (8 - len(lladdr)) +
+                                           lladdr))[0]
+        self._lladdr_len[row] = len(lladdr)
+        dst = dst[:16]
+        self._dst[row * 16:row * 16 + len(dst)] = dst
+        self._dst_len[row] = len(dst)
+        self._vlan[row] = vlan
+        self._port[row] = self._attr_value(buffer, attrs, NDA_PORT, _be16)
+        self._vni[row] = self._attr_value(buffer, attrs, NDA_VNI, _u32)
+        self._master[row] = self._attr_value(buffer, attrs, NDA_MASTER, _u32)
+
+    def _attr_value(self, buffer, attrs, type_, struct):
+        """ Return the integer value of an attribute, or 0 if there is
+            none.
+        """
+        location = attrs.get(type_)
+        if ((location is None) or
+                (location[1] - location[0] < struct.size)):
+            return 0
+        return struct.unpack_from(buffer, location[0])[0]
+
+    def _columns(self):
+        """ Return the list of arrays holding one item per row.
+        """
+        return [self._family, self._ifindex, self._state, self._flags,
+                self._type, self._lladdr, self._lladdr_len, self._dst_len,
+                self._vlan, self._port, self._vni, self._master]
+
+    def _append(self):
+        """ Add an empty row at the end of the table.
+        """
+        for column in self._columns():
+            column.append(0)
+        self._dst.extend(b'\x00' * 16)
+
+    def _remove(self, row):
+        """ Remove a row, moving the last row into its place.
+        """
+        last = len(self._keys) - 1
+        key = self._keys[row]
+        del self._rows[key]
+        if (row != last):
+            moved = self._keys[last]
+            self._keys[row] = moved
+            self._rows[moved] = row
+            for column in self._columns():
+                column[row] = column[last]
+            self._dst[row * 16:row * 16 + 16] = \
+                self._dst[last * 16:last * 16 + 16]
+        self._keys.pop()
+        for column in self._columns():
+            column.pop()
+        del self._dst[last * 16:]
+
+    def _entry(self, row):
+        """ Return the NeighEntry of a row.
+        """
+        dst = None
+        dst_len = self._dst_len[row]
+        if (dst_len):
+            dst = _decode_ip(bytes(self._dst[row * 16:row * 16 + dst_len]))
+        lladdr = None
+        lladdr_len = self._lladdr_len[row]
+        if (lladdr_len):
+            lladdr = _decode_lladdr(
+                _u64be.pack(self._lladdr[row])[8 - lladdr_len:])
+        return NeighEntry(self._family[row], self._ifindex[row],
+                          self._state[row], self._flags[row],
+                          self._type[row], dst, lladdr, self._vlan[row],
+                          self._port[row], self._vni[row], self._master[row])
+
+    def _lookup(self, key):
+        """ Return the NeighEntry of a key, or None.
+        """
+        row = self._rows.get(key)
+        if (row is None):
+            return None
+        return self._entry(row)
+
+    def __len__(self):
+        """ Return the number of entries.
+        """
+        return len(self._keys)
+
+    def __iter__(self):
+        """ Return an iterator over all the entries.
+        """
+        return iter([self._entry(row) for row in range(len(self._keys))])
+
+    def lookup(self, ifindex, dst):
+        """ Return the ARP or NDP entry of a network address on an
+            interface, or None.
+
+            dst - IPv4 or IPv6 address string
+        """
+        packed = _pack_ip(dst)
+        if (packed is None):
+            return None
+        if (len(packed) == 4):
+            family = socket.AF_INET
+        else:
+            family = socket.AF_INET6
+        return self._lookup(_neigh_key.pack(family, 0, ifindex) + packed)
+
+    def lookup_fdb(self, ifindex, lladdr, vlan=0, dst=None):
+        """ Return the forwarding database entry of a link layer address
+            on a bridge port or VXLAN device, or None.
+
+            lladdr - colon separated link layer address
+
+            vlan - VLAN id, 0 for none
+
+            dst - remote VTEP address string of a VXLAN entry
+        """
+        packed = b''
+        if (dst is not None):
+            packed = _pack_ip(dst)
+            if (packed is None):
+                return None
+        return self._lookup(_neigh_key.pack(AF_BRIDGE, vlan, ifindex) +
+                            _pack_lladdr(lladdr) + packed)
+
+    def get_by_ifindex(self, ifindex, family=None):
+        """ Return the list of entries of an interface index.
+
+            family - optional address family to select
+        """
+        return [self._entry(row)
+                    for (row, index) in enumerate(self._ifindex)
+                    if ((index == ifindex) and
+                        ((family is None) or
+                         (self._family[row] == family)))]
@@ -0,0 +1,154 @@
+#!/usr/bin/python
+# tests/ack.py -- test collecting acknowledgements of batched requests
+#
+# This file is part of the pymnl package, a Python interface
+# for netlink sockets.
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License
+#  as published by the Free Software Foundation; either version 2.1 of
+#  the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+#  USA
+#
+
+import errno
+from struct import pack
+import unittest
+
+import pymnl
+from pymnl.ack import *
+from pymnl.message import (Message, MessageList, Payload, NLMSG_ERROR,
+                           NLM_F_ACK, NLM_F_REQUEST)
+from pymnl.nlsocket import Socket
+from pymnl.rtnl import link_get_request
+
+
+class FakeKernelSocket(object):
+    """ A socket which acknowledges requests like the kernel does.
+
+        Requests with an odd first payload byte fail with EEXIST.
+    """
+    def __init__(self):
+        self.datagrams = []
+        self.acks = 0
+        self._queue = []
+
+    def send(self, data):
+        """ Queue one NLMSG_ERROR per failed or NLM_F_ACK request.
+        """
+        self.datagrams.append(data)
+        for msg in MessageList(data):
+            failed = bytearray(msg.get_payload().get_data())[0] & 1
+            if (failed or (msg.get_flags() & NLM_F_ACK)):
+                error = 0
+                if (failed):
+                    error = -errno.EEXIST
+                # packed by hand, for sequence numbers of 2^31 and up
+                request = msg.get_binary()[:16]
+                ack = pack("IHHIIi", 36, NLMSG_ERROR, 0,
+                           msg.get_seq() & 0xffffffff, 0, error) + request
+                # an unrelated event in between
+                event = Message()
+                event.set_type(16)
+                event.add_payload(Payload(b'\x00' * 16))
+                self._queue.append(event.get_binary() + ack)
+                self.acks += 1
+        return len(data)
+
+    def recv_into(self, buffer, nbytes=0, flags=0):
+        """ Copy the oldest queued datagram into buffer.
+        """
+        data = self._queue.pop(0)
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        pass
+
+
+def _request(value):
+    """ Return a request whose payload starts with value.
+    """
+    msg = Message()
+    msg.set_type(24)
+    msg.set_flags(NLM_F_REQUEST)
+    msg.add_payload(Payload(pack("I", value) + b'\x00' * 8))
+    return msg
+
+
+class TestAckCollector(unittest.TestCase):
+
+    def setUp(self):
+        """ Set up a Socket talking to a fake kernel.
+        """
+        self.sock = Socket(pymnl.NETLINK_ROUTE)
+        self.sock.get_sock().close()
+        self.kernel = FakeKernelSocket()
+        self.sock._socket = self.kernel
+        self.requests = [_request(value) for value in range(100)]
+
+    def test_all_acks(self):
+        """ Test collecting one acknowledgement per request.
+        """
+        collector = AckCollector(self.sock, seq=0xfffffff0, bufsize=512)
+        results = collector.run(self.requests)
+        self.assertEqual(list(results), [(value & 1) * errno.EEXIST
+                                            for value in range(100)])
+        self.assertEqual(self.kernel.acks, 100)
+        # 100 requests of 28 bytes, 18 per datagram
+        self.assertEqual(len(self.kernel.datagrams), 6)
+        # sequence numbers wrap around
+        self.assertEqual(collector.get_seq(), (0xfffffff0 + 100) & 0xffffffff)
+        # the callers' messages are not changed
+        self.assertEqual(self.requests[0].get_flags(), NLM_F_REQUEST)
+        self.assertEqual(self.requests[0].get_seq(), 0)
+
+    def test_failures_only(self):
+        """ Test requesting acknowledgements for failures only.
+        """
+        collector = AckCollector(self.sock, seq=1, failures_only=True,
+                                 bufsize=500)
+        results = collector.run([request.get_binary()
+                                    for request in self.requests])
+        self.assertEqual([index for (index, error) in enumerate(results)
+                            if error], list(range(1, 100, 2)))
+        # 17 requests per datagram, the last requests of the first,
+        # third, and fifth datagrams succeed and are acknowledged too
+        self.assertEqual(len(self.kernel.datagrams), 6)
+        self.assertEqual(self.kernel.acks, 53)
+
+    def test_kernel(self):
+        """ Test a batch of link requests against the kernel.
+        """
+        sock = Socket(pymnl.NETLINK_ROUTE)
+        sock.bind()
+        requests = [link_get_request(1), link_get_request(0x7ffffff0),
+                    link_get_request(1)]
+        for failures_only in (False, True):
+            results = AckCollector(sock,
+                                   failures_only=failures_only).run(requests)
+            self.assertEqual(list(results), [0, errno.ENODEV, 0])
+        sock.close()
+
+    def tearDown(self):
+        """ Clean up after each test.
+        """
+        self.sock.close()
+
+    @staticmethod
+    def load_tests(loader, tests, pattern):
+        """ Return tests from class.  Fake implementation of the load_tests
+            protocol from Michael Foord's discover.py.
+
+            loader, tests, and pattern do not do anything, yet
+        """
+        return unittest.TestLoader().loadTestsFromTestCase(TestAckCollector)
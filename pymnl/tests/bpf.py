@@ -0,0 +1,191 @@
+#!/usr/bin/python
+# tests/bpf.py -- test classic BPF filters for netlink sockets
+#
+# This file is part of the pymnl package, a Python interface
+# for netlink sockets.
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License
+#  as published by the Free Software Foundation; either version 2.1 of
+#  the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+#  USA
+#
+
+from struct import pack
+import unittest
+
+import pymnl
+from pymnl.bpf import *
+from pymnl.message import (Message, Payload, NLMSG_DONE, NLM_F_ACK,
+                           NLM_F_MULTI, NLM_F_REQUEST)
+from pymnl.nlsocket import Socket
+
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+IFLA_IFNAME = 3
+IFLA_MTU = 4
+
+
+def _attr(type_, value):
+    """ Return a kernel-style attribute, with an unpadded length.
+    """
+    padding = b'\x00' * ((4 - len(value) % 4) % 4)
+    return pack("HH", 4 + len(value), type_) + value + padding
+
+
+def _link(type_=RTM_NEWLINK, flags=0, ifindex=2, attrs=None):
+    """ Return a binary link message with an ifinfomsg header.
+    """
+    msg = Message()
+    msg.set_type(type_)
+    msg.set_flags(flags)
+    if (attrs is None):
+        attrs = [_attr(IFLA_IFNAME, b'eth0\x00'),
+                 _attr(IFLA_MTU, pack("I", 1500))]
+    msg.add_payload(Payload(pack("BBHiII", 0, 0, 1, ifindex, 0, 0) +
+                            b''.join(attrs)))
+    return msg.get_binary()
+
+
+class TestBpfProgram(unittest.TestCase):
+
+    def test_interpreter(self):
+        """ Test loads, arithmetic, and jumps in the reference interpreter.
+        """
+        prog = BpfProgram()
+        prog.stmt(BPF_LD | BPF_H | BPF_ABS, 0)
+        prog.stmt(BPF_ALU | BPF_ADD | BPF_K, 1)
+        prog.jump(BPF_JMP | BPF_JEQ | BPF_K, 0x0102, 0, 'bad')
+        prog.stmt(BPF_RET | BPF_A)
+        prog.label('bad')
+        prog.stmt(BPF_RET | BPF_K, 0)
+        self.assertEqual(prog.run(b'\x01\x01'), 0x0102)
+        self.assertEqual(prog.run(b'\x01\x02'), 0)
+        # loads past the end of the packet reject it
+        self.assertEqual(prog.run(b'\x01'), 0)
+
+    def test_assemble(self):
+        """ Test resolving labels and the binary instruction format.
+        """
+        prog = BpfProgram()
+        prog.ja('end')
+        prog.stmt(BPF_RET | BPF_K, 0)
+        prog.label('end')
+        prog.stmt(BPF_RET | BPF_K, ACCEPT)
+        self.assertEqual(prog.assemble(), [(BPF_JMP | BPF_JA, 0, 0, 1),
+                                           (BPF_RET, 0, 0, 0),
+                                           (BPF_RET, 0, 0, ACCEPT)])
+        self.assertEqual(len(prog.get_binary()), 3 * 8)
+        prog = BpfProgram()
+        prog.jump(BPF_JMP | BPF_JEQ | BPF_K, 0, 'end', 0)
+        for index in range(300):
+            prog.stmt(BPF_LD | BPF_IMM, index)
+        prog.label('end')
+        prog.stmt(BPF_RET | BPF_K, 0)
+        self.assertRaises(ValueError, prog.assemble)
+
+    @staticmethod
+    def load_tests(loader, tests, pattern):
+        """ Return tests from class.  Fake implementation of the load_tests
+            protocol from Michael Foord's discover.py.
+
+            loader, tests, and pattern do not do anything, yet
+        """
+        return unittest.TestLoader().loadTestsFromTestCase(TestBpfProgram)
+
+
+class TestNetlinkFilter(unittest.TestCase):
+
+    def test_type(self):
+        """ Test matching message types.
+        """
+        flt = NetlinkFilter().type_in(RTM_NEWLINK, RTM_DELLINK)
+        self.assertTrue(flt.run(_link(RTM_NEWLINK)))
+        self.assertTrue(flt.run(_link(RTM_DELLINK)))
+        self.assertFalse(flt.run(_link(18)))
+        self.assertFalse(flt.run(_link(RTM_NEWLINK + 0x100)))
+
+    def test_control(self):
+        """ Test that control messages pass unless told otherwise.
+        """
+        done = Message()
+        done.set_type(NLMSG_DONE)
+        done.add_payload(Payload(pack("i", 0)))
+        self.assertTrue(NetlinkFilter().type_in(RTM_NEWLINK).run(
+                                                    done.get_binary()))
+        self.assertFalse(NetlinkFilter(accept_control=False).type_in(
+                                    RTM_NEWLINK).run(done.get_binary()))
+
+    def test_flags(self):
+        """ Test matching message flags.
+        """
+        flt = NetlinkFilter().flags_set(NLM_F_MULTI | NLM_F_ACK)
+        self.assertTrue(flt.run(_link(flags=NLM_F_MULTI | NLM_F_ACK |
+                                            NLM_F_REQUEST)))
+        self.assertFalse(flt.run(_link(flags=NLM_F_MULTI)))
+
+    def test_field(self):
+        """ Test matching a field of the extra header.
+        """
+        flt = NetlinkFilter(16).field_in(4, [2, 300])
+        self.assertTrue(flt.run(_link(ifindex=2)))
+        self.assertTrue(flt.run(_link(ifindex=300)))
+        self.assertFalse(flt.run(_link(ifindex=3)))
+        self.assertFalse(flt.run(_link(ifindex=2 << 16)))
+
+    def test_attr_present(self):
+        """ Test searching for an attribute.
+        """
+        flt = NetlinkFilter(16).attr_present(IFLA_MTU)
+        self.assertTrue(flt.run(_link()))
+        self.assertFalse(flt.run(_link(attrs=[_attr(IFLA_IFNAME, b'lo\x00')])))
+        self.assertFalse(flt.run(_link(attrs=[])))
+        # the search is limited to max_attrs attributes
+        attrs = [_attr(1, b'')] * 4 + [_attr(IFLA_MTU, pack("I", 9000))]
+        self.assertTrue(NetlinkFilter(16, max_attrs=5).attr_present(
+                                            IFLA_MTU).run(_link(attrs=attrs)))
+        self.assertFalse(NetlinkFilter(16, max_attrs=4).attr_present(
+                                            IFLA_MTU).run(_link(attrs=attrs)))
+
+    def test_attr_eq(self):
+        """ Test matching attribute values.
+        """
+        flt = NetlinkFilter(16).attr_eq(IFLA_IFNAME, b'eth0\x00')
+        self.assertTrue(flt.run(_link()))
+        self.assertFalse(flt.run(_link(attrs=[_attr(IFLA_IFNAME,
+                                                    b'eth1\x00')])))
+        # too short to hold the value
+        self.assertFalse(flt.run(_link(attrs=[_attr(IFLA_IFNAME, b'eth')])))
+        flt = NetlinkFilter(16).attr_eq(IFLA_MTU, 1500).field_eq(4, 2)
+        self.assertTrue(flt.run(_link()))
+        self.assertFalse(flt.run(_link(ifindex=5)))
+        self.assertFalse(NetlinkFilter(16).attr_eq(IFLA_MTU, 9000).run(
+                                                                _link()))
+
+    def test_attach(self):
+        """ Test attaching and detaching a filter, which the kernel checks.
+        """
+        sock = Socket(pymnl.NETLINK_ROUTE)
+        flt = NetlinkFilter(16).type_in(RTM_NEWLINK).field_in(4, [1, 2])
+        flt.attr_present(IFLA_IFNAME).attr_eq(IFLA_IFNAME, b'lo\x00')
+        sock.attach_filter(flt)
+        sock.detach_filter()
+        sock.close()
+
+    @staticmethod
+    def load_tests(loader, tests, pattern):
+        """ Return tests from class.  Fake implementation of the load_tests
+            protocol from Michael Foord's discover.py.
+
+            loader, tests, and pattern do not do anything, yet
+        """
+        return unittest.TestLoader().loadTestsFromTestCase(TestNetlinkFilter)
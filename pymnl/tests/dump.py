@@ -0,0 +1,141 @@
+#!/usr/bin/python
+# tests/dump.py -- test structured dumps of netlink messages
+#
+# This file is part of the pymnl package, a Python interface
+# for netlink sockets.
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License
+#  as published by the Free Software Foundation; either version 2.1 of
+#  the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+#  USA
+#
+
+from struct import pack
+import unittest
+
+import pymnl
+from pymnl.attributes import Attr, iter_attrs
+from pymnl.dump import *
+from pymnl.message import Message, MessageList, Payload
+
+
+class CountingStream(object):
+    """ A stream which records each write() separately.
+    """
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(data)
+
+
+class TestDump(unittest.TestCase):
+
+    def setUp(self):
+        """ Build a message with an extra header, a string attribute,
+            and a nested attribute.
+        """
+        self.msg = Message()
+        self.msg.set_type(16)
+        self.msg.set_flags(5)
+        self.msg.set_seq(1289148991)
+        self.msg.put_extra_header(Payload(pack("BBH", 3, 1, 0)))
+        payload = self.msg.get_payload()
+        payload.add_attr(Attr.new_strz(3, b'eth0'))
+        nested = Attr(type=26, value=Attr.new_u32(1, 1).get_binary())
+        nested.toggle_nested()
+        payload.add_attr(nested)
+
+    def test_iter_attrs(self):
+        """ Test walking attribute headers.
+        """
+        data = self.msg.get_payload().get_data()
+        attrs = list(iter_attrs(data, 4))
+        self.assertEqual(len(attrs), 2)
+        (type_, start, end) = attrs[0]
+        self.assertEqual(type_, 3)
+        self.assertEqual(data[start:end], b'eth0\x00\x00\x00\x00')
+        (type_, start, end) = attrs[1]
+        self.assertEqual(type_, 26 | pymnl.attributes.NLA_F_NESTED)
+        self.assertEqual(list(iter_attrs(data, start, end)),
+                         [(1, start + 4, start + 8)])
+        # a truncated attribute stops the walk
+        self.assertEqual(list(iter_attrs(data[:-2], 4)), [attrs[0]])
+
+    def test_full(self):
+        """ Test the multi-line dump.
+        """
+        stream = CountingStream()
+        MessageDumper(stream, extra_header_sizes={16: 4}).dump(self.msg)
+        self.assertEqual(len(stream.writes), 1)
+        lines = stream.writes[0].splitlines()
+        self.assertEqual(lines[0],
+                         "len=44 type=16 flags=R-A- seq=1289148991 pid=0")
+        self.assertEqual(lines[1], "  hdr 03010000")
+        self.assertEqual(lines[2],
+                "  [len=12   type=3     --] 65746830 00000000 'eth0'")
+        self.assertEqual(lines[3], "  [len=12   type=26    N-]")
+        self.assertEqual(lines[4], "    [len=8    type=1     --] 01000000")
+        self.assertEqual(lines[5], "-" * 64)
+
+    def test_compact(self):
+        """ Test the one line per message dump.
+        """
+        stream = CountingStream()
+        dump(MessageList(self.msg.get_binary() + self.msg.get_binary()),
+             stream, compact=True, extra_header_sizes={16: 4})
+        self.assertEqual(len(stream.writes), 2)
+        self.assertEqual(stream.writes[0],
+                "len=44 type=16 flags=R-A- seq=1289148991 pid=0 | "
+                "hdr=03010000 3=6574683000000000 26{ 1=01000000 }\n")
+
+    def test_nested_types(self):
+        """ Test decoding nested attributes which lack NLA_F_NESTED.
+        """
+        msg = Message()
+        msg.set_type(16)
+        msg.add_payload(Payload(Attr(type=7,
+                        value=Attr.new_u32(2, 9).get_binary()).get_binary()))
+        stream = CountingStream()
+        MessageDumper(stream, compact=True).dump(msg)
+        self.assertTrue(stream.writes[0].endswith("| 7=0800020009000000\n"))
+        MessageDumper(stream, compact=True, nested_types=[7]).dump(msg)
+        self.assertTrue(stream.writes[1].endswith("| 7{ 2=09000000 }\n"))
+
+    def test_error(self):
+        """ Test dumps of NLMSG_ERROR and NLMSG_DONE messages.
+        """
+        error = Message()
+        error.set_type(pymnl.message.NLMSG_ERROR)
+        error.add_payload(Payload(pack("i", -2) +
+                                  self.msg.get_binary()[:16]))
+        done = Message()
+        done.set_type(pymnl.message.NLMSG_DONE)
+        done.add_payload(Payload(pack("i", 0)))
+        stream = CountingStream()
+        dumper = MessageDumper(stream, compact=True)
+        dumper.dump(error)
+        dumper.dump(done)
+        self.assertTrue(stream.writes[0].endswith(
+                "| error=2 (No such file or directory) for len=44 type=16 "
+                "flags=R-A- seq=1289148991 pid=0\n"))
+        self.assertTrue(stream.writes[1].endswith("| done\n"))
+
+    @staticmethod
+    def load_tests(loader, tests, pattern):
+        """ Return tests from class.  Fake implementation of the load_tests
+            protocol from Michael Foord's discover.py.
+
+            loader, tests, and pattern do not do anything, yet
+        """
+        return unittest.TestLoader().loadTestsFromTestCase(TestDump)
@@ -0,0 +1,198 @@
+#!/usr/bin/python
+# tests/latency.py -- test request to acknowledgement latency tracking
+#
+# This file is part of the pymnl package, a Python interface
+# for netlink sockets.
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License
+#  as published by the Free Software Foundation; either version 2.1 of
+#  the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+#  USA
+#
+
+from struct import pack
+import unittest
+
+import pymnl
+from pymnl.latency import *
+from pymnl.message import (Message, MessageList, Payload, NLMSG_DONE,
+                           NLMSG_ERROR, NLM_F_ACK, NLM_F_MULTI,
+                           NLM_F_REQUEST)
+from pymnl.nlsocket import Socket
+from pymnl.tests.nlsocket import MockSocket
+
+
+def _build(type_, flags, seq, payload=b'\x00\x00\x00\x00'):
+    """ Return a Message with the given header values.
+    """
+    msg = Message()
+    msg.set_type(type_)
+    msg.set_flags(flags)
+    msg.set_seq(seq)
+    msg.add_payload(Payload(payload))
+    return msg
+
+
+def _ack(request, errno_=0):
+    """ Return the NLMSG_ERROR acknowledging a request.
+    """
+    header = request.get_binary()[:16]
+    return _build(NLMSG_ERROR, 0, request.get_seq(),
+                  pack("i", -errno_) + header)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_empty(self):
+        """ Test that an empty histogram has no percentiles.
+        """
+        histogram = LatencyHistogram()
+        self.assertEqual(len(histogram), 0)
+        self.assertEqual(histogram.p50(), None)
+        self.assertEqual(histogram.summary()['mean'], None)
+
+    def test_percentiles(self):
+        """ Test that percentiles land within one bucket of the truth.
+        """
+        histogram = LatencyHistogram()
+        # 1ms to 1000ms, in 1ms steps
+        for index in range(1, 1001):
+            histogram.record(index / 1000.0)
+        self.assertEqual(len(histogram), 1000)
+        for (fraction, expected) in ((0.5, 0.5), (0.99, 0.99),
+                                     (0.999, 0.999)):
+            value = histogram.percentile(fraction)
+            self.assertTrue(expected <= value <= expected * 1.1,
+                "percentile %s was %s" % (fraction, value))
+        self.assertEqual(histogram.percentile(1.0), 1.0)
+        summary = histogram.summary()
+        self.assertEqual(summary['min'], 0.001)
+        self.assertEqual(summary['max'], 1.0)
+        self.assertAlmostEqual(summary['mean'], 0.5005)
+
+    def test_merge(self):
+        """ Test merging two histograms.
+        """
+        first = LatencyHistogram()
+        second = LatencyHistogram()
+        first.record(0.001)
+        second.record(0.002)
+        second.record(0.004)
+        first.merge(second)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(first.summary()['max'], 0.004)
+        self.assertEqual(first.summary()['min'], 0.001)
+
+    @staticmethod
+    def load_tests(loader, tests, pattern):
+        """ Return tests from class.  Fake implementation of the load_tests
+            protocol from Michael Foord's discover.py.
+
+            loader, tests, and pattern do not do anything, yet
+        """
+        return unittest.TestLoader().loadTestsFromTestCase(
+                                                    TestLatencyHistogram)
+
+
+class TestLatencyTracker(unittest.TestCase):
+
+    def test_ack(self):
+        """ Test matching an ack to its request.
+        """
+        tracker = LatencyTracker()
+        request = _build(24, NLM_F_REQUEST | NLM_F_ACK, 7)
+        tracker.message_sent(request, timestamp=10.0)
+        self.assertEqual(tracker.pending(), 1)
+        tracker.process(MessageList(_ack(request).get_binary()),
+                        timestamp=10.25)
+        self.assertEqual(tracker.pending(), 0)
+        self.assertEqual(len(tracker.get_histogram(24)), 1)
+        self.assertAlmostEqual(tracker.percentile(24, 0.5), 0.25)
+        self.assertEqual(tracker.percentile(16, 0.5), None)
+
+    def test_dump(self):
+        """ Test that a dump is complete at NLMSG_DONE, not before.
+        """
+        tracker = LatencyTracker()
+        tracker.request_sent(18, 3, timestamp=1.0)
+        reply = _build(16, NLM_F_MULTI, 3)
+        tracker.process([reply], timestamp=1.5)
+        self.assertEqual(tracker.pending(), 1)
+        tracker.process([_build(NLMSG_DONE, NLM_F_MULTI, 3)],
+                        timestamp=2.0)
+        self.assertEqual(tracker.pending(), 0)
+        self.assertAlmostEqual(tracker.percentile(18, 1.0), 1.0)
+
+    def test_unrelated_messages(self):
+        """ Test that events and non-requests are ignored.
+        """
+        tracker = LatencyTracker()
+        # no NLM_F_REQUEST flag
+        tracker.message_sent(_build(24, 0, 5))
+        self.assertEqual(tracker.pending(), 0)
+        tracker.request_sent(24, 5)
+        # event with sequence number zero
+        tracker.process([_build(24, 0, 0)])
+        self.assertEqual(tracker.pending(), 1)
+        self.assertEqual(tracker.summary(), {})
+
+    def test_max_pending(self):
+        """ Test that the oldest request is forgotten when full.
+        """
+        tracker = LatencyTracker(max_pending=2)
+        tracker.request_sent(24, 1, timestamp=1.0)
+        tracker.request_sent(24, 2, timestamp=2.0)
+        tracker.request_sent(24, 3, timestamp=3.0)
+        self.assertEqual(tracker.pending(), 2)
+        self.assertEqual(tracker.ack_received(1, timestamp=4.0), None)
+        self.assertEqual(tracker.ack_received(2, timestamp=4.0), 2.0)
+
+    def test_export(self):
+        """ Test the export hook.
+        """
+        exported = []
+        tracker = LatencyTracker()
+        tracker.set_export_hook(exported.append)
+        tracker.request_sent(24, 1, timestamp=1.0)
+        tracker.ack_received(1, timestamp=1.5)
+        summary = tracker.export(reset=True)
+        self.assertEqual(exported, [summary])
+        self.assertEqual(summary[24]['count'], 1)
+        self.assertEqual(tracker.summary(), {})
+
+    def test_socket(self):
+        """ Test latency tracking through a Socket.
+        """
+        sock = Socket(pymnl.NETLINK_GENERIC)
+        sock.get_sock().close()
+        sock._socket = MockSocket()
+        tracker = LatencyTracker()
+        sock.set_latency_tracker(tracker)
+        self.assertEqual(sock.get_latency_tracker(), tracker)
+        request = _build(16, NLM_F_REQUEST | NLM_F_ACK, 42)
+        sock.send(request)
+        self.assertEqual(tracker.pending(), 1)
+        sock._socket.send(_ack(request).get_binary())
+        sock.recv()
+        self.assertEqual(tracker.pending(), 0)
+        self.assertEqual(tracker.summary()[16]['count'], 1)
+        sock.close()
+
+    @staticmethod
+    def load_tests(loader, tests, pattern):
+        """ Return tests from class.  Fake implementation of the load_tests
+            protocol from Michael Foord's discover.py.
+
+            loader, tests, and pattern do not do anything, yet
+        """
+        return unittest.TestLoader().loadTestsFromTestCase(TestLatencyTracker)
@@ -294,6 +294,54 @@ class TestMessage(unittest.TestCase):
         self.msg._payload = payload
         self.assertEqual(self.msg.get_errstr(), 'No such file or directory')
 
+    def _ext_ack_tlvs(self):
+        """ Return extended ACK attributes as the kernel sends them.
+        """
+        text = b'Unknown attribute\x00'
+        return (pack("HH", 4 + len(text), NLMSGERR_ATTR_MSG) + text +
+                b'\x00' * 2 + pack("HHI", 8, NLMSGERR_ATTR_OFFS, 24))
+
+    def test_ext_ack(self):
+        """ Test Message.get_error_header() and Message.get_ext_ack().
+        """
+        request = Message()
+        request.set_type(24)
+        request.set_flags(NLM_F_REQUEST | NLM_F_ACK)
+        request.set_seq(77)
+        request.put_extra_header(Payload(b'\x00' * 8))
+        request.get_payload().add_attr(pymnl.attributes.Attr.new_u32(5, 1))
+        # capped: only the request header is echoed
+        capped = Message()
+        capped.set_type(NLMSG_ERROR)
+        capped.set_flags(NLM_F_CAPPED | NLM_F_ACK_TLVS)
+        capped.add_payload(Payload(pack("i", -22) +
+                                   request.get_binary()[:16] +
+                                   self._ext_ack_tlvs()))
+        self.assertEqual(capped.get_error_header(),
+                         (32, 24, NLM_F_REQUEST | NLM_F_ACK, 77, 0))
+        ext_ack = capped.get_ext_ack()
+        self.assertEqual(ext_ack['msg'], b'Unknown attribute')
+        self.assertEqual(ext_ack['offset'], 24)
+        self.assertEqual(request.get_attr_at(ext_ack['offset']).get_type(), 5)
+        self.assertEqual(request.get_attr_at(100), None)
+        # not capped: the whole request is echoed before the attributes
+        full = Message()
+        full.set_type(NLMSG_ERROR)
+        full.set_flags(NLM_F_ACK_TLVS)
+        full.add_payload(Payload(pack("i", -22) + request.get_binary() +
+                                 self._ext_ack_tlvs()))
+        self.assertEqual(full.get_ext_ack()['offset'], 24)
+        # no attributes without NLM_F_ACK_TLVS
+        full.set_flags(0)
+        self.assertEqual(full.get_ext_ack(), {})
+        # a dump which failed to start
+        done = Message()
+        done.set_type(NLMSG_DONE)
+        done.set_flags(NLM_F_MULTI | NLM_F_ACK_TLVS)
+        done.add_payload(Payload(pack("i", -22) + self._ext_ack_tlvs()))
+        self.assertEqual(done.get_ext_ack()['msg'], b'Unknown attribute')
+        self.assertEqual(done.get_error_header(), None)
+
     def tearDown(self):
         """ Clean up after each test.
         """
@@ -444,6 +492,74 @@ class TestPayload(unittest.TestCase):
         return unittest.TestLoader().loadTestsFromTestCase(TestPayload)
 
 
+class TestLazyMessage(unittest.TestCase):
+
+    def setUp(self):
+        """ Build a binary string with two messages.
+        """
+        self.msg = Message()
+        self.msg.set_type(16)
+        self.msg.set_flags(5)
+        self.msg.set_seq(randint(1, pow(2, 31)))
+        self.msg.set_portid(randint(1, pow(2, 31)))
+        self.msg.add_payload(Payload(pack("BBH", 3, 1, 0)))
+        self.msg.get_payload().add_attr(Attr.new_strz(2, b'nl80211'))
+        self.binary = self.msg.get_binary() + self.msg.get_binary()
+
+    def test_header(self):
+        """ Test that the header is decoded without building a Payload.
+        """
+        lazy = LazyMessage(self.binary, len(self.msg), len(self.binary))
+        self.assertEqual(lazy.get_type(), 16)
+        self.assertEqual(lazy.get_flags(), 5)
+        self.assertEqual(lazy.get_seq(), self.msg.get_seq())
+        self.assertEqual(lazy.get_portid(), self.msg.get_portid())
+        self.assertEqual(len(lazy), len(self.msg))
+        self.assertEqual(lazy._lazy_payload, None)
+        self.assertTrue(lazy.get_buffer()[0] is self.binary)
+
+    def test_payload(self):
+        """ Test that the Payload is built once, when first needed.
+        """
+        lazy = LazyMessage(self.binary, 0, len(self.msg))
+        payload = lazy.get_payload()
+        self.assertEqual(payload.get_binary(),
+                         self.msg.get_payload().get_binary())
+        self.assertTrue(lazy.get_payload() is payload)
+        self.assertEqual(lazy.get_binary(), self.msg.get_binary())
+        self.assertEqual(lazy.get_errno(), 0)
+
+    def test_replace_payload(self):
+        """ Test that adding payload drops the buffer.
+        """
+        lazy = LazyMessage(self.msg.get_binary())
+        lazy.add_payload(Payload(pack("i", 7)))
+        self.assertEqual(lazy.get_buffer(), None)
+        self.assertEqual(len(lazy), len(self.msg) + 4)
+
+    def test_message_list(self):
+        """ Test splitting a binary string into LazyMessages.
+        """
+        msglist = MessageList(self.binary, lazy=True)
+        self.assertEqual(len(msglist), 2)
+        for msg in msglist:
+            self.assertTrue(isinstance(msg, LazyMessage))
+            self.assertEqual(msg.get_binary(), self.msg.get_binary())
+        self.assertEqual(msglist.size(), 2 * len(self.msg))
+        # a truncated trailing message is dropped
+        msglist = MessageList(self.binary[:-4], lazy=True)
+        self.assertEqual(len(msglist), 1)
+
+    @staticmethod
+    def load_tests(loader, tests, pattern):
+        """ Return tests from class.  Fake implementation of the load_tests
+            protocol from Michael Foord's discover.py.
+
+            loader, tests, and pattern do not do anything, yet
+        """
+        return unittest.TestLoader().loadTestsFromTestCase(TestLazyMessage)
+
+
 class TestMessageList(unittest.TestCase):
 
     def setUp(self):
@@ -21,6 +21,7 @@
 #  USA
 #
 
+import errno
 from random import randint
 import socket
 from struct import pack
@@ -77,6 +78,54 @@ class TestSocket(unittest.TestCase):
         recv_msg = self.nl_socket.recv()[0]
         self.assertEqual(msg.get_binary(), recv_msg.get_binary())
 
+    def test_stats(self):
+        """ Test the socket counters after a send and a multipart recv.
+        """
+        msg = Message()
+        msg.set_type(16)
+        msg.set_seq(randint(1, pow(2, 31)))
+        msg.add_payload(Payload(pack("BBH", 3, 1, 0)))
+        error = Message()
+        error.set_type(pymnl.message.NLMSG_ERROR)
+        error.add_payload(Payload(pack("i", -errno.ENOENT) +
+                                  msg.get_binary()))
+        self.nl_socket._socket = MockSocket()
+        sent = self.nl_socket.send(msg)
+        self.nl_socket._socket.send(msg.get_binary() + error.get_binary())
+        self.nl_socket.recv()
+        stats = self.nl_socket.stats()
+        self.assertEqual(stats['datagrams_sent'], 1)
+        self.assertEqual(stats['bytes_sent'], sent)
+        self.assertEqual(stats['datagrams_received'], 1)
+        self.assertEqual(stats['bytes_received'],
+                         len(msg.get_binary() + error.get_binary()))
+        self.assertEqual(stats['messages'],
+                         {16: 1, pymnl.message.NLMSG_ERROR: 1})
+        self.assertEqual(stats['errors'], {errno.ENOENT: 1})
+        self.assertEqual(stats['multi_recvs'], 1)
+        self.assertEqual(stats['enobufs'], 0)
+        self.assertTrue(stats['recv_time'] >= 0.0)
+        self.assertTrue(stats['split_time'] >= 0.0)
+        # the snapshot is not changed by later activity
+        self.nl_socket.send(msg)
+        self.assertEqual(stats['datagrams_sent'], 1)
+        # reset all the counters
+        self.nl_socket.reset_stats()
+        stats = self.nl_socket.stats()
+        self.assertEqual(stats['datagrams_sent'], 0)
+        self.assertEqual(stats['messages'], {})
+        self.assertEqual(stats['errors'], {})
+
+    def test_stats_enobufs(self):
+        """ Test that a socket error is counted and re-raised.
+        """
+        self.nl_socket._socket = MockSocket(recv_errno=errno.ENOBUFS)
+        self.assertRaises(socket.error, self.nl_socket.recv)
+        stats = self.nl_socket.stats()
+        self.assertEqual(stats['enobufs'], 1)
+        self.assertEqual(stats['errors'], {errno.ENOBUFS: 1})
+        self.assertEqual(stats['datagrams_received'], 0)
+
     def test_get_sock(self):
         """ Test that the underlying socket can be retrieved.
         """
@@ -98,6 +147,20 @@ class TestSocket(unittest.TestCase):
         self.assertEqual(initial_sock_opt, final_sock_opt,
             "Netlink socket option did not matched")
 
+    def test_ack_options(self):
+        """ Test the acknowledgement and strict checking options.
+        """
+        for (setter, optname) in ((self.nl_socket.set_cap_ack,
+                                   NETLINK_CAP_ACK),
+                                  (self.nl_socket.set_ext_ack,
+                                   NETLINK_EXT_ACK),
+                                  (self.nl_socket.set_strict_check,
+                                   NETLINK_GET_STRICT_CHK)):
+            setter()
+            self.assertEqual(self.nl_socket.getsockopt(optname), 1)
+            setter(False)
+            self.assertEqual(self.nl_socket.getsockopt(optname), 0)
+
     def tearDown(self):
         """ Clean up after each test.
         """
@@ -114,14 +177,25 @@ class TestSocket(unittest.TestCase):
 
 
 class MockSocket(object):
+    def __init__(self, recv_errno=None):
+        """ A fake socket.
+
+            recv_errno - if set, recv() raises a socket.error with this
+                errno instead of returning the saved message
+        """
+        self._recv_errno = recv_errno
+
     def send(self, nl_message):
         """ Pretend to send a message, instead, save it.
         """
         self._message = nl_message
+        return len(nl_message)
 
     def recv(self, bufsize, flags):
         """ Return the saved message.
         """
+        if (self._recv_errno):
+            raise socket.error(self._recv_errno, "mock error")
         return self._message
 
     def close(self):
@@ -0,0 +1,171 @@
+#!/usr/bin/python
+# tests/pooldecode.py -- test decoding dumps in a pool of processes
+#
+# This file is part of the pymnl package, a Python interface
+# for netlink sockets.
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License
+#  as published by the Free Software Foundation; either version 2.1 of
+#  the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+#  USA
+#
+
+import errno
+from struct import pack
+import socket
+import unittest
+
+import pymnl
+from pymnl.callback import CallbackRunner
+from pymnl.genl import (CTRL_ATTR_FAMILY_ID, CTRL_ATTR_FAMILY_NAME,
+                        CTRL_CMD_GETFAMILY, GENL_ID_CTRL,
+                        GenlFamilyAttrParser, GenlMessageHeader)
+from pymnl.message import (Message, MessageList, Payload, NLMSG_DONE,
+                           NLM_F_DUMP, NLM_F_MULTI, NLM_F_REQUEST)
+from pymnl.nlsocket import Socket
+from pymnl import pooldecode
+from pymnl.pooldecode import *
+
+
+_GENL_HDRLEN = len(GenlMessageHeader())
+
+
+def _short_attr(type_, data):
+    """ Return an attribute with a kernel-style (unpadded) length.
+    """
+    padding = b'\x00' * (-len(data) % 4)
+    return pack("HH", 4 + len(data), type_) + data + padding
+
+
+def _family(seq, family_id, name):
+    """ Return a CTRL_CMD_NEWFAMILY-like message as a binary string.
+    """
+    payload = (pack("BBH", CTRL_CMD_GETFAMILY, 1, 0) +
+               _short_attr(CTRL_ATTR_FAMILY_ID, pack("H", family_id)) +
+               _short_attr(CTRL_ATTR_FAMILY_NAME, name + b'\x00'))
+    return pack("IHHII", 16 + len(payload), GENL_ID_CTRL, NLM_F_MULTI,
+                seq, 0) + payload
+
+
+def _done(seq, errno_=0):
+    """ Return an NLMSG_DONE as a binary string.
+    """
+    return pack("IHHIIi", 20, NLMSG_DONE, NLM_F_MULTI, seq, 0, -errno_)
+
+
+def _serial(datagrams):
+    """ Decode datagrams one message at a time in this process.
+    """
+    results = []
+    for data in datagrams:
+        for msg in MessageList(data):
+            if (msg.get_type() >= pymnl.message.NLMSG_MIN_TYPE):
+                attrs = GenlFamilyAttrParser().parse(msg.get_payload(),
+                                                     _GENL_HDRLEN)
+                attrs.pop('unmatched')
+                header = msg.get_payload().get_binary()[:_GENL_HDRLEN]
+                results.append((msg.get_type(), header, attrs))
+    return results
+
+
+def _family_dump_request(seq):
+    """ Return a CTRL_CMD_GETFAMILY dump request.
+    """
+    msg = Message()
+    msg.set_type(GENL_ID_CTRL)
+    msg.set_flags(NLM_F_REQUEST | NLM_F_DUMP)
+    msg.set_seq(seq)
+    msg.add_payload(GenlMessageHeader(command=CTRL_CMD_GETFAMILY,
+                                      version=1))
+    return msg
+
+
+@unittest.skipIf(pooldecode.shared_memory is None,
+                 "needs multiprocessing.shared_memory")
+class TestPoolDecoder(unittest.TestCase):
+
+    def setUp(self):
+        self.decoder = PoolDecoder(GenlFamilyAttrParser, _GENL_HDRLEN,
+                                   workers=2, chunk_size=4096)
+
+    def tearDown(self):
+        self.decoder.close()
+
+    def test_datagrams(self):
+        """ Test that results match serial decoding, in order, across
+            many chunks.
+        """
+        datagrams = []
+        for index in range(200):
+            datagrams.append(
+                b''.join([_family(index, index * 10 + part,
+                                  ("family%d" % (index * 10 + part)
+                                  ).encode('ascii'))
+                          for part in range(10)]))
+        datagrams.append(_done(200))
+        results = list(self.decoder.decode_datagrams(datagrams))
+        self.assertEqual(len(results), 2000)
+        self.assertEqual(results, _serial(datagrams))
+        self.assertEqual(results[1234][2],
+                         {'id': 1234, 'name': b'family1234'})
+
+    def test_stop_early(self):
+        """ Test that closing the iterator early frees the segments.
+        """
+        datagrams = [_family(index, index, b'x' * 1000)
+                        for index in range(100)]
+        results = self.decoder.decode_datagrams(datagrams)
+        self.assertEqual(next(results)[2]['id'], 0)
+        results.close()
+        self.assertEqual(list(self.decoder.decode_datagrams([])), [])
+
+    def test_dump(self):
+        """ Test a real generic netlink family dump.
+        """
+        sock = Socket(pymnl.NETLINK_GENERIC)
+        sock.bind()
+        sock.send(_family_dump_request(1))
+        expected = []
+        CallbackRunner(default=lambda msg: expected.append(msg.get_binary()),
+                       seq=1).run_socket(sock)
+        sock.send(_family_dump_request(2))
+        results = list(self.decoder.decode_dump(sock))
+        sock.close()
+        self.assertEqual(results, _serial(expected))
+        names = [attrs['name'] for (type_, header, attrs) in results]
+        self.assertTrue(b'nlctrl' in names)
+        self.assertEqual(len(set(names)), len(names))
+
+    def test_dump_error(self):
+        """ Test that an error ending a dump raises socket.error.
+        """
+        sock = Socket(pymnl.NETLINK_GENERIC)
+        sock.bind()
+        msg = Message()
+        msg.set_type(0x7ff0)
+        msg.set_flags(NLM_F_REQUEST | NLM_F_DUMP)
+        msg.set_seq(3)
+        msg.add_payload(GenlMessageHeader(command=CTRL_CMD_GETFAMILY,
+                                          version=1))
+        sock.send(msg)
+        try:
+            list(self.decoder.decode_dump(sock))
+            self.fail("no error raised")
+        except socket.error as error:
+            self.assertEqual(error.errno, errno.ENOENT)
+        finally:
+            sock.close()
+
+    @staticmethod
+    def load_tests(loader, tests, pattern):
+        return loader.loadTestsFromTestCase(TestPoolDecoder)
@@ -0,0 +1,682 @@
+#!/usr/bin/python
+# tests/rtnl.py -- test rtnetlink headers and request helpers
+#
+# This file is part of the pymnl package, a Python interface
+# for netlink sockets.
+#
+#  This library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License
+#  as published by the Free Software Foundation; either version 2.1 of
+#  the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307
+#  USA
+#
+
+import errno
+import socket
+from struct import pack
+import unittest
+
+import pymnl
+from pymnl.attributes import Attr, AttrParser
+from pymnl.callback import CallbackRunner, CB_STOP
+from pymnl.message import (Message, MessageList, NLM_F_ACK, NLM_F_CREATE,
+                           NLM_F_DUMP, NLM_F_EXCL, NLM_F_REQUEST, Payload)
+from pymnl.nlsocket import Socket
+from pymnl.rtnl import *
+
+
+def _attrs(msg, header_size):
+    """ Return a dict of attribute type to value for a Message or Payload.
+    """
+    payload = msg
+    if (not isinstance(msg, Payload)):
+        payload = msg.get_payload()
+    attrs = AttrParser().parse_string(payload.get_binary(), header_size)
+    return dict([(attr.get_type(), attr.get_data())
+                    for attr in attrs])
+
+
+class TestHeaders(unittest.TestCase):
+
+    def test_round_trip(self):
+        """ Test packing and unpacking the rtnetlink headers.
+        """
+        ifi = IfInfoMessage(type_=1, index=7, flags=0x41)
+        self.assertEqual(len(ifi), 16)
+        self.assertEqual(IfInfoMessage(
+                    contents=ifi.get_binary() + b'\x00' * 8).index, 7)
+        ifa = IfAddrMessage(socket.AF_INET, 24, index=3)
+        self.assertEqual(len(ifa), 8)
+        self.assertEqual(IfAddrMessage(contents=ifa.get_binary()).prefixlen,
+                         24)
+        rtm = RtMessage(socket.AF_INET6, table=RT_TABLE_MAIN,
+                        protocol=RTPROT_STATIC)
+        self.assertEqual(len(rtm), 12)
+        copy = RtMessage(contents=rtm.get_binary())
+        self.assertEqual((copy.family, copy.table, copy.protocol),
+                         (socket.AF_INET6, RT_TABLE_MAIN, RTPROT_STATIC))
+        self.assertEqual(RtGenMessageHeader(socket.AF_PACKET).get_binary(),
+                         pack("B", socket.AF_PACKET))
+        ndm = NdMessage(AF_BRIDGE, 7, NUD_PERMANENT, NTF_SELF, RTN_UNICAST)
+        self.assertEqual(len(ndm), 12)
+        copy = NdMessage(contents=ndm.get_binary())
+        self.assertEqual((copy.family, copy.ifindex, copy.state, copy.flags,
+                          copy.type_),
+                         (AF_BRIDGE, 7, NUD_PERMANENT, NTF_SELF, RTN_UNICAST))
+
+    @staticmethod
+    def load_tests(loader, tests, pattern):
+        """ Return tests from class.  Fake implementation of the load_tests
+            protocol from Michael Foord's discover.py.
+
+            loader, tests, and pattern do not do anything, yet
+        """
+        return unittest.TestLoader().loadTestsFromTestCase(TestHeaders)
+
+
+class TestRequests(unittest.TestCase):
+
+    def test_route_dump(self):
+        """ Test building filtered route dump requests.
+        """
+        msg = route_dump_request(socket.AF_INET, table=RT_TABLE_MAIN, oif=2,
+                                 protocol=RTPROT_KERNEL, seq=9)
+        self.assertEqual(msg.get_type(), RTM_GETROUTE)
+        self.assertEqual(msg.get_flags(), NLM_F_REQUEST | NLM_F_DUMP)
+        self.assertEqual(msg.get_seq(), 9)
+        rtm = RtMessage(contents=msg.get_payload().get_binary())
+        self.assertEqual((rtm.family, rtm.table, rtm.protocol),
+                         (socket.AF_INET, RT_TABLE_MAIN, RTPROT_KERNEL))
+        self.assertEqual(_attrs(msg, len(rtm)),
+                         {RTA_TABLE: pack("I", RT_TABLE_MAIN),
+                          RTA_OIF: pack("I", 2)})
+        # table ids above 255 only fit in RTA_TABLE
+        msg = route_dump_request(table=1000)
+        rtm = RtMessage(contents=msg.get_payload().get_binary())
+        self.assertEqual(rtm.table, RT_TABLE_UNSPEC)
+        self.assertEqual(_attrs(msg, len(rtm)),
+                         {RTA_TABLE: pack("I", 1000)})
+
+    def test_link_requests(self):
+        """ Test building link dump and get requests.
+        """
+        msg = link_dump_request(master=4, kind=b'vlan')
+        self.assertEqual(msg.get_type(), RTM_GETLINK)
+        self.assertEqual(msg.get_flags(), NLM_F_REQUEST | NLM_F_DUMP)
+        attrs = _attrs(msg, 16)
+        self.assertEqual(attrs[IFLA_MASTER], pack("I", 4))
+        self.assertEqual(attrs[IFLA_LINKINFO], pack("HH", 8, IFLA_INFO_KIND) +
+                                                b'vlan')
+        msg = link_get_request(3)
+        self.assertEqual(msg.get_flags(), NLM_F_REQUEST | NLM_F_ACK)
+        self.assertEqual(IfInfoMessage(
+                            contents=msg.get_payload().get_binary()).index, 3)
+
+    def test_ext_mask(self):
+        """ Test adding IFLA_EXT_MASK to link requests.
+        """
+        self.assertFalse(IFLA_EXT_MASK in _attrs(link_dump_request(), 16))
+        attrs = _attrs(link_dump_request(skip_stats=True), 16)
+        self.assertEqual(attrs[IFLA_EXT_MASK],
+                         pack("I", RTEXT_FILTER_SKIP_STATS))
+        attrs = _attrs(link_get_request(1, ext_mask=RTEXT_FILTER_VF,
+                                        skip_stats=True), 16)
+        self.assertEqual(attrs[IFLA_EXT_MASK],
+                pack("I", RTEXT_FILTER_VF | RTEXT_FILTER_SKIP_STATS))
+
+    def test_skip_stats(self):
+        """ Test that the kernel leaves out link stats when asked.
+        """
+        sizes = []
+        for skip_stats in (False, True):
+            sock = Socket(pymnl.NETLINK_ROUTE)
+            sock.bind()
+            sock.send(link_get_request(1, skip_stats=skip_stats))
+            links = []
+            CallbackRunner(default=links.append).run_socket(sock)
+            sock.close()
+            sizes.append(len(links[0].get_payload()))
+        self.assertTrue(sizes[1] < sizes[0])
+
+    def test_addr_dump(self):
+        """ Test building an address dump request.
+        """
+        msg = addr_dump_request(socket.AF_INET6, ifindex=5)
+        self.assertEqual(msg.get_type(), RTM_GETADDR)
+        ifa = IfAddrMessage(contents=msg.get_payload().get_binary())
+        self.assertEqual((ifa.family, ifa.index), (socket.AF_INET6, 5))
+
+    def test_neigh_dump(self):
+        """ Test building a neighbour dump request.
+        """
+        msg = neigh_dump_request(AF_BRIDGE, ifindex=5, master=3)
+        self.assertEqual(msg.get_type(), RTM_GETNEIGH)
+        self.assertEqual(msg.get_flags(), NLM_F_REQUEST | NLM_F_DUMP)
+        ndm = NdMessage(contents=msg.get_payload().get_binary())
+        # the filters must not be in the header with strict checking
+        self.assertEqual((ndm.family, ndm.ifindex), (AF_BRIDGE, 0))
+        self.assertEqual(_attrs(msg, len(ndm)),
+                         {NDA_IFINDEX: pack("I", 5),
+                          NDA_MASTER: pack("I", 3)})
+
+    def test_strict_dump(self):
+        """ Test that the kernel applies the table filter of a dump.
+        """
+        sock = Socket(pymnl.NETLINK_ROUTE)
+        sock.bind()
+        sock.set_strict_check()
+        sock.send(route_dump_request(socket.AF_INET, table=RT_TABLE_LOCAL))
+        tables = set()
+        runner = CallbackRunner(default=lambda msg: tables.add(
+                RtMessage(contents=msg.get_payload().get_data()).table))
+        self.assertEqual(runner.run_socket(sock), CB_STOP)
+        sock.close()
+        self.assertTrue(tables <= set([RT_TABLE_LOCAL]))
+
+    @staticmethod
+    def load_tests(loader, tests, pattern):
+        """ Return tests from class.  Fake implementation of the load_tests
+            protocol from Michael Foord's discover.py.
+
+            loader, tests, and pattern do not do anything, yet
+        """
+        return unittest.TestLoader().loadTestsFromTestCase(TestRequests)
+
+
+def _short_attr(type_, data):
+    """ Return an attribute with a kernel-style (unpadded) length.
+    """
+    padding = b'\x00' * (-len(data) % 4)
+    return pack("HH", 4 + len(data), type_) + data + padding
+
+
+def _typed_msg(type_, header, attrs):
+    """ Return a Message and a LazyMessage with a header and attributes
+        given as binary strings.
+    """
+    msg = Message()
+    msg.set_type(type_)
+    msg.add_payload(Payload(header.get_binary() + b''.join(attrs)))
+    return (msg, MessageList(msg.get_binary(), lazy=True)[0])
+
+
+class TestMessages(unittest.TestCase):
+
+    def test_link(self):
+        """ Test the header fields and attributes of a Link.
+        """
+        linkinfo = _short_attr(IFLA_INFO_KIND, b'vlan')
+        for msg in _typed_msg(RTM_NEWLINK,
+                              IfInfoMessage(index=5, flags=IFF_UP),
+                              [_short_attr(IFLA_IFNAME, b'eth0.5\x00'),
+                               _short_attr(IFLA_MTU, pack("I", 1500)),
+                               _short_attr(IFLA_ADDRESS,
+                                           b'\x02\x00\x00\x00\x00\x0a'),
+                               _short_attr(IFLA_LINKINFO | 0x8000,
+                                           linkinfo)]):
+            link = decode_message(msg)
+            self.assertTrue(isinstance(link, Link))
+            self.assertEqual((link.index, link.msg_type), (5, RTM_NEWLINK))
+            self.assertTrue(link.is_up())
+            self.assertFalse(link.is_running())
+            self.assertEqual(link.ifname, 'eth0.5')
+            self.assertEqual(link.mtu, 1500)
+            self.assertEqual(link.address, '02:00:00:00:00:0a')
+            self.assertEqual(link.kind, 'vlan')
+            self.assertEqual(link.master, None)
+            self.assertEqual(link.get_attr_types(),
+                             [IFLA_ADDRESS, IFLA_IFNAME, IFLA_MTU,
+                              IFLA_LINKINFO])
+            self.assertEqual(link.get_attr(IFLA_MTU), pack("I", 1500))
+            # decoded values are kept in the instance
+            self.assertEqual(link.__dict__['mtu'], 1500)
+            self.assertFalse('txqlen' in link.__dict__)
+
+    def test_route(self):
+        """ Test that RTA_TABLE overrides the header table of a Route.
+        """
+        header = RtMessage(socket.AF_INET6, dst_len=64,
+                           table=RT_TABLE_COMPAT, type_=RTN_UNICAST)
+        metrics = _short_attr(RTAX_MTU, pack("I", 1280))
+        (msg, lazy) = _typed_msg(RTM_NEWROUTE, header,
+            [_short_attr(RTA_TABLE, pack("I", 1000)),
+             _short_attr(RTA_DST, socket.inet_pton(socket.AF_INET6,
+                                                   '2001:db8::')),
+             _short_attr(RTA_GATEWAY, socket.inet_pton(socket.AF_INET6,
+                                                       'fe80::1')),
+             _short_attr(RTA_METRICS | 0x8000, metrics)])
+        route = Route(lazy)
+        self.assertEqual((route.family, route.dst_len, route.type_),
+                         (socket.AF_INET6, 64, RTN_UNICAST))
+        self.assertEqual(route.table, 1000)
+        self.assertEqual(route.dst, '2001:db8::')
+        self.assertEqual(route.gateway, 'fe80::1')
+        self.assertEqual(route.metrics, {RTAX_MTU: 1280})
+        self.assertEqual(route.oif, None)
+        (msg, lazy) = _typed_msg(RTM_DELROUTE,
+                                 RtMessage(table=RT_TABLE_MAIN), [])
+        self.assertEqual(Route(msg).table, RT_TABLE_MAIN)
+
+    def test_addr(self):
+        """ Test that IFA_FLAGS overrides the header flags of an Addr.
+        """
+        header = IfAddrMessage(socket.AF_INET, 24, IFA_F_SECONDARY, 0, 2)
+        local = socket.inet_pton(socket.AF_INET, '192.0.2.1')
+        (msg, lazy) = _typed_msg(RTM_NEWADDR, header,
+                                 [_short_attr(IFA_LOCAL, local),
+                                  _short_attr(IFA_LABEL, b'eth0:1\x00')])
+        addr = Addr(lazy)
+        self.assertEqual((addr.prefixlen, addr.index), (24, 2))
+        self.assertEqual(addr.flags, IFA_F_SECONDARY)
+        self.assertEqual(addr.local, '192.0.2.1')
+        self.assertEqual(addr.label, 'eth0:1')
+        (msg, lazy) = _typed_msg(RTM_NEWADDR, header,
+            [_short_attr(IFA_FLAGS, pack("I", IFA_F_NOPREFIXROUTE))])
+        self.assertEqual(Addr(msg).flags, IFA_F_NOPREFIXROUTE)
+
+    def test_neigh(self):
+        """ Test a bridge forwarding database Neigh.
+        """
+        header = NdMessage(AF_BRIDGE, 4, NUD_REACHABLE, NTF_SELF)
+        (msg, lazy) = _typed_msg(RTM_NEWNEIGH, header,
+            [_short_attr(NDA_LLADDR, b'\x02\x00\x00\x00\x00\x01'),
+             _short_attr(NDA_VLAN, pack("H", 10)),
+             _short_attr(NDA_PORT, pack(">H", 4789))])
+        neigh = decode_message(lazy)
+        self.assertEqual((neigh.family, neigh.ifindex, neigh.state,
+                          neigh.flags), (AF_BRIDGE, 4, NUD_REACHABLE,
+                                         NTF_SELF))
+        self.assertEqual(neigh.lladdr, '02:00:00:00:00:01')
+        self.assertEqual((neigh.vlan, neigh.port, neigh.dst),
+                         (10, 4789, None))
+        self.assertEqual(decode_message(_link_msg(RTM_GETLINK, 1)), None)
+
+    def test_dump(self):
+        """ Test typed messages from a real link dump.
+        """
+        sock = Socket(pymnl.NETLINK_ROUTE)
+        sock.bind()
+        sock.send(link_dump_request(seq=1))
+        links = []
+        runner = CallbackRunner(seq=1, default=lambda msg:
+                                links.append(decode_message(msg)))
+        self.assertEqual(runner.run_socket(sock), CB_STOP)
+        sock.close()
+        loopback = [link for link in links if (link.index == 1)][0]
+        self.assertEqual(loopback.ifname, 'lo')
+        self.assertTrue(loopback.flags & IFF_LOOPBACK)
+
+    @staticmethod
+    def load_tests(loader, tests, pattern):
+        """ Return tests from class.  Fake implementation of the load_tests
+            protocol from Michael Foord's discover.py.
+
+            loader, tests, and pattern do not do anything, yet
+        """
+        return unittest.TestLoader().loadTestsFromTestCase(TestMessages)
+
+
+def _link_msg(type_, index, name=None):
+    """ Return a link message, as sent by the kernel for an event.
+    """
+    msg = Message()
+    msg.set_type(type_)
+    msg.put_extra_header(IfInfoMessage(index=index))
+    if (name is not None):
+        msg.get_payload().add_attr(Attr.new_strz(IFLA_IFNAME, name))
+    return msg
+
+
+def _change_link(type_, flags, index=0, name=None, kind=None):
+    """ Send a link change request and return its errno.
+    """
+    attrs = []
+    if (name is not None):
+        attrs.append(Attr.new_strz(IFLA_IFNAME, name))
+    if (kind is not None):
+        linkinfo = Attr(type=IFLA_LINKINFO,
+                        value=Attr.new_str(IFLA_INFO_KIND, kind).get_binary())
+        linkinfo.toggle_nested()
+        attrs.append(linkinfo)
+    return _change(type_, flags, IfInfoMessage(index=index), attrs)
+
+
+def _change(type_, flags, header, attrs):
+    """ Send a change request and return its errno.
+    """
+    msg = Message()
+    msg.set_type(type_)
+    msg.set_flags(NLM_F_REQUEST | NLM_F_ACK | flags)
+    msg.set_seq(1)
+    msg.put_extra_header(header)
+    for attr in attrs:
+        msg.get_payload().add_attr(attr)
+    sock = Socket(pymnl.NETLINK_ROUTE)
+    sock.bind()
+    sock.send(msg)
+    runner = CallbackRunner(seq=1)
+    runner.run_socket(sock)
+    sock.close()
+    return runner.get_errno()
+
+
+class TestLinkNameCache(unittest.TestCase):
+
+    def test_load(self):
+        """ Test that the cache holds the loopback link.
+        """
+        cache = LinkNameCache(subscribe=False)
+        self.assertEqual(cache.get_index('lo'), 1)
+        self.assertEqual(cache.get_index(b'lo'), 1)
+        self.assertEqual(cache.get_name(1), 'lo')
+        self.assertTrue('lo' in cache)
+        self.assertEqual(len(cache), len(cache.get_names()))
+        self.assertEqual(cache.get_index('no-such-link'), 0)
+        self.assertEqual(cache.get_index('no-such-link', None), None)
+        self.assertEqual(cache.get_name(0x7ffffff0), None)
+        self.assertEqual(list(cache.resolve(['lo', 'no-such-link', b'lo'])),
+                         [1, 0, 1])
+
+    def test_update(self):
+        """ Test new, renamed, and deleted links.
+        """
+        cache = LinkNameCache(subscribe=False)
+        count = len(cache)
+        cache.update(_link_msg(RTM_NEWLINK, 5000, b'test0'))
+        self.assertEqual(cache.get_index('test0'), 5000)
+        self.assertEqual(len(cache), count + 1)
+        # rename
+        cache.update(_link_msg(RTM_NEWLINK, 5000, b'test1'))
+        self.assertEqual(cache.get_index('test0'), 0)
+        self.assertEqual(cache.get_index('test1'), 5000)
+        self.assertEqual(cache.get_name(5000), 'test1')
+        # no name, no change
+        cache.update(_link_msg(RTM_NEWLINK, 5000))
+        self.assertEqual(cache.get_name(5000), 'test1')
+        # a new link takes the name of an old one
+        cache.update(_link_msg(RTM_NEWLINK, 5001, b'test1'))
+        cache.update(_link_msg(RTM_DELLINK, 5000, b'test1'))
+        self.assertEqual(cache.get_index('test1'), 5001)
+        self.assertEqual(cache.get_name(5000), None)
+        cache.update(_link_msg(RTM_DELLINK, 5001, b'test1'))
+        self.assertEqual(len(cache), count)
+        # other messages are ignored
+        cache.update(_link_msg(RTM_NEWADDR, 5002, b'test2'))
+        self.assertEqual(len(cache), count)
+
+    def test_events(self):
+        """ Test that refresh() follows the kernel's link events.
+        """
+        cache = LinkNameCache()
+        error = _change_link(RTM_NEWLINK, NLM_F_CREATE | NLM_F_EXCL,
+                             name=b'pymnltest0', kind=b'ifb')
+        if (error in (errno.EPERM, errno.EOPNOTSUPP)):
+            cache.close()
+            self.skipTest("cannot create links here")
+        self.assertEqual(error, 0)
+        try:
+            # found through the refresh done on a miss
+            index = cache.get_index('pymnltest0')
+            self.assertNotEqual(index, 0)
+            self.assertEqual(_change_link(RTM_NEWLINK, 0, index,
+                                          name=b'pymnltest1'), 0)
+            self.assertTrue(cache.refresh() > 0)
+            self.assertEqual(cache.get_index('pymnltest0'), 0)
+            self.assertEqual(cache.get_name(index), 'pymnltest1')
+        finally:
+            _change_link(RTM_DELLINK, 0, name=b'pymnltest0')
+            _change_link(RTM_DELLINK, 0, name=b'pymnltest1')
+        cache.refresh()
+        self.assertEqual(cache.get_name(index), None)
+        cache.close()
+
+    @staticmethod
+    def load_tests(loader, tests, pattern):
+        """ Return tests from class.  Fake implementation of the load_tests
+            protocol from Michael Foord's discover.py.
+
+            loader, tests, and pattern do not do anything, yet
+        """
+        return unittest.TestLoader().loadTestsFromTestCase(TestLinkNameCache)
+
+
+def _addr_msg(type_, index, local, prefixlen=24, peer=None):
+    """ Return an IPv4 address message, as sent by the kernel for an
+        event.
+    """
+    msg = Message()
+    msg.set_type(type_)
+    msg.put_extra_header(IfAddrMessage(socket.AF_INET, prefixlen, 0, 0,
+                                       index))
+    local = socket.inet_pton(socket.AF_INET, local)
+    address = local
+    if (peer is not None):
+        address = socket.inet_pton(socket.AF_INET, peer)
+    msg.get_payload().add_attr(Attr(type=IFA_ADDRESS, value=address))
+    msg.get_payload().add_attr(Attr(type=IFA_LOCAL, value=local))
+    return msg
+
+
+class TestAddrMirror(unittest.TestCase):
+
+    def test_load(self):
+        """ Test that the mirror holds the loopback addresses.
+        """
+        mirror = AddrMirror(subscribe=False)
+        self.assertEqual(mirror.get_owner('127.0.0.1'), 1)
+        self.assertTrue(mirror.is_local('127.0.0.1'))
+        self.assertEqual(mirror.get_owner('192.0.2.200'), 0)
+        self.assertEqual(mirror.get_owner('192.0.2.200', None), None)
+        entry = mirror.get_by_address('127.0.0.1')[0]
+        self.assertEqual((entry.index, entry.family, entry.prefixlen,
+                          entry.scope, entry.label),
+                         (1, socket.AF_INET, 8, RT_SCOPE_HOST, 'lo'))
+        self.assertTrue(entry in mirror.get_by_index(1))
+        self.assertEqual(mirror.get_by_index(1, socket.AF_INET), [entry])
+        self.assertEqual(len(mirror), len(list(mirror)))
+
+    def test_update(self):
+        """ Test new and deleted addresses, and address lookups.
+        """
+        mirror = AddrMirror(subscribe=False)
+        count = len(mirror)
+        mirror.update(_addr_msg(RTM_NEWADDR, 5000, '192.0.2.200'))
+        mirror.update(_addr_msg(RTM_NEWADDR, 5001, '192.0.2.201',
+                                prefixlen=32, peer='192.0.2.202'))
+        self.assertEqual(len(mirror), count + 2)
+        self.assertEqual(mirror.get_owner('192.0.2.200'), 5000)
+        entry = mirror.get_by_index(5001)[0]
+        self.assertEqual((entry.address, entry.peer),
+                         ('192.0.2.201', '192.0.2.202'))
+        # the peer is not a local address
+        self.assertFalse(mirror.is_local('192.0.2.202'))
+        # the same address on another link
+        mirror.update(_addr_msg(RTM_NEWADDR, 5002, '192.0.2.200'))
+        self.assertEqual(len(mirror.get_by_address('192.0.2.200')), 2)
+        mirror.update(_addr_msg(RTM_DELADDR, 5000, '192.0.2.200'))
+        self.assertEqual(mirror.get_owner('192.0.2.200'), 5002)
+        self.assertEqual(mirror.get_by_index(5000), [])
+        mirror.update(_addr_msg(RTM_DELADDR, 5002, '192.0.2.200'))
+        mirror.update(_addr_msg(RTM_DELADDR, 5001, '192.0.2.201',
+                                prefixlen=32, peer='192.0.2.202'))
+        self.assertEqual(len(mirror), count)
+        self.assertFalse(mirror.is_local('192.0.2.200'))
+
+    def test_ipv6_lookup(self):
+        """ Test that IPv6 addresses are found in any written form.
+        """
+        mirror = AddrMirror(subscribe=False)
+        self.assertEqual(mirror.get_owner('::1'), 1)
+        self.assertEqual(mirror.get_owner('0:0:0:0:0:0:0:1'), 1)
+        self.assertEqual(mirror.get_owner('not an address'), 0)
+
+    def test_events(self):
+        """ Test that refresh() follows the kernel's address events.
+        """
+        index = LinkNameCache(subscribe=False).get_index('lo')
+        mirror = AddrMirror()
+        header = IfAddrMessage(socket.AF_INET, 32, 0, RT_SCOPE_HOST, index)
+        local = Attr(type=IFA_LOCAL,
+                     value=socket.inet_pton(socket.AF_INET, '198.51.100.7'))
+        error = _change(RTM_NEWADDR, NLM_F_CREATE | NLM_F_EXCL, header,
+                        [local])
+        if (error == errno.EPERM):
+            mirror.close()
+            self.skipTest("cannot change addresses here")
+        self.assertEqual(error, 0)
+        try:
+            self.assertTrue(mirror.refresh() > 0)
+            self.assertEqual(mirror.get_owner('198.51.100.7'), index)
+        finally:
+            _change(RTM_DELADDR, 0, header, [local])
+        mirror.refresh()
+        self.assertEqual(mirror.get_owner('198.51.100.7'), 0)
+        mirror.close()
+
+    @staticmethod
+    def load_tests(loader, tests, pattern):
+        """ Return tests from class.  Fake implementation of the load_tests
+            protocol from Michael Foord's discover.py.
+
+            loader, tests, and pattern do not do anything, yet
+        """
+        return unittest.TestLoader().loadTestsFromTestCase(TestAddrMirror)
+
+
+def _neigh_msg(type_, family, ifindex, dst=None, lladdr=None, vlan=None,
+               state=NUD_REACHABLE):
+    """ Return a neighbour message, as sent by the kernel for an event.
+    """
+    msg = Message()
+    msg.set_type(type_)
+    msg.put_extra_header(NdMessage(family, ifindex, state))
+    if (dst is not None):
+        dst = socket.inet_pton(':' in dst and socket.AF_INET6 or
+                               socket.AF_INET, dst)
+        msg.get_payload().add_attr(Attr(type=NDA_DST, value=dst))
+    if (lladdr is not None):
+        msg.get_payload().add_attr(Attr(type=NDA_LLADDR, value=lladdr))
+    if (vlan is not None):
+        msg.get_payload().add_attr(Attr.new_u16(NDA_VLAN, vlan))
+    return msg
+
+
+class TestNeighTable(unittest.TestCase):
+
+    def test_load(self):
+        """ Test that the table loads, one dump per family.
+        """
+        table = NeighTable(subscribe=False)
+        self.assertEqual(len(table), len(list(table)))
+        for entry in table:
+            self.assertTrue(entry.family in (socket.AF_INET,
+                                             socket.AF_INET6, AF_BRIDGE))
+        table = NeighTable([socket.AF_INET], subscribe=False)
+        self.assertEqual(set([entry.family for entry in table]) -
+                         set([socket.AF_INET]), set())
+
+    def test_update(self):
+        """ Test new, changed, and deleted ARP, NDP and FDB entries.
+        """
+        table = NeighTable(subscribe=False)
+        count = len(table)
+        mac = b'\x02\x00\x00\x00\x00\x01'
+        table.update(_neigh_msg(RTM_NEWNEIGH, socket.AF_INET, 5000,
+                                '192.0.2.1', mac))
+        table.update(_neigh_msg(RTM_NEWNEIGH, socket.AF_INET6, 5000,
+                                '2001:db8::1', state=NUD_INCOMPLETE))
+        table.update(_neigh_msg(RTM_NEWNEIGH, AF_BRIDGE, 5001,
+                                lladdr=mac, vlan=10))
+        self.assertEqual(len(table), count + 3)
+        entry = table.lookup(5000, '192.0.2.1')
+        self.assertEqual((entry.family, entry.ifindex, entry.state,
+                          entry.lladdr),
+                         (socket.AF_INET, 5000, NUD_REACHABLE,
+                          '02:00:00:00:00:01'))
+        entry = table.lookup(5000, '2001:DB8::1')
+        self.assertEqual((entry.dst, entry.lladdr, entry.state),
+                         ('2001:db8::1', None, NUD_INCOMPLETE))
+        entry = table.lookup_fdb(5001, '02:00:00:00:00:01', 10)
+        self.assertEqual((entry.family, entry.vlan, entry.dst),
+                         (AF_BRIDGE, 10, None))
+        self.assertEqual(table.lookup_fdb(5001, '02:00:00:00:00:01'), None)
+        # a change replaces the entry
+        table.update(_neigh_msg(RTM_NEWNEIGH, socket.AF_INET, 5000,
+                                '192.0.2.1', mac, state=NUD_STALE))
+        self.assertEqual(table.lookup(5000, '192.0.2.1').state, NUD_STALE)
+        self.assertEqual(len(table), count + 3)
+        # deleting a row moves the last one into its place
+        table.update(_neigh_msg(RTM_DELNEIGH, socket.AF_INET, 5000,
+                                '192.0.2.1'))
+        self.assertEqual(table.lookup(5000, '192.0.2.1'), None)
+        self.assertEqual(table.lookup_fdb(5001, '02:00:00:00:00:01',
+                                          10).ifindex, 5001)
+        self.assertEqual(len(table.get_by_ifindex(5000)), 1)
+        self.assertEqual(table.get_by_ifindex(5000, socket.AF_INET), [])
+        table.update(_neigh_msg(RTM_DELNEIGH, socket.AF_INET6, 5000,
+                                '2001:db8::1'))
+        table.update(_neigh_msg(RTM_DELNEIGH, AF_BRIDGE, 5001,
+                                lladdr=mac, vlan=10))
+        self.assertEqual(len(table), count)
+        # other messages and families are ignored
+        table.update(_addr_msg(RTM_NEWADDR, 5000, '192.0.2.200'))
+        table = NeighTable([socket.AF_INET6], subscribe=False)
+        count = len(table)
+        table.update(_neigh_msg(RTM_NEWNEIGH, socket.AF_INET, 5000,
+                                '192.0.2.1', mac))
+        self.assertEqual(len(table), count)
+
+    def test_lazy(self):
+        """ Test that entries are decoded from a LazyMessage.
+        """
+        table = NeighTable(subscribe=False)
+        msg = _neigh_msg(RTM_NEWNEIGH, AF_BRIDGE, 5002, '192.0.2.9',
+                         b'\x02\x00\x00\x00\x00\x02')
+        table.update(MessageList(msg.get_binary(), lazy=True)[0])
+        entry = table.lookup_fdb(5002, '02:00:00:00:00:02',
+                                 dst='192.0.2.9')
+        self.assertEqual((entry.dst, entry.vlan), ('192.0.2.9', 0))
+
+    def test_events(self):
+        """ Test that refresh() follows the kernel's neighbour events.
+        """
+        index = LinkNameCache(subscribe=False).get_index('lo')
+        table = NeighTable([socket.AF_INET])
+        header = NdMessage(socket.AF_INET, index, NUD_PERMANENT)
+        attrs = [Attr(type=NDA_DST,
+                      value=socket.inet_pton(socket.AF_INET, '198.51.100.8')),
+                 Attr(type=NDA_LLADDR, value=b'\x02\x00\x00\x00\x00\x08')]
+        error = _change(RTM_NEWNEIGH, NLM_F_CREATE | NLM_F_EXCL, header,
+                        attrs)
+        if (error in (errno.EPERM, errno.EINVAL, errno.EOPNOTSUPP)):
+            table.close()
+            self.skipTest("cannot change neighbours here")
+        self.assertEqual(error, 0)
+        try:
+            self.assertTrue(table.refresh() > 0)
+            entry = table.lookup(index, '198.51.100.8')
+            self.assertEqual((entry.state, entry.lladdr),
+                             (NUD_PERMANENT, '02:00:00:00:00:08'))
+        finally:
+            _change(RTM_DELNEIGH, 0, header, attrs[:1])
+        table.refresh()
+        self.assertEqual(table.lookup(index, '198.51.100.8'), None)
+        table.close()
+
+    @staticmethod
+    def load_tests(loader, tests, pattern):
+        """ Return tests from class.  Fake implementation of the load_tests
+            protocol from Michael Foord's discover.py.
+
+            loader, tests, and pattern do not do anything, yet
+        """
+        return unittest.TestLoader().loadTestsFromTestCase(TestNeighTable)